@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency of the unified and fan-out analysis modes.
+
+Runs bench/load.py once per ANALYSIS_MODE against the app (with the fake
+OpenAI and Zep servers) at the same offered load and prints one row per
+mode. The fake OpenAI server charges --openai-token-ms per completion
+token on top of --openai-latency-ms per call, so a long answer costs more
+than a short one, which is what fan-out trades on. Run from backend/:
+
+    python bench/analysis_modes.py --rps 0.5 --duration 30 \\
+        --openai-latency-ms 400 --openai-token-ms 15
+
+Request latency includes Whisper, which is the same in both modes; the
+--metrics-out files have the llm stage on its own.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import load  # noqa: E402
+
+
+def run_mode(mode, args):
+    load_args = load.build_parser().parse_args(
+        [
+            "--spawn",
+            "--mode",
+            args.mode,
+            "--rps",
+            str(args.rps),
+            "--duration",
+            str(args.duration),
+            "--audio-seconds",
+            str(args.audio_seconds),
+            "--openai-latency-ms",
+            str(args.openai_latency_ms),
+            "--openai-token-ms",
+            str(args.openai_token_ms),
+            "--app-env",
+            f"ANALYSIS_MODE={mode}",
+            "--app-env",
+            "LOG_LEVEL=WARNING",
+            # The fake transcripts repeat, so cached answers would hide the calls
+            "--app-env",
+            "LLM_CACHE=off",
+        ]
+    )
+    app, base_url, openai_server, zep_server = load.spawn_stack(load_args)
+    try:
+        report = load.run_load(load_args, base_url, openai_server.url, zep_server.url)
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+        openai_server.stop()
+        zep_server.stop()
+    return {"analysis_mode": mode, **report}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="unified vs fan-out analysis")
+    parser.add_argument("--modes", nargs="+", default=["unified", "fanout"])
+    parser.add_argument("--mode", choices=("jobs", "stream"), default="jobs")
+    # Low enough that requests don't queue for the job workers
+    parser.add_argument("--rps", type=float, default=0.5)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--audio-seconds", type=float, default=60.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=400.0)
+    parser.add_argument("--openai-token-ms", type=float, default=15.0)
+    args = parser.parse_args(argv)
+
+    rows = []
+    for mode in args.modes:
+        row = run_mode(mode, args)
+        rows.append(row)
+        print(json.dumps(row), file=sys.stderr)
+
+    print(
+        f"{'analysis':<10}{'sent':>6}{'done':>6}{'429':>6}{'fail':>6}"
+        f"{'p50 s':>8}{'p95 s':>8}{'calls/req':>11}"
+    )
+    for row in rows:
+        latency = row["latency_s"]
+        print(
+            f"{row['analysis_mode']:<10}{row['sent']:>6}{row['completed']:>6}"
+            f"{row['rejected']:>6}{row['failed']:>6}"
+            f"{latency['p50'] or 0:>8.2f}{latency['p95'] or 0:>8.2f}"
+            f"{row['openai_calls_per_request']:>11.2f}"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    main()
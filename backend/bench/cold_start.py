@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cold-start latency: how long a fresh app process takes to come up and to
+serve its first /transcribe, compared with the request right after it.
+
+Each run starts the fake OpenAI and Zep servers and a new app process, waits
+for /health (and, with --wait-ready, for /ready), then sends two requests
+one after the other. Run from backend/:
+
+    python bench/cold_start.py --runs 5 --wait-ready \\
+        --app-cmd "python -m gunicorn -c gunicorn.conf.py"
+
+--app-cmd can point at another checkout to get a before/after comparison.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import load  # noqa: E402
+
+
+def wait_ready(base_url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/ready", timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"{base_url} not ready within {timeout}s")
+
+
+def cold_start(args):
+    load_args = load.build_parser().parse_args(
+        [
+            "--openai-latency-ms",
+            str(args.openai_latency_ms),
+            "--zep-latency-ms",
+            str(args.zep_latency_ms),
+            "--app-cmd",
+            args.app_cmd,
+            "--app-env",
+            "LOG_LEVEL=WARNING",
+        ]
+    )
+    started = time.perf_counter()
+    app, base_url, openai_server, zep_server = load.spawn_stack(load_args)
+    try:
+        run = {"boot_s": time.perf_counter() - started}
+        if args.wait_ready:
+            wait_ready(base_url)
+            run["ready_s"] = time.perf_counter() - started
+        for name in ("first_s", "second_s"):
+            result = load.run_request(
+                base_url,
+                load.synthetic_wav(args.audio_seconds),
+                "jobs",
+                poll_interval=0.02,
+                timeout=120,
+            )
+            if result["status"] != "done":
+                raise RuntimeError(f"request failed: {result}")
+            run[name] = result["latency"]
+        return run
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+        openai_server.stop()
+        zep_server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start latency")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app-cmd", default=load.DEFAULT_APP_CMD)
+    parser.add_argument("--wait-ready", action="store_true")
+    parser.add_argument("--audio-seconds", type=float, default=20.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=800.0)
+    parser.add_argument("--zep-latency-ms", type=float, default=150.0)
+    args = parser.parse_args(argv)
+
+    runs = [cold_start(args) for _ in range(args.runs)]
+    report = {
+        "app_cmd": args.app_cmd,
+        "runs": args.runs,
+        **{
+            key: round(statistics.median(run[key] for run in runs), 3)
+            for key in runs[0]
+        },
+    }
+    report["first_minus_second_s"] = round(report["first_s"] - report["second_s"], 3)
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI endpoints app.py uses.
+
+Serves /v1/audio/transcriptions (verbose_json) and /v1/chat/completions
+(plain and stream=True). Transcripts are synthetic: one segment every
+SEGMENT_SECONDS of audio, with the duration estimated from the upload
+size as 16 kHz mono 16-bit PCM. Chat answers hold the fields the request's
+json_schema response_format asks for (all of ANALYSIS without one), and
+--malformed-rate cuts that fraction of them off halfway to exercise the
+app's repair path. --token-ms adds generation time per completion token, so
+longer answers take longer, as they do for the real model. Point the app at
+it with
+
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:9101/v1
+
+and run from backend/:
+
+    python bench/fake_openai.py --latency-ms 800 --error-rate 0.01
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+
+from fakes import FakeServer, add_common_args
+
+SEGMENT_SECONDS = 4.0
+BYTES_PER_SECOND = 32000
+SPEAKERS = ("Alex Chen", "Sarah Kim")
+LINES = (
+    "Hey, I'm Alex. I work at Stanford on a fintech app.",
+    "Nice to meet you Alex, I'm Sarah. I'm interested in climate tech.",
+    "I plan to launch next semester, we just raised a seed round.",
+    "I love hiking and I speak Korean fluently.",
+)
+
+ANALYSIS = {
+    "transcript": [
+        {"speaker": SPEAKERS[i % 2], "text": line} for i, line in enumerate(LINES)
+    ],
+    "facts": {
+        "Alex Chen": [
+            "Alex works at Stanford",
+            "Alex plans to launch his fintech app next semester",
+        ],
+        "Sarah Kim": [
+            "Sarah is interested in climate tech",
+            "Sarah loves hiking",
+        ],
+    },
+    "summary": "Alex and Sarah met and talked about fintech, climate tech and hiking.",
+}
+
+
+def answer(response_format, prompt):
+    """The analysis fields a json_schema response_format asks for, in its shapes"""
+    if (response_format or {}).get("type") != "json_schema":
+        return ANALYSIS
+    properties = response_format["json_schema"]["schema"]["properties"]
+    if properties.get("facts", {}).get("items", {}).get("type") == "string":
+        # One speaker's facts: the first speaker the prompt names
+        named = [name for name in SPEAKERS if name in prompt]
+        speaker = min(named, key=prompt.index) if named else SPEAKERS[0]
+        return {"facts": ANALYSIS["facts"][speaker]}
+    values = {
+        **ANALYSIS,
+        "speakers": [
+            {"label": f"{part}:{speaker}", "name": speaker}
+            for part in (1, 2)
+            for speaker in SPEAKERS
+        ],
+    }
+    if properties.get("facts", {}).get("type") == "array":
+        values["facts"] = [
+            {"speaker": speaker, "facts": facts}
+            for speaker, facts in ANALYSIS["facts"].items()
+        ]
+    return {name: values[name] for name in properties}
+
+
+def build_server(malformed_rate=0.0, token_ms=0.0, **kwargs):
+    server = FakeServer("fake-openai", **kwargs)
+
+    @server.route("GET", r"/v1/models", "models.list")
+    def models(request):
+        return 200, {
+            "object": "list",
+            "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "openai"}
+                for model in ("whisper-1", "gpt-4o-mini")
+            ],
+        }
+
+    @server.route("POST", r"/v1/audio/transcriptions", "audio.transcriptions")
+    def transcriptions(request):
+        duration = max(1.0, len(request.body) / BYTES_PER_SECOND)
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + SEGMENT_SECONDS)
+            segments.append(
+                {
+                    "id": len(segments),
+                    "seek": 0,
+                    "start": round(start, 2),
+                    "end": round(end, 2),
+                    "text": " " + LINES[len(segments) % len(LINES)],
+                    "tokens": [],
+                    "temperature": 0.0,
+                    "avg_logprob": -0.2,
+                    "compression_ratio": 1.2,
+                    "no_speech_prob": 0.01,
+                }
+            )
+            start = end
+        return 200, {
+            "task": "transcribe",
+            "language": "english",
+            "duration": round(duration, 2),
+            "text": "".join(segment["text"] for segment in segments).strip(),
+            "segments": segments,
+        }
+
+    @server.route("POST", r"/v1/chat/completions", "chat.completions")
+    def chat_completions(request):
+        body = request.json_body()
+        prompt = body["messages"][-1].get("content", "")
+        content = json.dumps(answer(body.get("response_format"), prompt), indent=2)
+        if random.random() < malformed_rate:
+            content = content[: len(content) // 2]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4o-mini")
+        prompt_tokens = sum(len(m.get("content", "")) for m in body["messages"]) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        }
+
+        if not body.get("stream"):
+            time.sleep(usage["completion_tokens"] * token_ms / 1000)
+            return 200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+
+        events = [chunk({"role": "assistant", "content": ""})]
+        for i in range(0, len(content), 24):
+            events.append(chunk({"content": content[i : i + 24]}))
+        events.append(chunk({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({**chunk({}), "choices": [], "usage": usage})
+        events.append("[DONE]")
+        # About six tokens per 24-character chunk
+        request.send_events(events, delay=6 * token_ms / 1000)
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI stand-in")
+    add_common_args(parser, default_port=9101)
+    parser.add_argument(
+        "--malformed-rate",
+        type=float,
+        default=0.0,
+        help="fraction of chat answers cut off halfway",
+    )
+    parser.add_argument(
+        "--token-ms",
+        type=float,
+        default=0.0,
+        help="generation time per completion token",
+    )
+    args = parser.parse_args()
+    build_server(
+        malformed_rate=args.malformed_rate,
+        token_ms=args.token_ms,
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+    ).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
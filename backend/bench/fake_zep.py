@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Zep graph endpoints app.py uses.
+
+Serves graph get/create/add/search and node listing under /api/v2. JSON
+episodes passed to graph.add (single actions or {"actions": [...]}
+batches) create in-memory nodes, so search and cache warm-up see what
+earlier calls wrote. Point the app at it with
+
+    ZEP_API_KEY=fake ZEP_BASE_URL=http://127.0.0.1:9102/api/v2
+
+and run from backend/:
+
+    python bench/fake_zep.py --latency-ms 150
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fakes import FakeServer, add_common_args
+
+
+def now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class GraphStore:
+    def __init__(self, create_delay=0.0):
+        self.graphs = {}
+        self.create_delay = create_delay
+        self._visible_at = {}
+        self._lock = threading.Lock()
+
+    def create(self, graph_id):
+        with self._lock:
+            if graph_id in self.graphs:
+                return False
+            self.graphs[graph_id] = {}
+            self._visible_at[graph_id] = time.monotonic() + self.create_delay
+            return True
+
+    def exists(self, graph_id):
+        """New graphs only become readable create_delay seconds after creation"""
+        visible_at = self._visible_at.get(graph_id)
+        return visible_at is not None and time.monotonic() >= visible_at
+
+    def add_episode(self, graph_id, data):
+        try:
+            episode = json.loads(data)
+        except ValueError:
+            return
+        if not isinstance(episode, dict):
+            return
+        actions = episode.get("actions", [episode])
+        with self._lock:
+            nodes = self.graphs.setdefault(graph_id, {})
+            self._visible_at.setdefault(graph_id, 0.0)
+            for action in actions:
+                if action.get("action") != "Create_entity":
+                    continue
+                key = (action["entity_type"], action["name"].lower())
+                nodes.setdefault(
+                    key,
+                    {
+                        "uuid": str(uuid.uuid4()),
+                        "name": action["name"],
+                        "labels": ["Entity", action["entity_type"]],
+                        "summary": action.get("description", ""),
+                        "created_at": now(),
+                        "attributes": {},
+                    },
+                )
+
+    def search(self, graph_id, query, labels, limit):
+        query = query.lower()
+        with self._lock:
+            nodes = list(self.graphs.get(graph_id, {}).values())
+        matches = [
+            node
+            for node in nodes
+            if query in node["name"].lower()
+            and (not labels or set(labels) & set(node["labels"]))
+        ]
+        return matches[:limit]
+
+    def list_nodes(self, graph_id, limit, cursor):
+        with self._lock:
+            nodes = self.graphs.get(graph_id, {}).values()
+            nodes = sorted(nodes, key=lambda node: node["uuid"])
+        if cursor:
+            nodes = [node for node in nodes if node["uuid"] > cursor]
+        return nodes[:limit]
+
+
+def build_server(create_delay_ms=0.0, **kwargs):
+    server = FakeServer("fake-zep", **kwargs)
+    store = GraphStore(create_delay_ms / 1000)
+
+    def graph_body(graph_id):
+        return {"graph_id": graph_id, "name": graph_id, "created_at": now()}
+
+    @server.route("POST", r"/api/v2/graph/create", "graph.create")
+    def create(request):
+        graph_id = request.json_body()["graph_id"]
+        if not store.create(graph_id):
+            return 400, {"message": "graph already exists"}
+        return 201, graph_body(graph_id)
+
+    @server.route("POST", r"/api/v2/graph/search", "graph.search")
+    def search(request):
+        body = request.json_body()
+        filters = body.get("search_filters") or {}
+        nodes = store.search(
+            body.get("graph_id"),
+            body.get("query", ""),
+            filters.get("node_labels"),
+            body.get("limit") or 10,
+        )
+        return 200, {"nodes": nodes, "edges": []}
+
+    @server.route(
+        "POST", r"/api/v2/graph/node/graph/(?P<graph_id>[^/]+)", "graph.node.list"
+    )
+    def list_nodes(request):
+        body = request.json_body()
+        return 200, store.list_nodes(
+            request.match["graph_id"],
+            body.get("limit") or 100,
+            body.get("uuid_cursor"),
+        )
+
+    @server.route("GET", r"/api/v2/graph/(?P<graph_id>[^/]+)", "graph.get")
+    def get(request):
+        graph_id = request.match["graph_id"]
+        if not store.exists(graph_id):
+            return 404, {"message": "graph not found"}
+        return 200, graph_body(graph_id)
+
+    @server.route("POST", r"/api/v2/graph", "graph.add")
+    def add(request):
+        body = request.json_body()
+        store.add_episode(body.get("graph_id"), body.get("data", ""))
+        return 202, {
+            "uuid": str(uuid.uuid4()),
+            "content": body.get("data", ""),
+            "created_at": now(),
+            "source": body.get("type", "json"),
+            "processed": False,
+        }
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Zep stand-in")
+    add_common_args(parser, default_port=9102)
+    parser.add_argument(
+        "--create-delay-ms",
+        type=float,
+        default=0.0,
+        help="how long a new graph stays invisible to graph.get",
+    )
+    args = parser.parse_args()
+    build_server(
+        create_delay_ms=args.create_delay_ms,
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+    ).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
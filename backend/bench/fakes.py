@@ -0,0 +1,202 @@
+"""
+Shared plumbing for the local OpenAI and Zep stand-in servers.
+
+A FakeServer routes (method, path regex) to handler functions, adds the
+configured latency and error rate to every call and counts calls per
+route. GET /__stats returns the counts and POST /__reset clears them.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeServer:
+    def __init__(
+        self,
+        name,
+        host="127.0.0.1",
+        port=0,
+        latency_ms=0.0,
+        jitter_ms=0.0,
+        error_rate=0.0,
+    ):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls = Counter()
+        self.errors = Counter()
+        self._routes = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, method, pattern, name):
+        """Register handler(request) -> (status, body) for method + path regex"""
+
+        def decorator(fn):
+            self._routes.append((method, re.compile(pattern + r"$"), name, fn))
+            return fn
+
+        return decorator
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name=self.name, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        print(f"{self.name} listening on {self.url}")
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "errors": dict(self.errors),
+                "total": sum(self.calls.values()),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def do_PATCH(self):
+                self._dispatch("PATCH")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+            def _dispatch(self, method):
+                self.body = self._read_body()
+                path = self.path.split("?", 1)[0]
+
+                if path == "/__stats":
+                    return self.send_json(200, server.stats())
+                if path == "/__reset":
+                    server.reset()
+                    return self.send_json(200, {"ok": True})
+
+                for route_method, pattern, name, fn in server._routes:
+                    match = pattern.match(path)
+                    if route_method == method and match:
+                        break
+                else:
+                    return self.send_json(
+                        404, {"error": f"{method} {path} not faked"}
+                    )
+
+                with server._lock:
+                    server.calls[name] += 1
+
+                delay = server.latency_ms + random.uniform(
+                    -server.jitter_ms, server.jitter_ms
+                )
+                if delay > 0:
+                    time.sleep(delay / 1000)
+
+                if random.random() < server.error_rate:
+                    with server._lock:
+                        server.errors[name] += 1
+                    return self.send_json(
+                        503, {"error": {"message": "injected failure"}}
+                    )
+
+                self.match = match
+                result = fn(self)
+                if result is not None:
+                    self.send_json(*result)
+
+            def _read_body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+                    length = int(self.headers.get("Content-Length") or 0)
+                    return self.rfile.read(length) if length else b""
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return body
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+
+            def json_body(self):
+                return json.loads(self.body or b"{}")
+
+            def send_json(self, status, body):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def send_events(self, events, delay=0.0):
+                """Write a text/event-stream response, one data: line per event,
+                waiting delay seconds before each"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for event in events:
+                    if delay:
+                        time.sleep(delay)
+                    data = event if isinstance(event, str) else json.dumps(event)
+                    chunk = f"data: {data}\n\n".encode("utf-8")
+                    self.wfile.write(
+                        f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n"
+                    )
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+
+def add_common_args(parser, default_port):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=default_port)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="added to every call"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0.0, help="+/- random spread on latency"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of calls that 503"
+    )
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for app.py.
+
+Imports the app in fresh interpreters under `python -X importtime` and
+reports the median cost of `import app` with the modules that dominate it.
+Exits non-zero when the median is over --budget-ms or when one of the
+SDKs that should load on first use (OpenAI, Zep, httpx, requests, dotenv)
+was imported anyway, so it can run as a check. Run from backend/:
+
+    python bench/import_budget.py --runs 7 --budget-ms 400
+
+--src can point at another checkout's src/backend for a before/after
+comparison.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+# Top-level packages app.py must leave to first use
+LAZY = ("openai", "zep_cloud", "httpx", "httpx2", "requests", "dotenv")
+
+
+def import_times(src, data_dir):
+    """Cumulative microseconds for `import app` and for each module it imports
+    directly, plus the names of every module loaded"""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("OPENAI_API_KEY", "ZEP_API_KEY", "TRACE_FILE")
+        and not key.startswith("OTEL_")
+    }
+    env.update(DATA_DIR=data_dir, LOG_LEVEL="ERROR")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=src,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total, children, modules = None, {}, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:") :].split("|")
+        # Names are indented two spaces per level; a module's imports are
+        # listed before it
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        modules.add(name)
+        if depth == 1:
+            children[name] = int(cumulative_us)
+        elif depth == 0:
+            if name == "app":
+                total = int(cumulative_us)
+                break
+            children = {}
+    return {"total": total, "children": children, "modules": modules}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app.py import-time budget")
+    parser.add_argument("--src", default=os.path.join(BACKEND_DIR, "src", "backend"))
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=400.0)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    src = os.path.abspath(args.src)
+    with tempfile.TemporaryDirectory() as data_dir:
+        # The first run also compiles bytecode; only warm runs are measured
+        import_times(src, data_dir)
+        runs = [import_times(src, data_dir) for _ in range(args.runs)]
+
+    total_ms = statistics.median(run["total"] for run in runs) / 1000
+    direct = {
+        name: statistics.median(run["children"].get(name, 0) for run in runs) / 1000
+        for name in runs[-1]["children"]
+    }
+    loaded = sorted(
+        {name.split(".")[0] for run in runs for name in run["modules"]} & set(LAZY)
+    )
+    # A .env file legitimately pulls in python-dotenv
+    if os.path.exists(os.path.join(src, "..", "..", "config", ".env")):
+        loaded = [name for name in loaded if name != "dotenv"]
+
+    report = {
+        "src": src,
+        "runs": args.runs,
+        "import_app_ms": round(total_ms, 1),
+        "budget_ms": args.budget_ms,
+        "top_imports_ms": {
+            name: round(ms, 1)
+            for name, ms in sorted(direct.items(), key=lambda item: -item[1])[
+                : args.top
+            ]
+        },
+        "eager_sdks": loaded,
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(
+            f"import app took {total_ms:.0f} ms (budget {args.budget_ms:.0f})"
+        )
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
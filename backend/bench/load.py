@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for the /transcribe pipeline.
+
+Posts synthetic WAV recordings to /transcribe at a target rate (open loop),
+follows each job to completion and reports latency percentiles, throughput
+and outbound OpenAI/Zep calls per request. With --spawn it starts the fake
+OpenAI and Zep servers and the app itself, so no keys or network are
+needed. Run from backend/:
+
+    python bench/load.py --spawn --rps 2 --duration 60 --openai-latency-ms 800
+
+Against an already running app and fakes:
+
+    python bench/load.py --url http://127.0.0.1:5000 \\
+        --openai-url http://127.0.0.1:9101 --zep-url http://127.0.0.1:9102
+"""
+
+import argparse
+import functools
+import io
+import json
+import math
+import os
+import shlex
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import fake_openai  # noqa: E402
+import fake_zep  # noqa: E402
+
+DEFAULT_APP_CMD = f"{sys.executable} src/backend/app.py"
+
+
+@functools.lru_cache(maxsize=4)
+def tone_frames(seconds, rate):
+    """Four seconds of tone then one of silence, repeated"""
+    tone = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / rate)))
+        for i in range(rate)
+    )
+    silence = b"\x00\x00" * rate
+    return b"".join(
+        silence if second % 5 == 4 else tone for second in range(int(seconds))
+    )
+
+
+def synthetic_wav(seconds, rate=16000, unique=True):
+    """Tone bursts separated by silence; unique uploads miss the result cache"""
+    frames = tone_frames(seconds, rate)
+    if unique:
+        frames += os.urandom(64)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def run_request(base_url, audio, mode, poll_interval, timeout):
+    """One upload followed to completion; returns a result dict"""
+    started = time.perf_counter()
+    files = {"file": ("bench.wav", audio, "audio/wav")}
+    data = {"conversationId": f"bench_{uuid.uuid4().hex[:8]}", "userName": "Bench"}
+    first_byte = None
+
+    try:
+        if mode == "stream":
+            with requests.post(
+                f"{base_url}/transcribe/stream",
+                files=files,
+                data=data,
+                stream=True,
+                timeout=timeout,
+            ) as response:
+                if response.status_code == 429:
+                    return {"status": "rejected"}
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                    if line.startswith(b"event: done"):
+                        break
+                    if line.startswith(b"event: error"):
+                        return {"status": "failed"}
+        else:
+            response = requests.post(
+                f"{base_url}/transcribe", files=files, data=data, timeout=timeout
+            )
+            first_byte = time.perf_counter() - started
+            if response.status_code == 429:
+                return {"status": "rejected"}
+            response.raise_for_status()
+            body = response.json()
+            if response.status_code == 202:
+                status_url = f"{base_url}{body['status_url']}"
+                while True:
+                    if time.perf_counter() - started > timeout:
+                        return {"status": "failed"}
+                    time.sleep(poll_interval)
+                    job = requests.get(status_url, timeout=timeout).json()
+                    if job["status"] == "done":
+                        break
+                    if job["status"] == "failed":
+                        return {"status": "failed"}
+    except requests.RequestException:
+        return {"status": "failed"}
+
+    return {
+        "status": "done",
+        "latency": time.perf_counter() - started,
+        "first_byte": first_byte,
+    }
+
+
+def fake_stats(url):
+    if not url:
+        return None
+    return requests.get(f"{url}/__stats", timeout=5).json()
+
+
+def wait_for_graph_queue(base_url, timeout=120):
+    """Graph writes happen after the response; wait so Zep calls are counted"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            health = requests.get(f"{base_url}/health", timeout=5).json()
+        except requests.RequestException:
+            return
+        if health.get("graph_queue", {}).get("pending", 0) == 0:
+            return
+        time.sleep(0.5)
+
+
+def run_load(args, base_url, openai_url=None, zep_url=None):
+    for url in (openai_url, zep_url):
+        if url:
+            requests.post(f"{url}/__reset", timeout=5)
+
+    total = max(1, int(args.rps * args.duration))
+    print(f"Sending {total} requests at {args.rps} rps to {base_url} ({args.mode})")
+
+    results = []
+    lock = threading.Lock()
+
+    def task(i):
+        audio = synthetic_wav(args.audio_seconds, unique=args.unique)
+        result = run_request(
+            base_url, audio, args.mode, args.poll_interval, args.timeout
+        )
+        with lock:
+            results.append(result)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.max_in_flight) as pool:
+        for i in range(total):
+            # Open loop: send on schedule whether or not earlier requests finished
+            delay = started + i / args.rps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, i)
+    elapsed = time.perf_counter() - started
+
+    wait_for_graph_queue(base_url)
+
+    done = [r for r in results if r["status"] == "done"]
+    latencies = [r["latency"] for r in done]
+    first_bytes = [r["first_byte"] for r in done if r.get("first_byte") is not None]
+    report = {
+        "mode": args.mode,
+        "target_rps": args.rps,
+        "sent": total,
+        "completed": len(done),
+        "rejected": sum(r["status"] == "rejected" for r in results),
+        "failed": sum(r["status"] == "failed" for r in results),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(done) / elapsed, 3) if elapsed else 0.0,
+        "latency_s": {
+            f"p{pct}": round(percentile(latencies, pct), 3) if latencies else None
+            for pct in (50, 95, 99)
+        },
+        "first_byte_s": {
+            f"p{pct}": round(percentile(first_bytes, pct), 3) if first_bytes else None
+            for pct in (50, 95)
+        },
+    }
+
+    for name, url in (("openai", openai_url), ("zep", zep_url)):
+        stats = fake_stats(url)
+        if stats is None:
+            continue
+        report[f"{name}_calls"] = stats["calls"]
+        report[f"{name}_calls_per_request"] = (
+            round(stats["total"] / len(done), 2) if done else None
+        )
+
+    if args.metrics_out:
+        # Scraped before a spawned app is stopped, for the per-stage histograms
+        scrape = requests.get(f"{base_url}/metrics", timeout=5)
+        with open(args.metrics_out, "w") as f:
+            f.write(scrape.text)
+        report["metrics_out"] = args.metrics_out
+
+    return report
+
+
+def spawn_stack(args):
+    """Start the fakes in-process and the app as a subprocess"""
+    openai_server = fake_openai.build_server(
+        latency_ms=args.openai_latency_ms,
+        jitter_ms=args.openai_latency_ms * 0.2,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        token_ms=args.openai_token_ms,
+    ).start()
+    zep_server = fake_zep.build_server(
+        create_delay_ms=args.zep_create_delay_ms,
+        latency_ms=args.zep_latency_ms,
+        jitter_ms=args.zep_latency_ms * 0.2,
+        error_rate=args.error_rate,
+    ).start()
+
+    port = free_port()
+    data_dir = tempfile.mkdtemp(prefix="htn-bench-")
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        DATA_DIR=data_dir,
+        OPENAI_API_KEY="fake",
+        OPENAI_BASE_URL=f"{openai_server.url}/v1",
+        ZEP_API_KEY="fake",
+        ZEP_BASE_URL=f"{zep_server.url}/api/v2",
+    )
+    env.update(dict(item.split("=", 1) for item in args.app_env))
+    app = subprocess.Popen(
+        shlex.split(args.app_cmd),
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=None if args.app_logs else subprocess.DEVNULL,
+        stderr=None if args.app_logs else subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(f"{base_url}/health")
+    except Exception:
+        app.terminate()
+        raise
+    return app, base_url, openai_server, zep_server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load benchmark for /transcribe")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--openai-url", help="fake OpenAI base, for call counts")
+    parser.add_argument("--zep-url", help="fake Zep base, for call counts")
+    parser.add_argument("--rps", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--audio-seconds", type=float, default=30.0)
+    parser.add_argument("--mode", choices=("jobs", "stream"), default="jobs")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument(
+        "--same-audio",
+        dest="unique",
+        action="store_false",
+        help="send identical audio every time (exercises the result cache)",
+    )
+    parser.add_argument("--spawn", action="store_true", help="start fakes and app")
+    parser.add_argument("--app-cmd", default=DEFAULT_APP_CMD)
+    parser.add_argument(
+        "--app-env", action="append", default=[], help="extra KEY=VALUE for the app"
+    )
+    parser.add_argument("--app-logs", action="store_true")
+    parser.add_argument("--openai-latency-ms", type=float, default=800.0)
+    parser.add_argument(
+        "--openai-token-ms", type=float, default=0.0, help="per completion token"
+    )
+    parser.add_argument("--zep-latency-ms", type=float, default=150.0)
+    parser.add_argument("--zep-create-delay-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--malformed-rate", type=float, default=0.0, help="fake OpenAI bad JSON"
+    )
+    parser.add_argument("--json", action="store_true", help="compact JSON report")
+    parser.add_argument("--metrics-out", help="save the app's /metrics here")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.spawn:
+        app, base_url, openai_server, zep_server = spawn_stack(args)
+        try:
+            report = run_load(args, base_url, openai_server.url, zep_server.url)
+        finally:
+            app.terminate()
+            app.wait(timeout=30)
+            openai_server.stop()
+            zep_server.stop()
+    else:
+        report = run_load(args, args.url, args.openai_url, args.zep_url)
+
+    print(json.dumps(report, indent=None if args.json else 2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Prompt size with and without merging Whisper segments before the LLM call.
+
+Builds synthetic Whisper segments for recordings of several lengths (a few
+seconds each, short gaps within a speaker's turn and longer ones between
+turns) and compares the prompt lines app.py used to send, one
+"[start-end] text" line per segment, with segments.format_segments().
+Tokens are counted with tiktoken when it is installed, otherwise estimated
+at four characters per token. Run from backend/:
+
+    python bench/prompt_tokens.py --minutes 10 30 60 120
+
+With --live and OPENAI_API_KEY set, each prompt is also sent to gpt-4o-mini
+--runs times and the median latency and reported prompt tokens are added.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src", "backend")
+sys.path.insert(0, SRC_DIR)
+
+from segments import estimate_tokens, format_segments  # noqa: E402
+
+WORDS = (
+    "so I think we should probably look at the launch plan again before the "
+    "demo because the numbers from last week were a bit off and I want to make "
+    "sure everyone on the team knows what we are shipping and when we expect "
+    "to hear back from the investors about the seed round"
+).split()
+
+
+def synthetic_segments(minutes, seed=0):
+    """Whisper-like segments: ~2.5 words/s, turn changes every few segments"""
+    rng = random.Random(seed)
+    segments = []
+    start = 0.0
+    while start < minutes * 60:
+        end = start + rng.uniform(1.5, 7.0)
+        words = max(1, round((end - start) * rng.uniform(2.0, 3.0)))
+        offset = rng.randrange(len(WORDS))
+        text = " ".join(WORDS[(offset + i) % len(WORDS)] for i in range(words))
+        segments.append(types.SimpleNamespace(start=start, end=end, text=" " + text))
+        if rng.random() < 0.3:
+            gap = rng.uniform(0.3, 1.5)  # the other speaker answers
+        elif rng.random() < 0.6:
+            gap = 0.0
+        else:
+            gap = rng.uniform(0.05, 0.45)
+        start = end + gap
+    return segments
+
+
+def raw_lines(segments):
+    """The prompt lines before merging: one per Whisper segment"""
+    return "\n".join(f"[{s.start:.2f}-{s.end:.2f}] {s.text.strip()}" for s in segments)
+
+
+def token_counter():
+    try:
+        import tiktoken
+    except ImportError:
+        return "estimate", estimate_tokens
+    encoding = tiktoken.get_encoding("o200k_base")
+    return "tiktoken", lambda text: len(encoding.encode(text))
+
+
+def live_latency(prompt, runs):
+    """Median seconds and reported prompt tokens for the full analysis call"""
+    from openai import OpenAI
+
+    client = OpenAI()
+    seconds, prompt_tokens = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+        )
+        seconds.append(time.perf_counter() - started)
+        prompt_tokens = response.usage.prompt_tokens
+    return round(statistics.median(seconds), 2), prompt_tokens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prompt tokens before/after merge")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 30, 60, 120])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    counter_name, count = token_counter()
+    build_prompt = None
+    if args.live:
+        from analysis import build_unified_prompt as build_prompt
+
+    rows = []
+    for minutes in args.minutes:
+        segments = synthetic_segments(minutes, args.seed)
+        before, after = raw_lines(segments), format_segments(
+            types.SimpleNamespace(segments=segments)
+        )
+        row = {
+            "minutes": minutes,
+            "segments": len(segments),
+            "lines_after": after.count("\n") + 1,
+            "tokens_before": count(before),
+            "tokens_after": count(after),
+        }
+        row["reduction"] = round(1 - row["tokens_after"] / row["tokens_before"], 3)
+        if build_prompt is not None:
+            for key, text in (("before", before), ("after", after)):
+                row[f"latency_{key}_s"], row[f"prompt_tokens_{key}"] = live_latency(
+                    build_prompt(text), args.runs
+                )
+        rows.append(row)
+        print(json.dumps(row), file=sys.stderr)
+
+    print(f"tokens counted with: {counter_name}")
+    print(
+        f"{'minutes':>8}{'segments':>10}{'lines':>8}{'tokens':>10}"
+        f"{'merged':>10}{'saved':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['minutes']:>8g}{row['segments']:>10}{row['lines_after']:>8}"
+            f"{row['tokens_before']:>10}{row['tokens_after']:>10}"
+            f"{row['reduction']:>8.1%}"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+How /transcribe throughput scales with the gunicorn worker profile.
+
+Runs bench/load.py once per profile against the app under gunicorn (with the
+fake OpenAI and Zep servers), at the same offered load, and prints one row
+per profile. A profile is WORKER_CLASS:PROCESSESxTHREADS. Only
+GUNICORN_THREADS is set, so the app's own limits (JOB_WORKERS,
+JOB_QUEUE_DEPTH, STREAM_MAX_CONCURRENCY) take their shipped defaults, which
+are derived from it. Run from backend/:
+
+    python bench/scaling.py --rps 8 --duration 20 \\
+        --profiles sync:1x1 gthread:1x4 gthread:1x16 gthread:2x16
+
+The default --mode stream runs the whole pipeline on the request thread,
+which is where the server profile matters most; --mode jobs measures the
+background job pool instead. --max-requests turns on gunicorn's worker
+recycling (off in gunicorn.conf.py) to measure what a recycle costs.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import load  # noqa: E402
+
+GUNICORN_CMD = f"{sys.executable} -m gunicorn -c gunicorn.conf.py"
+
+
+def parse_profile(profile):
+    worker_class, _, size = profile.partition(":")
+    processes, _, threads = size.partition("x")
+    return worker_class, int(processes or 1), int(threads or 1)
+
+
+def run_profile(profile, args):
+    worker_class, processes, threads = parse_profile(profile)
+    load_args = load.build_parser().parse_args(
+        [
+            "--spawn",
+            "--mode",
+            args.mode,
+            "--rps",
+            str(args.rps),
+            "--duration",
+            str(args.duration),
+            "--audio-seconds",
+            str(args.audio_seconds),
+            "--openai-latency-ms",
+            str(args.openai_latency_ms),
+            "--zep-latency-ms",
+            str(args.zep_latency_ms),
+            "--max-in-flight",
+            str(args.max_in_flight),
+            "--app-cmd",
+            f"{GUNICORN_CMD} -k {worker_class}",
+            "--app-env",
+            f"WEB_CONCURRENCY={processes}",
+            "--app-env",
+            f"GUNICORN_THREADS={threads}",
+            "--app-env",
+            f"GUNICORN_MAX_REQUESTS={args.max_requests}",
+            "--app-env",
+            "LOG_LEVEL=WARNING",
+        ]
+    )
+    app, base_url, openai_server, zep_server = load.spawn_stack(load_args)
+    try:
+        report = load.run_load(load_args, base_url, openai_server.url, zep_server.url)
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+        openai_server.stop()
+        zep_server.stop()
+    return {"profile": profile, **report}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="gunicorn profile scaling")
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        default=["sync:1x1", "gthread:1x4", "gthread:1x16", "gthread:2x16"],
+    )
+    parser.add_argument("--mode", choices=("jobs", "stream"), default="stream")
+    parser.add_argument("--rps", type=float, default=8.0)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--audio-seconds", type=float, default=20.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=800.0)
+    parser.add_argument("--zep-latency-ms", type=float, default=150.0)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--max-requests", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rows = []
+    for profile in args.profiles:
+        row = run_profile(profile, args)
+        rows.append(row)
+        print(json.dumps(row), file=sys.stderr)
+
+    print(
+        f"{'profile':<16}{'sent':>6}{'done':>6}{'429':>6}{'fail':>6}"
+        f"{'rps':>8}{'p50 s':>8}{'p95 s':>8}"
+    )
+    for row in rows:
+        latency = row["latency_s"]
+        print(
+            f"{row['profile']:<16}{row['sent']:>6}{row['completed']:>6}"
+            f"{row['rejected']:>6}{row['failed']:>6}{row['throughput_rps']:>8.2f}"
+            f"{latency['p50'] or 0:>8.2f}{latency['p95'] or 0:>8.2f}"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Peak RSS of one /transcribe request for long recordings.
+
+Each duration runs in a fresh process: a synthetic WAV of that length is
+posted through the Flask test client, the OpenAI client is swapped for a
+stand-in that reads the upload in 1 MB chunks, and the job's peak RSS is
+reported. Nothing leaves the process (Zep is disabled) and job records and
+caches go to a temp DATA_DIR. Exits non-zero unless every job finished as
+done. Run from backend/:
+
+    python bench/upload_rss.py --minutes 1 15 60
+
+Measured here (16 kHz mono WAV, ffmpeg on PATH):
+
+    minutes  upload MB  peak RSS MB (job delta)
+          1        1.8   41.1 (+5.2)
+         15       27.5   45.4 (+9.3)
+         60      109.9   45.4 (+9.4)
+
+Uploads over TRANSCRIBE_CHUNK_MIN_BYTES are copied to a temporary file and
+cut into chunks by ffmpeg, so memory stays flat with recording length. Before
+that, decoding the whole recording with pydub took the 60 minute job to
+259.5 MB.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import wave
+
+BACKEND_SRC = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "src", "backend"
+)
+
+
+def write_wav(path, minutes, rate=16000):
+    """Silent 16-bit mono WAV, written in one-second frames"""
+    frame = b"\x00\x00" * rate
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        for _ in range(int(minutes * 60)):
+            wav.writeframes(frame)
+
+
+class StandInTranscriptions:
+    def create(self, model, file, response_format):
+        _, buffer = file
+        while buffer.read(1024 * 1024):
+            pass
+        return types.SimpleNamespace(text="silence", segments=None)
+
+
+class StandInCompletions:
+    def create(self, **kwargs):
+        content = json.dumps({"transcript": [], "facts": {}, "summary": ""})
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message)], usage=None
+        )
+
+
+class StandInModels:
+    def list(self):
+        return []
+
+
+def run_one(minutes):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(OPENAI_API_KEY="bench", DATA_DIR=tmp)
+        os.environ.pop("ZEP_API_KEY", None)
+        sys.path.insert(0, BACKEND_SRC)
+        import app as backend
+
+        # get_openai() returns the shared client once it is set
+        backend._openai_client = types.SimpleNamespace(
+            audio=types.SimpleNamespace(transcriptions=StandInTranscriptions()),
+            chat=types.SimpleNamespace(completions=StandInCompletions()),
+            models=StandInModels(),
+        )
+
+        path = os.path.join(tmp, "recording.wav")
+        write_wav(path, minutes)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        baseline = backend.peak_rss_mb()
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            response = backend.app.test_client().post(
+                "/transcribe", data={"file": (f, "recording.wav")}
+            )
+        job_id = response.get_json()["job_id"]
+        while True:
+            job = backend.job_queue.get(job_id)
+            if job["status"] not in ("queued", "running"):
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+    if job["status"] != "done":
+        sys.exit(f"{minutes:g} min job ended as {job['status']}: {job.get('error')}")
+
+    print(
+        json.dumps(
+            {
+                "minutes": minutes,
+                "upload_mb": round(size_mb, 1),
+                "baseline_rss_mb": round(baseline, 1),
+                "peak_rss_mb": round(backend.peak_rss_mb(), 1),
+                "seconds": round(elapsed, 2),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 15, 60])
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_one(args.child)
+        return
+
+    for minutes in args.minutes:
+        subprocess.run([sys.executable, __file__, "--child", str(minutes)], check=True)
+
+
+if __name__ == "__main__":
+    main()
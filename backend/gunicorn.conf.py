@@ -1,8 +1,66 @@
 import os
 
 bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
-workers = 1
+
+# app.py imports its sibling modules by name, so load it from its own directory
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "backend")
+wsgi_app = "app:app"
+
+# The app mostly waits on Whisper, OpenAI and Zep, so each process serves many
+# requests on threads. gthread rather than gevent: the app runs its own
+# background threads and an asyncio loop, which gevent's monkey-patching breaks.
+# Job records and the graph outbox are in SQLite, so workers can be added too.
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+# app.py sizes JOB_WORKERS and STREAM_MAX_CONCURRENCY from this unless they're set
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+
+# Import the app once in the master and fork workers from it, so a worker
+# replaced after max_requests starts in milliseconds. Importing the app opens no
+# connections or threads; clients are built per worker by post_fork below.
+# Code changes need a full restart rather than a HUP.
+preload_app = True
+
+# Streamed responses hold a thread for the whole pipeline; timeout only guards
+# against a worker whose main loop stops responding
 timeout = 120
-keepalive = 2
-max_requests = 1000
+# A gthread worker recycled by max_requests stops accepting, then only drops
+# idle keep-alive connections once its wait for events times out, i.e. after
+# graceful_timeout (30s) with nothing served by that process. Closing every
+# connection after its response avoids that stall; the proxy in front keeps
+# its own connections to clients.
+keepalive = 0
+# Recycling fails the jobs still running in the old worker (see worker_exit),
+# and /jobs polls count as requests, so it is off unless memory creeps
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
 max_requests_jitter = 100
+
+
+def when_ready(server):
+    # The app leaves the OpenAI and Zep SDKs unimported until first use; pull
+    # them into the master too so forked workers inherit them
+    import app
+
+    app.preload_sdks()
+
+
+def post_fork(server, worker):
+    # Build clients and fill caches in the background as each worker starts,
+    # so the first request doesn't pay for it; /ready reports when it's done
+    import app
+
+    app.start_warm_up()
+
+
+def worker_exit(server, worker):
+    # Also called in the master for a worker that is already gone; only the
+    # worker itself has jobs to fail
+    if worker.pid != os.getpid():
+        return
+    import app
+
+    # A job thread still inside a pipeline can be waiting on its own thread
+    # pools, which interpreter shutdown would join; a recycling worker must not
+    # hang on them until the master kills it, so leave straight away
+    if app.stop_jobs():
+        os._exit(0)
@@ -1,23 +1,35 @@
 #!/usr/bin/env python3
 """
 Mock Data Ingestion Script for Zep Backend
-Simulates conversations between university students/entrepreneurs
+Simulates conversations between university students/entrepreneurs, or
+backfills real ones streamed from a JSONL file (--input) with checkpoints
 """
 
 import os
 import sys
 import json
+import argparse
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import random
 import time
 import re
 from dotenv import load_dotenv
 
-# Zep imports
-from zep_cloud import Zep
+# Share graph helpers with the Flask app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "backend"))
+from entity_cache import EntityCache
+from extractor import DEFAULT_PATTERNS, DEFAULT_RELATIONSHIP_TYPES, EntityExtractor
+import logs
+from rate_limit import TokenBucket
+from zep_graph import ZepGraph
 
 # Load environment variables
 load_dotenv("config/.env", override=False)
+# The shared graph helpers log instead of printing
+logs.configure(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "text"))
 
 # Configure Zep client
 zep_api_key = os.getenv("ZEP_API_KEY")
@@ -26,8 +38,39 @@ if not zep_api_key:
     print("Please set your ZEP_API_KEY in the config/.env file")
     sys.exit(1)
 
-zep_client = Zep(api_key=zep_api_key)
 GRAPH_ID = "all_users_htn"
+entity_cache = EntityCache()
+
+DATA_DIR = os.getenv(
+    "DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "var")
+)
+
+# Mock facts are about students, so also match schools and projects
+fact_extractor = EntityExtractor(
+    patterns={
+        **DEFAULT_PATTERNS,
+        "Organization": DEFAULT_PATTERNS["Organization"]
+        + [
+            r"(?:studies at|student at|attending)\s+(.+)",
+            r"(?:university|college|school)\s+(.+)",
+        ],
+        "Topic": DEFAULT_PATTERNS["Topic"] + [r"(?:building|creating|developing)\s+(.+)"],
+    },
+    relationship_types={**DEFAULT_RELATIONSHIP_TYPES, "Organization": "STUDIES_AT"},
+)
+
+# Shared async client; every Zep request (search or graph.add) takes a token
+# from the rate limiter, which main() replaces with one built from the CLI flags
+zep_graph = ZepGraph(
+    zep_api_key,
+    GRAPH_ID,
+    base_url=os.getenv("ZEP_BASE_URL"),
+    entity_cache=entity_cache,
+    extractor=fact_extractor,
+    rate_limiter=TokenBucket(float(os.getenv("INGEST_ZEP_RPS", "5"))),
+    user_description="University student entrepreneur: {name}",
+    friendship_description="Connected through conversation",
+)
 
 
 # Mock conversation data for ambitious university students/entrepreneurs
@@ -318,321 +361,342 @@ MOCK_CONVERSATIONS = [
 ]
 
 
-def ensure_graph_exists():
-    """Ensure the Zep graph exists, create if it doesn't"""
+def process_mock_conversation(conversation_data):
+    """Process a mock conversation and add it to Zep graph"""
     try:
-        zep_client.graph.get(GRAPH_ID)
-        print(f"✅ Graph '{GRAPH_ID}' already exists")
-        return True
-    except Exception:
-        try:
-            zep_client.graph.create(graph_id=GRAPH_ID)
-            time.sleep(1)  # Wait for creation
-            print(f"✅ Created Zep graph: {GRAPH_ID}")
-            return True
-        except Exception as e:
-            print(f"❌ Failed to create Zep graph: {e}")
-            return False
+        print(f"📝 Processing: {conversation_data['conversation_id']}")
+        print(f"   User: {conversation_data.get('user_name')} ({conversation_data.get('user_email')})")
 
+        # Get unique speakers from transcript
+        speakers = set()
+        for turn in conversation_data["transcript"]:
+            if turn.get("speaker"):
+                speakers.add(turn["speaker"])
 
-def create_user_entity(speaker_name):
-    """Create a user entity in the Zep graph"""
-    try:
-        # Check if user already exists
-        search_results = zep_client.graph.search(
-            graph_id=GRAPH_ID,
-            query=speaker_name,
-            scope="nodes",
-            search_filters={"node_labels": ["User"]},
-            limit=1,
-        )
+        print(f"   Speakers: {list(speakers)}")
 
-        if search_results.nodes and len(search_results.nodes) > 0:
-            print(f"   User {speaker_name} already exists")
-            return True
-
-        # Create user entity
-        user_data = {
-            "action": "Create_entity",
-            "entity_type": "User",
-            "name": speaker_name,
-            "description": f"University student entrepreneur: {speaker_name}",
-        }
-
-        zep_client.graph.add(
-            graph_id=GRAPH_ID,
-            type="json",
-            data=json.dumps(user_data),
-        )
+        # Collect every mutation for this conversation into a few grouped episodes
+        batch = zep_graph.run(add_conversation_to_graph(conversation_data, speakers))
 
-        print(f"   ✅ Created user entity: {speaker_name}")
+        print(f"   📦 Sent {batch.actions_sent} actions in {batch.calls} calls")
+        print(f"✅ Successfully processed conversation {conversation_data['conversation_id']}")
         return True
 
     except Exception as e:
-        print(f"   ❌ Failed to create user entity {speaker_name}: {e}")
+        print(f"❌ Error processing conversation {conversation_data.get('conversation_id')}: {e}")
         return False
 
 
-def extract_and_store_entities(facts, speakers):
-    """Extract entities from facts and store them in Zep graph"""
-    entity_patterns = {
-        "Goal": [
-            r"(?:wants to|plans to|hopes to|aims to|goal is to|trying to)\s+(.+)",
-            r"(?:my goal is|i want to|i plan to|i hope to|i aim to)\s+(.+)",
-        ],
-        "Language": [
-            r"(?:speaks|knows|fluent in|can speak)\s+([\w\s]+?)(?:\s+(?:language|fluently))?",
-            r"(?:native|bilingual|multilingual)\s+(?:in\s+)?([\w\s]+)",
-        ],
-        "Organization": [
-            r"(?:works at|employed by|job at|working at)\s+(.+)",
-            r"(?:my job is at|i work at|employed at)\s+(.+)",
-            r"(?:studies at|student at|attending)\s+(.+)",
-            r"(?:university|college|school)\s+(.+)",
-        ],
-        "Topic": [
-            r"(?:interested in|likes|enjoys|passionate about|loves|into)\s+(.+)",
-            r"(?:my interest is|i like|i enjoy|i love)\s+(.+)",
-            r"(?:building|creating|developing)\s+(.+)",
-        ],
-        "Trait": [
-            r"(?:is|personality|character).*?(outgoing|introverted|friendly|shy|confident|creative|analytical|organized|spontaneous|patient|ambitious|calm|energetic)",
-            r"(?:i am|i'm)\s+(outgoing|introverted|friendly|shy|confident|creative|analytical|organized|spontaneous|patient|ambitious|calm|energetic)",
-        ],
-    }
-
-    for speaker, speaker_facts in facts.items():
-        for fact in speaker_facts:
-            fact_lower = fact.lower()
-
-            for entity_type, patterns in entity_patterns.items():
-                for pattern in patterns:
-                    match = re.search(pattern, fact_lower, re.IGNORECASE)
-                    if match:
-                        entity_name = match.group(1).strip()
-
-                        # Skip very short or generic entities
-                        if len(entity_name) < 2 or entity_name in [
-                            "it", "that", "this", "them"
-                        ]:
-                            continue
-
-                        # Create entity if it doesn't exist
-                        try:
-                            search_results = zep_client.graph.search(
-                                graph_id=GRAPH_ID,
-                                query=entity_name,
-                                scope="nodes",
-                                search_filters={"node_labels": [entity_type]},
-                                limit=1,
-                            )
-
-                            entity_exists = (
-                                search_results.nodes and len(search_results.nodes) > 0
-                            )
-
-                            if not entity_exists:
-                                entity_data = {
-                                    "action": "Create_entity",
-                                    "entity_type": entity_type,
-                                    "name": entity_name,
-                                    "description": fact,
-                                }
-
-                                zep_client.graph.add(
-                                    graph_id=GRAPH_ID,
-                                    type="json",
-                                    data=json.dumps(entity_data),
-                                )
-
-                                print(f"   ✅ Created {entity_type}: {entity_name}")
-
-                            # Create relationship between user and entity
-                            relationship_types = {
-                                "Goal": "HAS_GOAL",
-                                "Language": "SPEAKS",
-                                "Organization": "STUDIES_AT",
-                                "Topic": "INTERESTED_IN",
-                                "Trait": "HAS_TRAIT",
-                            }
-
-                            relationship_data = {
-                                "action": "Create_relationship",
-                                "source_entity_type": "User",
-                                "source_entity_name": speaker,
-                                "target_entity_type": entity_type,
-                                "target_entity_name": entity_name,
-                                "relationship_type": relationship_types[entity_type],
-                                "description": fact,
-                            }
-
-                            zep_client.graph.add(
-                                graph_id=GRAPH_ID,
-                                type="json",
-                                data=json.dumps(relationship_data),
-                            )
-
-                            print(f"   ✅ {speaker} -> {relationship_types[entity_type]} -> {entity_name}")
-
-                        except Exception as e:
-                            print(f"   ❌ Failed to create entity/relationship for {entity_name}: {e}")
-
-                        break  # Only match first pattern for each fact
-
-
-def create_friendship_relationship(speakers):
-    """Create friendship relationships between conversation participants"""
-    if len(speakers) < 2:
-        return
+async def add_conversation_to_graph(conversation_data, speakers):
+    """Write user, fact, friendship and summary mutations for one conversation"""
+    async with zep_graph.batch() as batch:
+        # Users and fact entities are looked up concurrently over the shared pool
+        await asyncio.gather(
+            *(zep_graph.create_user_entity(speaker, batch) for speaker in speakers),
+            zep_graph.extract_and_store_entities(
+                conversation_data["facts"], speakers, batch
+            ),
+        )
 
-    try:
-        speaker_list = list(speakers)
-        for i in range(len(speaker_list)):
-            for j in range(i + 1, len(speaker_list)):
-                speaker1, speaker2 = speaker_list[i], speaker_list[j]
-
-                # Create bidirectional friendship
-                for source, target in [(speaker1, speaker2), (speaker2, speaker1)]:
-                    friendship_data = {
-                        "action": "Create_relationship",
-                        "source_entity_type": "User",
-                        "source_entity_name": source,
-                        "target_entity_type": "User",
-                        "target_entity_name": target,
-                        "relationship_type": "FRIENDS_WITH",
-                        "description": f"Connected through conversation",
-                    }
+        # Create friendship relationships between speakers
+        await zep_graph.create_friendship_relationship(speakers, batch)
 
-                    zep_client.graph.add(
-                        graph_id=GRAPH_ID,
-                        type="json",
-                        data=json.dumps(friendship_data),
-                    )
+        add_conversation_summary(conversation_data, speakers, batch)
 
-                print(f"   ✅ Created friendship: {speaker1} <-> {speaker2}")
+    return batch
 
-    except Exception as e:
-        print(f"   ❌ Failed to create friendship relationships: {e}")
 
+def add_conversation_summary(conversation_data, speakers, batch):
+    """Queue the conversation entity and its PARTICIPATED_IN relationships"""
+    if conversation_data.get("summary"):
+        try:
+            conversation_name = f"Conversation_{conversation_data['conversation_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-def process_mock_conversation(conversation_data):
-    """Process a mock conversation and add it to Zep graph"""
-    try:
-        print(f"📝 Processing: {conversation_data['conversation_id']}")
-        print(f"   User: {conversation_data['user_name']} ({conversation_data['user_email']})")
+            summary_data = {
+                "action": "Create_entity",
+                "entity_type": "Conversation",
+                "name": conversation_name,
+                "description": f"Summary: {conversation_data['summary']} | Participants: {', '.join(speakers)} | ConversationID: {conversation_data['conversation_id']}",
+            }
 
-        # Get unique speakers from transcript
-        speakers = set()
-        for turn in conversation_data["transcript"]:
-            if turn.get("speaker"):
-                speakers.add(turn["speaker"])
+            batch.add(summary_data)
 
-        print(f"   Speakers: {list(speakers)}")
+            # Create relationships between conversation and participants
+            for speaker in speakers:
+                try:
+                    participation_data = {
+                        "action": "Create_relationship",
+                        "source_entity_type": "User",
+                        "source_entity_name": speaker,
+                        "target_entity_type": "Conversation",
+                        "target_entity_name": conversation_name,
+                        "relationship_type": "PARTICIPATED_IN",
+                        "description": f"Participated in conversation on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                    }
+
+                    batch.add(participation_data)
+                except Exception as e:
+                    print(f"   ❌ Failed to create participation relationship for {speaker}: {e}")
 
-        # Create user entities for each speaker
-        for speaker in speakers:
-            create_user_entity(speaker)
+            print(f"   ✅ Queued conversation summary: {conversation_name}")
+        except Exception as e:
+            print(f"   ❌ Failed to add conversation summary: {e}")
 
-        # Extract and store entities from facts
-        extract_and_store_entities(conversation_data["facts"], speakers)
 
-        # Create friendship relationships between speakers
-        create_friendship_relationship(speakers)
+REQUIRED_FIELDS = ("conversation_id", "transcript", "facts")
+
 
-        # Add conversation summary to graph
-        if conversation_data.get("summary"):
+def iter_jsonl(path, offset=0, on_invalid=None):
+    """Yield (end_offset, conversation) per line of a JSONL file, from offset on.
+
+    Lines that parse but aren't a conversation object with REQUIRED_FIELDS are
+    passed to on_invalid instead of being yielded.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            offset += len(line)
+            if not line.strip():
+                continue
             try:
-                conversation_name = f"Conversation_{conversation_data['conversation_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-                summary_data = {
-                    "action": "Create_entity",
-                    "entity_type": "Conversation",
-                    "name": conversation_name,
-                    "description": f"Summary: {conversation_data['summary']} | Participants: {', '.join(speakers)} | ConversationID: {conversation_data['conversation_id']}",
-                }
-
-                zep_client.graph.add(
-                    graph_id=GRAPH_ID,
-                    type="json",
-                    data=json.dumps(summary_data),
+                conversation = json.loads(line)
+            except ValueError as e:
+                print(f"⚠️  Skipping malformed line ending at byte {offset}: {e}")
+                continue
+            if not isinstance(conversation, dict) or any(
+                field not in conversation for field in REQUIRED_FIELDS
+            ):
+                print(
+                    f"⚠️  Skipping line ending at byte {offset}: not an object with "
+                    f"{', '.join(REQUIRED_FIELDS)}"
                 )
+                if on_invalid:
+                    on_invalid(conversation)
+                continue
+            yield offset, conversation
+
+
+def iter_mock(offset=0):
+    """Yield (end_offset, conversation) from MOCK_CONVERSATIONS; offsets are indexes"""
+    for i in range(offset, len(MOCK_CONVERSATIONS)):
+        yield i + 1, MOCK_CONVERSATIONS[i]
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class IngestCheckpoint:
+    """Input offset up to which every conversation has been sent to Zep.
+
+    Saved atomically after each batch finishes, so a crashed run resumes at
+    the first unfinished batch. Conversations that failed are appended to a
+    .failed.jsonl file next to the checkpoint for a later rerun with --input.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.failed_path = os.path.splitext(path)[0] + ".failed.jsonl"
+        self.offset = 0
+        # Conversations recorded as failed by this run
+        self.failed = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("source") == source:
+                self.offset = saved["offset"]
+            else:
+                print(f"⚠️  Checkpoint {path} is for {saved.get('source')}, ignoring it")
+
+    def save(self, offset):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"source": self.source, "offset": offset, "updated_at": time.time()},
+                f,
+            )
+        os.replace(tmp_path, self.path)
+        self.offset = offset
+
+    def record_failure(self, conversation):
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.failed_path, "a") as f:
+                f.write(json.dumps(conversation) + "\n")
+            self.failed += 1
+
+    def reset(self):
+        for path in (self.path, self.failed_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.offset = 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest conversations into Zep")
+    parser.add_argument(
+        "--input",
+        help="JSONL file, one conversation per line (defaults to the built-in mocks)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("INGEST_WORKERS", "4")),
+        help="conversations processed in parallel",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=int(os.getenv("INGEST_BATCH_SIZE", "32")),
+        help="conversations per checkpointed batch",
+    )
+    parser.add_argument(
+        "--zep-rps",
+        type=float,
+        default=zep_graph.rate_limiter.rate,
+        help="Zep requests per second across all workers",
+    )
+    parser.add_argument(
+        "--burst", type=float, help="token bucket size (defaults to --zep-rps)"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="checkpoint file (defaults to var/ingest_<input name>.checkpoint.json)",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore and clear the checkpoint"
+    )
+    parser.add_argument(
+        "--export-mock",
+        metavar="PATH",
+        help="write the built-in mock conversations as JSONL and exit",
+    )
+    return parser.parse_args()
 
-                # Create relationships between conversation and participants
-                for speaker in speakers:
-                    try:
-                        participation_data = {
-                            "action": "Create_relationship",
-                            "source_entity_type": "User",
-                            "source_entity_name": speaker,
-                            "target_entity_type": "Conversation",
-                            "target_entity_name": conversation_name,
-                            "relationship_type": "PARTICIPATED_IN",
-                            "description": f"Participated in conversation on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                        }
-
-                        zep_client.graph.add(
-                            graph_id=GRAPH_ID,
-                            type="json",
-                            data=json.dumps(participation_data),
-                        )
-                    except Exception as e:
-                        print(f"   ❌ Failed to create participation relationship for {speaker}: {e}")
-
-                print(f"   ✅ Added conversation summary: {conversation_name}")
-            except Exception as e:
-                print(f"   ❌ Failed to add conversation summary: {e}")
 
-        print(f"✅ Successfully processed conversation {conversation_data['conversation_id']}")
-        return True
+def main():
+    """Main function to ingest mock or JSONL conversations"""
+    args = parse_args()
+    if args.export_mock:
+        with open(args.export_mock, "w") as f:
+            for conversation in MOCK_CONVERSATIONS:
+                f.write(json.dumps(conversation) + "\n")
+        print(f"📤 Wrote {len(MOCK_CONVERSATIONS)} conversations to {args.export_mock}")
+        return
 
-    except Exception as e:
-        print(f"❌ Error processing conversation {conversation_data['conversation_id']}: {e}")
-        return False
+    zep_graph.rate_limiter = TokenBucket(args.zep_rps, args.burst)
+    source = os.path.abspath(args.input) if args.input else "mock"
+    name = os.path.splitext(os.path.basename(args.input))[0] if args.input else "mock"
+    checkpoint = IngestCheckpoint(
+        args.checkpoint or os.path.join(DATA_DIR, f"ingest_{name}.checkpoint.json"),
+        source,
+    )
+    if args.restart:
+        checkpoint.reset()
 
+    if args.input:
+        total_size = os.path.getsize(args.input)
+        conversations = iter_jsonl(
+            args.input, checkpoint.offset, on_invalid=checkpoint.record_failure
+        )
+    else:
+        total_size = len(MOCK_CONVERSATIONS)
+        conversations = iter_mock(checkpoint.offset)
 
-def main():
-    """Main function to ingest all mock conversations"""
-    print("🚀 Starting mock data ingestion for Zep backend...")
+    print("🚀 Starting data ingestion for Zep backend...")
     print(f"🔑 Using Zep API Key: {'Yes' if zep_api_key else 'No'}")
-    print(f"📊 Total conversations to ingest: {len(MOCK_CONVERSATIONS)}")
+    print(f"📥 Source: {source}")
     print(f"🗂️  Target graph: {GRAPH_ID}")
+    print(
+        f"🧵 Workers: {args.workers}, batch size: {args.batch_size}, "
+        f"Zep rate: {args.zep_rps}/s"
+    )
+    if checkpoint.offset:
+        print(f"⏭️  Resuming at offset {checkpoint.offset}/{total_size}")
     print("-" * 60)
 
     # Ensure graph exists
-    if not ensure_graph_exists():
+    if not zep_graph.run(zep_graph.ensure_graph_exists()):
         print("❌ Failed to create/access Zep graph. Exiting.")
         return
 
-    success_count = 0
-
-    for i, conversation in enumerate(MOCK_CONVERSATIONS, 1):
-        print(f"\n📝 Processing conversation {i}/{len(MOCK_CONVERSATIONS)}")
-
-        if process_mock_conversation(conversation):
-            success_count += 1
+    try:
+        print(f"♨️  Warmed entity cache with {zep_graph.run(zep_graph.warm_cache())} nodes")
+    except Exception as e:
+        print(f"⚠️  Entity cache warm-up failed: {e}")
 
-        # Add small delay between operations
-        time.sleep(1)
+    processed = 0
+    success_count = 0
+    started = time.perf_counter()
+
+    # Only one batch is held in memory; the checkpoint moves once it has all finished
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for batch in batched(conversations, max(1, args.batch_size)):
+            futures = {
+                pool.submit(process_mock_conversation, conversation): conversation
+                for _, conversation in batch
+            }
+            for future in as_completed(futures):
+                # An exception here is one bad conversation, not a reason to
+                # stop before the checkpoint is saved
+                try:
+                    succeeded = future.result()
+                except Exception as e:
+                    print(f"❌ Error processing conversation: {e}")
+                    succeeded = False
+                if succeeded:
+                    success_count += 1
+                else:
+                    checkpoint.record_failure(futures[future])
+            processed += len(batch)
+            checkpoint.save(batch[-1][0])
+
+            elapsed = time.perf_counter() - started
+            print(
+                f"📈 {processed} conversations, offset {checkpoint.offset}/{total_size} "
+                f"({processed / elapsed if elapsed else 0:.2f} conversations/sec)"
+            )
+
+    elapsed = time.perf_counter() - started
 
     print("\n" + "=" * 60)
     print(f"🎉 Ingestion complete!")
     print(
-        f"✅ Successfully ingested: {success_count}/{len(MOCK_CONVERSATIONS)} conversations"
+        f"⏱️  {processed} conversations in {elapsed:.1f}s "
+        f"({processed / elapsed if elapsed else 0:.2f} conversations/sec, "
+        f"{zep_graph.rate_limiter.waited:.1f}s throttled)"
     )
+    print(f"🗃️  Entity cache: {entity_cache.stats()}")
+    print(f"✅ Successfully ingested: {success_count}/{processed} conversations")
 
-    if success_count == len(MOCK_CONVERSATIONS):
+    if not checkpoint.failed:
         print("🌟 All conversations were successfully processed and stored in Zep!")
     else:
         print(
-            f"⚠️  {len(MOCK_CONVERSATIONS) - success_count} conversations failed to process"
+            f"⚠️  {checkpoint.failed} conversations failed or were invalid; "
+            f"fix and rerun them with --input {checkpoint.failed_path}"
         )
 
-    print(f"\n🔍 Your Zep graph '{GRAPH_ID}' now contains:")
-    print("   • University students from top schools (Stanford, MIT, Harvard, etc.)")
-    print("   • Young entrepreneurs with funded startups")
-    print("   • Global travelers meeting investors and mentors")
-    print("   • Connections across fintech, AI, biotech, blockchain, and more")
-    print("   • Rich relationship data for networking and matching")
+    if not args.input:
+        print(f"\n🔍 Your Zep graph '{GRAPH_ID}' now contains:")
+        print("   • University students from top schools (Stanford, MIT, Harvard, etc.)")
+        print("   • Young entrepreneurs with funded startups")
+        print("   • Global travelers meeting investors and mentors")
+        print("   • Connections across fintech, AI, biotech, blockchain, and more")
+        print("   • Rich relationship data for networking and matching")
     print(f"\n🌐 Access your graph at: https://cloud.getzep.com/graphs/{GRAPH_ID}")
 
 
@@ -0,0 +1,651 @@
+import contextvars
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_json import salvage_object, strip_json_fence
+from metrics import registry
+from segments import estimate_tokens, format_lines
+from tracing import tracer
+
+log = logging.getLogger(__name__)
+
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Chat completion tokens by kind (prompt, completion)", ["kind"]
+)
+REPAIRS = registry.counter(
+    "analysis_repairs_total",
+    "Analysis sections re-requested after a malformed answer, by outcome",
+    ["section", "outcome"],
+)
+
+SECTIONS = ("transcript", "facts", "summary")
+
+# Strict structured output can't describe objects keyed by speaker name, so
+# the model returns facts as a list of {speaker, facts}; read_section() turns
+# that back into the {speaker: [facts]} the endpoints return
+SECTION_SCHEMAS = {
+    "transcript": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"speaker": {"type": "string"}, "text": {"type": "string"}},
+            "required": ["speaker", "text"],
+            "additionalProperties": False,
+        },
+    },
+    "facts": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "speaker": {"type": "string"},
+                "facts": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["speaker", "facts"],
+            "additionalProperties": False,
+        },
+    },
+    "summary": {"type": "string"},
+}
+
+
+def json_schema(name, properties):
+    """response_format for strict structured output of an object with these properties"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+ANALYSIS_FORMAT = json_schema("conversation_analysis", SECTION_SCHEMAS)
+SPEAKER_FACTS_FORMAT = json_schema(
+    "speaker_facts", {"facts": {"type": "array", "items": {"type": "string"}}}
+)
+REDUCE_FORMAT = json_schema(
+    "merged_analysis",
+    {
+        "speakers": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"label": {"type": "string"}, "name": {"type": "string"}},
+                "required": ["label", "name"],
+                "additionalProperties": False,
+            },
+        },
+        "facts": SECTION_SCHEMAS["facts"],
+        "summary": {"type": "string"},
+    },
+)
+
+REQUIREMENTS = {
+    "transcript": 'transcript: Array of conversation turns with speaker identification (only "speaker" and "text" fields)',
+    "facts": "facts: Key facts extracted for each speaker separately",
+    "summary": "summary: Concise summary of key points and outcomes",
+}
+
+RULES = """RULES:
+- There are only two speakers maximum
+- If someone says another person's name, that name belongs to the OTHER speaker
+- A line may hold more than one speaker; split it where the speaker changes
+- Merge consecutive utterances from the same speaker
+- Extract only explicit, concrete facts directly stated by each person
+- Do not include questions, opinions, or interpretations in facts
+- Return ONLY valid JSON, no other text"""
+
+OUTPUT_FORMAT = """OUTPUT FORMAT (return ONLY this JSON structure):
+{
+  "transcript": [
+    {"speaker": "<Speaker 1>", "text": "utterance"},
+    {"speaker": "<Speaker 2>", "text": "response"}
+  ],
+  "facts": [
+    {"speaker": "<Speaker 1>", "facts": ["Concrete fact 1 about Speaker 1", "Concrete fact 2 about Speaker 1"]},
+    {"speaker": "<Speaker 2>", "facts": ["Concrete fact 1 about Speaker 2", "Concrete fact 2 about Speaker 2"]}
+  ],
+  "summary": "Brief summary of the conversation including main topics, decisions made, and key information exchanged."
+}"""
+
+
+def build_unified_prompt(segment_text):
+    """Prompt asking for transcript, facts and summary in one JSON object"""
+    return f"""
+You are an AI assistant that processes audio transcripts. Given the transcript lines below (each starts with the second it begins at), you must return a JSON object with exactly three fields: transcript, facts, and summary.
+
+REQUIREMENTS:
+0. Try to deduce the speakers' names from the transcript
+1. {REQUIREMENTS["transcript"]}
+2. {REQUIREMENTS["facts"]}
+3. {REQUIREMENTS["summary"]}
+
+{RULES}
+
+TRANSCRIPT:
+{segment_text}
+
+{OUTPUT_FORMAT}
+"""
+
+
+def build_map_prompt(segment_text, part, parts):
+    """The unified prompt for one window of a long conversation"""
+    return f"""
+You are an AI assistant that processes audio transcripts. Below is part {part} of {parts} of one conversation (each line starts with the second it begins at). Return a JSON object with exactly three fields for this part only: transcript, facts, and summary.
+
+REQUIREMENTS:
+0. Try to deduce the speakers' names from this part; otherwise call them "Speaker 1" and "Speaker 2"
+1. {REQUIREMENTS["transcript"]}
+2. {REQUIREMENTS["facts"]}
+3. summary: Two or three sentences on what this part covers
+
+{RULES}
+
+TRANSCRIPT:
+{segment_text}
+
+{OUTPUT_FORMAT}
+"""
+
+
+def build_reduce_prompt(parts):
+    """Prompt merging the per-window facts and summaries into one analysis"""
+    return f"""
+You are an AI assistant combining the analysis of one conversation that was processed in {len(parts)} parts. Speaker labels were chosen separately in each part, so the same person may appear under different labels (for example "Speaker 1" in one part and their name in another).
+
+PARTS:
+{json.dumps(parts, indent=2)}
+
+Return a JSON object with exactly three fields:
+1. speakers: For every "<part>:<label>" pair used in the parts, that person's final name (use a real name whenever any part reveals it)
+2. facts: Key facts for each person, under their final name, merged across parts without duplicates
+3. summary: Concise summary of key points and outcomes of the whole conversation
+
+RULES:
+- There are only two speakers maximum
+- Keep only explicit, concrete facts that appear in the parts
+- Return ONLY valid JSON, no other text
+
+OUTPUT FORMAT (return ONLY this JSON structure):
+{{
+  "speakers": [{{"label": "1:Speaker 1", "name": "<Name>"}}, {{"label": "2:Alex", "name": "<Name>"}}],
+  "facts": [{{"speaker": "<Name>", "facts": ["Concrete fact about this person"]}}],
+  "summary": "Brief summary of the whole conversation."
+}}
+"""
+
+
+def build_section_prompt(section, segment_text, partial):
+    """Prompt asking for just one section of the analysis (repairs, fan-out)"""
+    speakers = sorted({turn["speaker"] for turn in partial.get("transcript", [])})
+    if section == "transcript":
+        names = "\nTry to deduce the speakers' names from the transcript.\n"
+    elif speakers:
+        names = f"\nThe speakers are {' and '.join(speakers)}; use these names.\n"
+    else:
+        names = ""
+    return f"""
+You are an AI assistant that processes audio transcripts. Given the transcript lines below (each starts with the second it begins at), return a JSON object with exactly one field: {section}.
+
+REQUIREMENT:
+{REQUIREMENTS[section]}
+{names}
+{RULES}
+
+TRANSCRIPT:
+{segment_text}
+"""
+
+
+def format_dialogue(transcript):
+    """An attributed transcript as "Speaker: text" lines"""
+    return "\n".join(f"{turn['speaker']}: {turn['text']}" for turn in transcript)
+
+
+def build_speaker_facts_prompt(speaker, dialogue):
+    """Fan-out prompt for the facts one speaker states in an attributed transcript"""
+    return f"""
+You are an AI assistant that processes conversation transcripts. Below is a conversation with each line attributed to its speaker. Return a JSON object with exactly one field, facts: the key facts {speaker} states about themselves.
+
+RULES:
+- Use only lines spoken by {speaker}; if someone says another person's name, that name belongs to the OTHER speaker
+- Extract only explicit, concrete facts directly stated
+- Do not include questions, opinions, or interpretations
+- Return ONLY valid JSON, no other text
+
+CONVERSATION:
+{dialogue}
+"""
+
+
+def build_summary_prompt(dialogue):
+    """Fan-out prompt for the summary of an attributed transcript"""
+    return f"""
+You are an AI assistant that processes conversation transcripts. Below is a conversation with each line attributed to its speaker. Return a JSON object with exactly one field:
+{REQUIREMENTS["summary"]}
+
+Return ONLY valid JSON, no other text.
+
+CONVERSATION:
+{dialogue}
+"""
+
+
+def fallback_result(segments):
+    return {
+        "transcript": [
+            {"speaker": "Unknown", "text": " ".join(s.text for s in segments)}
+        ],
+        "facts": {"Unknown": ["No facts could be extracted"]},
+        "summary": "Transcription completed but detailed analysis failed.",
+    }
+
+
+def read_section(section, value):
+    """One section of an answer in the endpoint's shape, or None if unusable.
+
+    Facts are accepted both as the schema's [{speaker, facts}] list and as a
+    {speaker: [facts]} object.
+    """
+    if section == "transcript":
+        if isinstance(value, list) and all(
+            isinstance(turn, dict) and isinstance(turn.get("text"), str)
+            for turn in value
+        ):
+            return [
+                {"speaker": str(turn.get("speaker") or "Unknown"), "text": turn["text"]}
+                for turn in value
+            ]
+    elif section == "facts":
+        if isinstance(value, list) and all(isinstance(item, dict) for item in value):
+            value = {item.get("speaker"): item.get("facts") for item in value}
+        if isinstance(value, dict) and all(
+            isinstance(speaker, str) and isinstance(facts, list)
+            for speaker, facts in value.items()
+        ):
+            return {
+                speaker: [str(fact) for fact in facts]
+                for speaker, facts in value.items()
+            }
+    elif section == "summary":
+        if isinstance(value, str):
+            return value
+    return None
+
+
+def record_usage(usage, span):
+    """Count a chat completion's tokens and tag its span with them"""
+    if usage is None:
+        return
+    LLM_TOKENS.inc(usage.prompt_tokens, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens, kind="completion")
+    span.set(
+        prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens
+    )
+
+
+def split_windows(segments, window_tokens):
+    """Consecutive runs of segments, each at most window_tokens of prompt text"""
+    windows, window, size = [], [], 0
+    for segment in segments:
+        tokens = estimate_tokens(segment.text) + 4  # the "[start] " prefix
+        if window and size + tokens > window_tokens:
+            windows.append(window)
+            window, size = [], 0
+        window.append(segment)
+        size += tokens
+    if window:
+        windows.append(window)
+    return windows
+
+
+class Analyzer:
+    """Produces the transcript/facts/summary analysis of a transcription.
+
+    Transcripts up to max_tokens are analyzed with the unified prompt in one
+    call (app.py makes that call itself, so it can stream it). Longer ones go
+    through map_reduce(): the merged segments are split into windows of at
+    most window_tokens, each window is analyzed concurrently (at most
+    `concurrency` calls at once), and a final call reconciles the speaker
+    labels across windows and merges the facts and summaries. Every call goes
+    through `calls` (a Resilience) and asks for strict structured output.
+
+    Answers are read with finish(), which keeps every section that parsed and
+    asks again for just the ones that didn't, against the same transcript,
+    so a malformed answer never means transcribing the audio again.
+
+    With mode="fanout", transcripts that fit go through fanout() instead of
+    the unified prompt: one call attributes the transcript to speakers, then
+    the summary and each speaker's facts are asked for concurrently. Each
+    answer is shorter than the unified one, so the slowest of them usually
+    finishes well before it would.
+
+    With a cache (a DiskCache), answers that parse as JSON are stored under
+    the model, temperature, prompt_version and a hash of the prompt with its
+    whitespace normalized (the prompt is a template filled in with the
+    merged segments), so the same transcript is never analyzed twice.
+    """
+
+    MODES = ("unified", "fanout")
+
+    def __init__(
+        self,
+        calls,
+        model="gpt-4o-mini",
+        max_tokens=6000,
+        window_tokens=4000,
+        concurrency=4,
+        mode="unified",
+        temperature=0,
+        cache=None,
+        prompt_version="",
+    ):
+        if mode not in self.MODES:
+            raise ValueError(
+                f"Unknown analysis mode {mode!r}, expected one of {self.MODES}"
+            )
+        self.calls = calls
+        self.model = model
+        self.max_tokens = max_tokens
+        self.window_tokens = window_tokens
+        self.concurrency = concurrency
+        self.mode = mode
+        self.temperature = temperature
+        self.cache = cache
+        self.prompt_version = prompt_version
+
+    def fits(self, segment_text):
+        """True if the unified prompt can take this transcript in one call"""
+        return estimate_tokens(segment_text) <= self.max_tokens
+
+    def cache_key(self, prompt, response_format):
+        normalized = json.dumps(
+            [" ".join(prompt.split()), response_format], sort_keys=True
+        )
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{self.model}:{self.temperature}:{self.prompt_version}:{digest}"
+
+    def cached(self, prompt, response_format, span):
+        """A stored answer to this prompt, or None"""
+        if self.cache is None:
+            return None
+        content = self.cache.get(self.cache_key(prompt, response_format))
+        if content is not None:
+            span.set(llm_cache="hit")
+            log.info(
+                "LLM cache hit (hit rate %.0f%%)", self.cache.stats()["hit_rate"] * 100
+            )
+        return content
+
+    def remember(self, prompt, response_format, content):
+        """Store an answer, unless it is malformed (so asking again can help)"""
+        if self.cache is None:
+            return
+        try:
+            parsed = json.loads(strip_json_fence(content))
+        except ValueError:
+            return
+        if isinstance(parsed, dict):
+            self.cache.put(self.cache_key(prompt, response_format), content)
+
+    def complete(self, client, prompt, span, response_format=ANALYSIS_FORMAT):
+        """Text of one chat completion for prompt"""
+        content = self.cached(prompt, response_format, span)
+        if content is not None:
+            return content
+        response = self.calls.call(
+            client.chat.completions.create,
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            response_format=response_format,
+        )
+        record_usage(response.usage, span)
+        content = response.choices[0].message.content or ""
+        self.remember(prompt, response_format, content)
+        return content
+
+    def stream(self, client, prompt, span, response_format=ANALYSIS_FORMAT):
+        """Yield the text of a streamed chat completion as it arrives.
+
+        Only opening the stream is retried; a failure mid-stream propagates.
+        A cached answer is yielded in one piece.
+        """
+        content = self.cached(prompt, response_format, span)
+        if content is not None:
+            yield content
+            return
+        stream = self.calls.call(
+            client.chat.completions.create,
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.temperature,
+            response_format=response_format,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        pieces = []
+        for chunk in stream:
+            # Token usage arrives in a final chunk with no choices
+            record_usage(chunk.usage, span)
+            if chunk.choices and chunk.choices[0].delta.content:
+                pieces.append(chunk.choices[0].delta.content)
+                yield pieces[-1]
+        self.remember(prompt, response_format, "".join(pieces))
+
+    def finish(self, client, content, segments):
+        """Read an analysis answer, repairing the sections that didn't parse.
+
+        Returns (result, failed): failed names the sections that could not be
+        repaired either, which are left out of result.
+        """
+        members = salvage_object(content, keys=SECTIONS)
+        result = {}
+        for section in SECTIONS:
+            value = read_section(section, members.get(section))
+            if value is not None:
+                result[section] = value
+        failed = []
+        for section in SECTIONS:
+            if section in result:
+                continue
+            log.warning("Analysis answer has no usable %s, asking again", section)
+            value = self.repair(client, section, segments, result)
+            if value is None:
+                failed.append(section)
+            else:
+                result[section] = value
+        return result, failed
+
+    def repair(self, client, section, segments, partial):
+        """Ask for one section on its own; None if that fails too"""
+        with tracer.span("analysis.repair", section=section) as span:
+            try:
+                content = self.complete(
+                    client,
+                    build_section_prompt(section, format_lines(segments), partial),
+                    span,
+                    json_schema(section, {section: SECTION_SCHEMAS[section]}),
+                )
+                value = read_section(section, salvage_object(content).get(section))
+            except Exception as e:
+                log.warning("Repair call for %s failed: %s", section, e)
+                value = None
+        REPAIRS.inc(section=section, outcome="failed" if value is None else "ok")
+        return value
+
+    def fanout(self, client, segments):
+        """Attribute speakers, then ask for facts and summary concurrently.
+
+        Returns (result, failed) like finish(); a section whose answer
+        doesn't parse is asked for again with repair().
+        """
+        with tracer.span("analysis.attribute") as span:
+            content = self.complete(
+                client,
+                build_section_prompt("transcript", format_lines(segments), {}),
+                span,
+                json_schema(
+                    "transcript", {"transcript": SECTION_SCHEMAS["transcript"]}
+                ),
+            )
+        members = salvage_object(content, keys=("transcript",))
+        transcript = read_section("transcript", members.get("transcript"))
+        if transcript is None:
+            transcript = self.repair(client, "transcript", segments, {})
+        if transcript is None:
+            return {}, list(SECTIONS)
+
+        dialogue = format_dialogue(transcript)
+        speakers = list(dict.fromkeys(turn["speaker"] for turn in transcript))
+
+        def speaker_facts(speaker):
+            with tracer.span("analysis.facts", speaker=speaker) as span:
+                content = self.complete(
+                    client,
+                    build_speaker_facts_prompt(speaker, dialogue),
+                    span,
+                    SPEAKER_FACTS_FORMAT,
+                )
+            facts = salvage_object(content, keys=("facts",)).get("facts")
+            return [str(fact) for fact in facts] if isinstance(facts, list) else None
+
+        def summary():
+            with tracer.span("analysis.summary") as span:
+                content = self.complete(
+                    client,
+                    build_summary_prompt(dialogue),
+                    span,
+                    json_schema("summary", {"summary": SECTION_SCHEMAS["summary"]}),
+                )
+            return read_section("summary", salvage_object(content).get("summary"))
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="analysis"
+        ) as pool:
+            summary_future = pool.submit(contextvars.copy_context().run, summary)
+            fact_futures = {
+                speaker: pool.submit(
+                    contextvars.copy_context().run, speaker_facts, speaker
+                )
+                for speaker in speakers
+            }
+            facts = {
+                speaker: future.result() for speaker, future in fact_futures.items()
+            }
+            result = {"transcript": transcript, "summary": summary_future.result()}
+
+        result["facts"] = facts
+        if any(items is None for items in facts.values()):
+            result["facts"] = None
+        # Anything that didn't parse is asked for again the usual way
+        failed = []
+        for section in ("facts", "summary"):
+            if result[section] is None:
+                log.warning("Fan-out answer has no usable %s, asking again", section)
+                result[section] = self.repair(client, section, segments, result)
+            if result[section] is None:
+                del result[section]
+                failed.append(section)
+        return result, failed
+
+    def map_reduce(self, client, segments):
+        """Analyze merged segments in windows; returns (result, failed) like finish()"""
+        windows = split_windows(segments, self.window_tokens)
+        log.info("Analyzing long transcript in %d windows", len(windows))
+
+        def analyze_window(part, window):
+            with tracer.span("analysis.map", part=part) as span:
+                prompt = build_map_prompt(format_lines(window), part, len(windows))
+                content = self.complete(client, prompt, span)
+            result, failed = self.finish(client, content, window)
+            if "transcript" in failed:
+                # Keep the words even if this window's analysis is lost
+                text = " ".join(segment.text for segment in window)
+                result["transcript"] = [{"speaker": "Unknown", "text": text}]
+            return result, [f"part {part} {section}" for section in failed]
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="analysis"
+        ) as pool:
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run, analyze_window, part, window
+                )
+                for part, window in enumerate(windows, 1)
+            ]
+            outcomes = [future.result() for future in futures]
+
+        results = [result for result, _ in outcomes]
+        failed = [section for _, window_failed in outcomes for section in window_failed]
+        result, merged = self.reduce(client, results)
+        if not merged:
+            failed.append("reduce")
+        return result, failed
+
+    def reduce(self, client, results):
+        """Merge per-window results into one transcript/facts/summary object.
+
+        Returns (result, merged); merged is False if the merge call's answer
+        was unusable and the windows' own labels, facts and summaries were
+        joined instead.
+        """
+        parts = [
+            {
+                "part": part,
+                "speakers": sorted({turn["speaker"] for turn in result["transcript"]}),
+                "facts": result.get("facts", {}),
+                "summary": result.get("summary", ""),
+            }
+            for part, result in enumerate(results, 1)
+        ]
+        with tracer.span("analysis.reduce", parts=len(parts)) as span:
+            content = self.complete(
+                client, build_reduce_prompt(parts), span, REDUCE_FORMAT
+            )
+        reduced = salvage_object(content, keys=("speakers", "facts", "summary"))
+        speakers = reduced.get("speakers")
+        if isinstance(speakers, list):
+            speakers = {
+                item.get("label"): item.get("name")
+                for item in speakers
+                if isinstance(item, dict)
+            }
+        if not isinstance(speakers, dict):
+            speakers = {}
+        facts = read_section("facts", reduced.get("facts"))
+        summary = read_section("summary", reduced.get("summary"))
+        merged = facts is not None and bool(summary)
+        if not merged:
+            log.warning("Could not merge %d parts, joining them instead", len(parts))
+            speakers = {}
+            facts = {}
+            for part in parts:
+                for speaker, items in part["facts"].items():
+                    known = facts.setdefault(speaker, [])
+                    known.extend(item for item in items if item not in known)
+            summary = " ".join(part["summary"] for part in parts if part["summary"])
+
+        transcript = []
+        for part, result in enumerate(results, 1):
+            for turn in result["transcript"]:
+                label = turn["speaker"]
+                speaker = speakers.get(f"{part}:{label}") or label
+                # Windows can cut a turn in two; join it back up
+                if transcript and transcript[-1]["speaker"] == speaker:
+                    transcript[-1]["text"] = f"{transcript[-1]['text']} {turn['text']}"
+                else:
+                    transcript.append({"speaker": speaker, "text": turn["text"]})
+
+        result = {"transcript": transcript, "facts": facts, "summary": summary}
+        return result, merged
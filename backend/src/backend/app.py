@@ -1,25 +1,64 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import os
-from dotenv import load_dotenv, find_dotenv
 
 # import google.generativeai as genai
-from openai import OpenAI
-import tempfile
+import asyncio
+import contextvars
 import json
+import logging
+import queue
 import threading
 import time
-import requests
 
-# Zep imports
-from zep_cloud import Zep
+from contextlib import contextmanager
+
 from datetime import datetime
 
-# Load environment variables
-load_dotenv("../../config/.env", override=False)
+import logs
+from analysis import Analyzer, build_unified_prompt, fallback_result, read_section
+from disk_cache import DiskCache, hash_file
+from entity_cache import EntityCache
+from graph_writer import GraphWriter
+from jobs import JobQueue, QueueFull
+from llm_json import StreamingObjectParser
+from metrics import CONTENT_TYPE, registry
+from resilience import CircuitOpen, Resilience
+from segments import format_lines, merge_segments, transcription_segments
+from tracing import JsonlExporter, OtlpExporter, current_span, inject_headers, tracer
+from transcription import dump_transcription, load_transcription, transcribe
+from uploads import detach_upload, make_request_class, peak_rss_mb, spilled_to_disk
+from zep_graph import ZepGraph, transport_errors
+
+# Load environment variables (python-dotenv is only imported when there is a file)
+ENV_FILE = "../../config/.env"
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_FILE, override=False)
+
+# Leveled logs tagged with the request id; LOG_FORMAT=json for one object per line
+logs.configure(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "text"))
+log = logging.getLogger("app")
+
+# Request spans go to TRACE_FILE as JSON lines and/or to an OTLP/HTTP collector
+TRACE_FILE = os.getenv("TRACE_FILE")
+if TRACE_FILE:
+    tracer.add_exporter(JsonlExporter(TRACE_FILE))
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+if OTLP_ENDPOINT:
+    tracer.add_exporter(
+        OtlpExporter(
+            OTLP_ENDPOINT, service_name=os.getenv("OTEL_SERVICE_NAME", "htn-backend")
+        )
+    )
+
+# Uploads above this size spill from memory to an anonymous temp file
+AUDIO_SPOOL_MAX_BYTES = int(os.getenv("AUDIO_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
 
 # Initialize Flask app
 app = Flask(__name__)
+app.request_class = make_request_class(AUDIO_SPOOL_MAX_BYTES)
 CORS(app)  # Enable CORS for all routes
 
 # Get API keys with fallback and debugging
@@ -27,16 +66,16 @@ google_api_key = os.getenv("GOOGLE_API_KEY")
 openai_api_key = os.getenv("OPENAI_API_KEY")
 zep_api_key = os.getenv("ZEP_API_KEY")
 
-print(f"Google API Key found: {'Yes' if google_api_key else 'No'}")
-print(f"OpenAI API Key found: {'Yes' if openai_api_key else 'No'}")
-print(f"Zep API Key found: {'Yes' if zep_api_key else 'No'}")
+log.info("Google API Key found: %s", "Yes" if google_api_key else "No")
+log.info("OpenAI API Key found: %s", "Yes" if openai_api_key else "No")
+log.info("Zep API Key found: %s", "Yes" if zep_api_key else "No")
 
 if not google_api_key:
-    print("WARNING: GOOGLE_API_KEY not found in environment variables")
+    log.warning("GOOGLE_API_KEY not found in environment variables")
 if not openai_api_key:
-    print("WARNING: OPENAI_API_KEY not found in environment variables")
+    log.warning("OPENAI_API_KEY not found in environment variables")
 if not zep_api_key:
-    print("WARNING: ZEP_API_KEY not found in environment variables")
+    log.warning("ZEP_API_KEY not found in environment variables")
 
 # Configure Gemini
 # if google_api_key:
@@ -44,231 +83,594 @@ if not zep_api_key:
 # else:
 #     print("ERROR: Cannot configure Gemini without GOOGLE_API_KEY")
 
-# Configure OpenAI
-if openai_api_key:
-    client = OpenAI(api_key=openai_api_key)
-else:
-    print("ERROR: Cannot configure OpenAI without OPENAI_API_KEY")
-    client = None
-
-# Configure Zep
-if zep_api_key:
-    zep_client = Zep(api_key=zep_api_key)
-else:
-    print("ERROR: Cannot configure Zep without ZEP_API_KEY")
-    zep_client = None
-
-
-# Zep helper functions
-def ensure_graph_exists(graph_id="all_users_htn"):
-    """Ensure the Zep graph exists, create if it doesn't"""
-    if not zep_client:
-        return False
-
-    try:
-        zep_client.graph.get(graph_id)
-        return True
-    except Exception:
-        try:
-            zep_client.graph.create(graph_id=graph_id)
-            time.sleep(1)  # Wait for creation
-            print(f"Created Zep graph: {graph_id}")
-            return True
-        except Exception as e:
-            print(f"Failed to create Zep graph: {e}")
-            return False
 
+def openai_connection_errors():
+    """Resilience `transient` for OpenAI, imported only once a call has failed"""
+    from openai import APIConnectionError
+
+    return (APIConnectionError,)
+
+
+# Outbound calls get a per-attempt timeout, jittered retries within an overall
+# deadline, and a circuit breaker that fails fast while a service is down
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "90"))
+openai_calls = Resilience(
+    "openai",
+    attempts=int(os.getenv("OPENAI_ATTEMPTS", "3")),
+    timeout=OPENAI_TIMEOUT,
+    deadline=float(os.getenv("OPENAI_DEADLINE", "180")),
+    failure_threshold=int(os.getenv("OPENAI_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("OPENAI_BREAKER_RESET", "30")),
+    transient=openai_connection_errors,
+)
+zep_calls = Resilience(
+    "zep",
+    attempts=int(os.getenv("ZEP_ATTEMPTS", "3")),
+    timeout=float(os.getenv("ZEP_TIMEOUT", "15")),
+    deadline=float(os.getenv("ZEP_DEADLINE", "45")),
+    failure_threshold=int(os.getenv("ZEP_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("ZEP_BREAKER_RESET", "30")),
+    transient=transport_errors,
+)
 
-def create_user_entity(speaker_name, graph_id="all_users_htn"):
-    """Create a user entity in the Zep graph"""
-    if not zep_client:
-        return False
+if not openai_api_key:
+    log.error("Cannot configure OpenAI without OPENAI_API_KEY")
+if not zep_api_key:
+    log.error("Cannot configure Zep without ZEP_API_KEY")
+
+# API clients are built on first use, or ahead of traffic by warm_up(), so
+# importing the app opens no connections and starts no threads (safe to fork)
+_clients_lock = threading.Lock()
+_openai_client = None
+_zep_graph = None
+_sdk_lock = threading.Lock()
+
+
+def preload_sdks():
+    """Import the OpenAI and Zep SDKs (~0.8s) without building any clients.
+
+    Includes the OpenAI resource modules its client would otherwise import on
+    first access. Both clients call this before they are built: importing the
+    two SDKs on different threads at once can leave one of them holding a
+    partially initialized httpx. gunicorn's master also calls it after loading
+    the app (preload_app), so forked workers start with everything imported.
+    """
+    with _sdk_lock:
+        import openai.resources.audio  # noqa: F401
+        import openai.resources.chat  # noqa: F401
+        import openai.resources.models  # noqa: F401
+        import zep_cloud.client  # noqa: F401
+        import zep_cloud.errors  # noqa: F401
+
+
+def get_openai():
+    """The shared OpenAI client; None without an API key"""
+    global _openai_client
+    if _openai_client is None and openai_api_key:
+        with _clients_lock:
+            if _openai_client is None:
+                preload_sdks()
+                from openai import DefaultHttpxClient, OpenAI
+
+                # Retries are left to openai_calls; requests carry the trace
+                _openai_client = OpenAI(
+                    api_key=openai_api_key,
+                    timeout=OPENAI_TIMEOUT,
+                    max_retries=0,
+                    http_client=DefaultHttpxClient(
+                        event_hooks={"request": [inject_headers]}
+                    ),
+                )
+    return _openai_client
+
+
+# Request threads per process (gunicorn.conf.py reads the same variable). The
+# pipeline limits below default to a share of it, so GUNICORN_THREADS is the one
+# knob to turn; each can still be set on its own.
+GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", "16"))
+# Background pool for /transcribe jobs; JOB_QUEUE_DEPTH bounds queued + running
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(max(1, GUNICORN_THREADS // 2))))
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", str(JOB_WORKERS * 4)))
+RETRY_AFTER = int(os.getenv("JOB_RETRY_AFTER", "5"))
+# /transcribe/stream runs in the request thread, so it has its own limit; a
+# quarter of the threads stay free for /jobs polls, /health and uploads
+STREAM_MAX_CONCURRENCY = int(
+    os.getenv("STREAM_MAX_CONCURRENCY", str(max(1, GUNICORN_THREADS * 3 // 4)))
+)
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENCY)
+
+DATA_DIR = os.getenv(
+    "DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "var"),
+)
+
+# Each process publishes its metrics here so /metrics covers every gunicorn worker
+registry.share(os.path.join(DATA_DIR, "metrics"))
+
+# Job records live in SQLite so any gunicorn worker can answer /jobs/<id>
+job_queue = JobQueue(
+    max_workers=JOB_WORKERS,
+    max_depth=JOB_QUEUE_DEPTH,
+    db_path=os.path.join(DATA_DIR, "jobs.sqlite3"),
+)
+
+# Durable outbox for Zep graph writes (drained by a background writer)
+GRAPH_QUEUE_PATH = os.path.join(DATA_DIR, "graph_queue.sqlite3")
+GRAPH_WRITE_MAX_ATTEMPTS = int(os.getenv("GRAPH_WRITE_MAX_ATTEMPTS", "5"))
+# How long an uploaded recording counts as already queued for its conversation
+GRAPH_DEDUPE_TTL = float(os.getenv("GRAPH_DEDUPE_TTL", str(7 * 24 * 3600)))
+
+# Finished analyses keyed by audio hash; bump PROMPT_VERSION when the prompt changes.
+# Whisper transcripts are kept under their own key, so an analysis that failed
+# can be retried without transcribing the audio again
+PROMPT_VERSION = "3"
+# "unified" asks for everything in one call; "fanout" attributes speakers first,
+# then asks for the summary and each speaker's facts concurrently
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "unified")
+RESULT_CACHE_VERSION = f"whisper-1:gpt-4o-mini:{PROMPT_VERSION}:{ANALYSIS_MODE}"
+result_cache = DiskCache(
+    os.path.join(DATA_DIR, "results"),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+)
+
+# Chat completions keyed by model, temperature, PROMPT_VERSION and the prompt,
+# so a transcript seen before (a re-encoded clip, a retry) isn't analyzed again.
+# LLM_CACHE=off sends every call to OpenAI (benchmarks with repeating inputs)
+LLM_CACHE = os.getenv("LLM_CACHE", "on") != "off"
+llm_cache = DiskCache(
+    os.path.join(DATA_DIR, "llm"),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
+
+# Transcripts over ANALYSIS_MAX_TOKENS (estimated) are too long for the unified
+# prompt; they are analyzed in windows concurrently and then merged
+analyzer = Analyzer(
+    openai_calls,
+    model="gpt-4o-mini",
+    max_tokens=int(os.getenv("ANALYSIS_MAX_TOKENS", "6000")),
+    window_tokens=int(os.getenv("ANALYSIS_WINDOW_TOKENS", "4000")),
+    concurrency=int(os.getenv("ANALYSIS_CONCURRENCY", "4")),
+    mode=ANALYSIS_MODE,
+    cache=llm_cache if LLM_CACHE else None,
+    prompt_version=PROMPT_VERSION,
+)
+
+# Entities known to exist in the graph, so we can skip search-before-create
+entity_cache = EntityCache(
+    max_entries=int(os.getenv("ENTITY_CACHE_SIZE", "50000")),
+    ttl=int(os.getenv("ENTITY_CACHE_TTL", str(6 * 3600))),
+)
+
+GRAPH_ID = "all_users_htn"
+
+
+def get_zep_graph():
+    """The shared Zep graph (one async client and connection pool); None without a key"""
+    global _zep_graph
+    if _zep_graph is None and zep_api_key:
+        with _clients_lock:
+            if _zep_graph is None:
+                preload_sdks()
+                # ZEP_BASE_URL points the SDK at bench/fake_zep.py for local load tests
+                _zep_graph = ZepGraph(
+                    zep_api_key,
+                    GRAPH_ID,
+                    base_url=os.getenv("ZEP_BASE_URL"),
+                    entity_cache=entity_cache,
+                    max_concurrency=int(os.getenv("ZEP_MAX_CONCURRENCY", "16")),
+                    resilience=zep_calls,
+                )
+    return _zep_graph
+
+
+async def ingest_conversation(payload, checkpoint=None):
+    """Write one analyzed conversation to the Zep graph (graph writer handler)"""
+    parsed_result = payload["parsed_result"]
+    conversation_id = payload.get("conversation_id", "")
+    user_name = payload.get("user_name", "")
+    user_email = payload.get("user_email", "")
+    # Timestamps come from enqueue time so retries write the same names
+    created_at = datetime.fromtimestamp(payload.get("created_at") or time.time())
+    zep_graph = get_zep_graph()
+
+    log.info("Processing conversation data with Zep")
+
+    # Ensure graph exists; raising lets the writer retry later
+    if not await zep_graph.ensure_graph_exists():
+        raise RuntimeError("Failed to ensure Zep graph exists")
+
+    # A retry after some episodes went out sends only the rest
+    if checkpoint is not None and checkpoint.state is not None:
+        log.info("Resuming conversation after %d episodes", checkpoint.state["sent"])
+        async with zep_graph.batch(checkpoint) as batch:
+            pass
+        return
 
-    try:
-        # Check if user already exists
-        search_results = zep_client.graph.search(
-            graph_id=graph_id,
-            query=speaker_name,
-            scope="nodes",
-            search_filters={"node_labels": ["User"]},
-            limit=1,
-        )
+    # Get unique speakers from transcript
+    speakers = set()
+    for turn in parsed_result["transcript"]:
+        if turn.get("speaker"):
+            speakers.add(turn["speaker"])
 
-        if search_results.nodes and len(search_results.nodes) > 0:
-            print(f"User {speaker_name} already exists")
-            return True
+    log.debug("Identified speakers: %s", list(speakers))
 
-        # Create user entity
-        user_data = {
-            "action": "Create_entity",
-            "entity_type": "User",
-            "name": speaker_name,
-            "description": f"User identified from conversation: {speaker_name}",
-        }
+    # Map speakers to real user info if available
+    speaker_mapping = {}
+    if user_name and user_email:
+        # Try to identify which speaker is the main user
+        # This is a simple heuristic - could be improved with better speaker identification
+        speaker_list = list(speakers)
+        if len(speaker_list) > 0:
+            # Assume first speaker or speaker with similar name is the main user
+            main_speaker = speaker_list[0]
+            for speaker in speaker_list:
+                if (
+                    user_name.lower() in speaker.lower()
+                    or speaker.lower() in user_name.lower()
+                ):
+                    main_speaker = speaker
+                    break
+
+            speaker_mapping[main_speaker] = {
+                "name": user_name,
+                "email": user_email,
+                "conversation_id": conversation_id,
+            }
+            log.debug(
+                "Mapped speaker '%s' to user '%s' (%s)",
+                main_speaker,
+                user_name,
+                user_email,
+            )
 
-        zep_client.graph.add(
-            graph_id=graph_id,
-            type="json",
-            data=json.dumps(user_data),
+    # Collect every mutation for this conversation into a few grouped episodes
+    async with zep_graph.batch(checkpoint) as batch:
+        await add_conversation_to_graph(
+            parsed_result, speakers, speaker_mapping, conversation_id, created_at, batch
         )
 
-        print(f"Created user entity: {speaker_name}")
-        return True
+    log.info(
+        "Successfully processed conversation data with Zep",
+        extra={"actions": batch.actions_sent, "calls": batch.calls},
+    )
+
+
+async def add_conversation_to_graph(
+    parsed_result, speakers, speaker_mapping, conversation_id, created_at, batch
+):
+    """Queue user, fact, friendship and summary mutations for one conversation"""
+    zep_graph = get_zep_graph()
+    # Users and fact entities are looked up concurrently over the shared pool
+    user_names = []
+    for speaker in speakers:
+        if speaker in speaker_mapping:
+            user_info = speaker_mapping[speaker]
+            user_names.append(f"{user_info['name']} ({user_info['email']})")
+        user_names.append(speaker)
+
+    await asyncio.gather(
+        *(zep_graph.create_user_entity(name, batch) for name in user_names),
+        zep_graph.extract_and_store_entities(parsed_result["facts"], speakers, batch),
+    )
+
+    for speaker in speakers:
+        if speaker in speaker_mapping:
+            user_info = speaker_mapping[speaker]
+            enhanced_speaker_name = f"{user_info['name']} ({user_info['email']})"
+
+            # Create relationship between original and enhanced names
+            try:
+                alias_data = {
+                    "action": "Create_relationship",
+                    "source_entity_type": "User",
+                    "source_entity_name": speaker,
+                    "target_entity_type": "User",
+                    "target_entity_name": enhanced_speaker_name,
+                    "relationship_type": "SAME_AS",
+                    "description": f"Speaker alias mapping for conversation {conversation_id}",
+                }
 
-    except Exception as e:
-        print(f"Failed to create user entity {speaker_name}: {e}")
-        return False
+                batch.add(alias_data)
+                log.debug(
+                    "Queued alias relationship: %s -> %s", speaker, enhanced_speaker_name
+                )
+            except Exception as e:
+                log.warning("Failed to create alias relationship: %s", e)
 
+    # Create friendship relationships between speakers
+    await zep_graph.create_friendship_relationship(speakers, batch)
 
-def extract_and_store_entities(facts, speakers, graph_id="all_users_htn"):
-    """Extract entities from facts and store them in Zep graph"""
-    if not zep_client:
-        return
+    # Add conversation summary to graph with metadata
+    if parsed_result.get("summary"):
+        try:
+            conversation_name = (
+                f"Conversation_{conversation_id}_{created_at.strftime('%Y%m%d_%H%M%S')}"
+                if conversation_id
+                else f"Conversation_{created_at.strftime('%Y%m%d_%H%M%S')}"
+            )
 
-    entity_patterns = {
-        "Goal": [
-            r"(?:wants to|plans to|hopes to|aims to|goal is to|trying to)\s+(.+)",
-            r"(?:my goal is|i want to|i plan to|i hope to|i aim to)\s+(.+)",
-        ],
-        "Language": [
-            r"(?:speaks|knows|fluent in|can speak)\s+([\w\s]+?)(?:\s+(?:language|fluently))?",
-            r"(?:native|bilingual|multilingual)\s+(?:in\s+)?([\w\s]+)",
-        ],
-        "Organization": [
-            r"(?:works at|employed by|job at|working at)\s+(.+)",
-            r"(?:my job is at|i work at|employed at)\s+(.+)",
-        ],
-        "Topic": [
-            r"(?:interested in|likes|enjoys|passionate about|loves|into)\s+(.+)",
-            r"(?:my interest is|i like|i enjoy|i love)\s+(.+)",
-        ],
-        "Trait": [
-            r"(?:is|personality|character).*?(outgoing|introverted|friendly|shy|confident|creative|analytical|organized|spontaneous|patient|ambitious|calm|energetic)",
-            r"(?:i am|i'm)\s+(outgoing|introverted|friendly|shy|confident|creative|analytical|organized|spontaneous|patient|ambitious|calm|energetic)",
-        ],
-    }
-
-    import re
-
-    for speaker, speaker_facts in facts.items():
-        for fact in speaker_facts:
-            fact_lower = fact.lower()
-
-            for entity_type, patterns in entity_patterns.items():
-                for pattern in patterns:
-                    match = re.search(pattern, fact_lower, re.IGNORECASE)
-                    if match:
-                        entity_name = match.group(1).strip()
-
-                        # Skip very short or generic entities
-                        if len(entity_name) < 2 or entity_name in [
-                            "it",
-                            "that",
-                            "this",
-                            "them",
-                        ]:
-                            continue
-
-                        # Create entity if it doesn't exist
-                        try:
-                            search_results = zep_client.graph.search(
-                                graph_id=graph_id,
-                                query=entity_name,
-                                scope="nodes",
-                                search_filters={"node_labels": [entity_type]},
-                                limit=1,
-                            )
-
-                            entity_exists = (
-                                search_results.nodes and len(search_results.nodes) > 0
-                            )
-
-                            if not entity_exists:
-                                entity_data = {
-                                    "action": "Create_entity",
-                                    "entity_type": entity_type,
-                                    "name": entity_name,
-                                    "description": fact,
-                                }
-
-                                zep_client.graph.add(
-                                    graph_id=graph_id,
-                                    type="json",
-                                    data=json.dumps(entity_data),
-                                )
-
-                                print(f"Created {entity_type} entity: {entity_name}")
-
-                            # Create relationship between user and entity
-                            relationship_types = {
-                                "Goal": "HAS_GOAL",
-                                "Language": "SPEAKS",
-                                "Organization": "WORKS_AT",
-                                "Topic": "INTERESTED_IN",
-                                "Trait": "HAS_TRAIT",
-                            }
-
-                            relationship_data = {
-                                "action": "Create_relationship",
-                                "source_entity_type": "User",
-                                "source_entity_name": speaker,
-                                "target_entity_type": entity_type,
-                                "target_entity_name": entity_name,
-                                "relationship_type": relationship_types[entity_type],
-                                "description": fact,
-                            }
-
-                            zep_client.graph.add(
-                                graph_id=graph_id,
-                                type="json",
-                                data=json.dumps(relationship_data),
-                            )
-
-                            print(
-                                f"Created relationship: {speaker} -> {relationship_types[entity_type]} -> {entity_name}"
-                            )
-
-                        except Exception as e:
-                            print(
-                                f"Failed to create entity/relationship for {entity_name}: {e}"
-                            )
-
-                        break  # Only match first pattern for each fact
-
-
-def create_friendship_relationship(speakers, graph_id="all_users_htn"):
-    """Create friendship relationships between conversation participants"""
-    if not zep_client or len(speakers) < 2:
-        return
+            summary_data = {
+                "action": "Create_entity",
+                "entity_type": "Conversation",
+                "name": conversation_name,
+                "description": f"Summary: {parsed_result['summary']} | Participants: {', '.join(speakers)} | ConversationID: {conversation_id}",
+            }
 
-    try:
-        speaker_list = list(speakers)
-        for i in range(len(speaker_list)):
-            for j in range(i + 1, len(speaker_list)):
-                speaker1, speaker2 = speaker_list[i], speaker_list[j]
+            batch.add(summary_data)
 
-                # Create bidirectional friendship
-                for source, target in [(speaker1, speaker2), (speaker2, speaker1)]:
-                    friendship_data = {
+            # Create relationships between conversation and participants
+            for speaker in speakers:
+                try:
+                    participation_data = {
                         "action": "Create_relationship",
                         "source_entity_type": "User",
-                        "source_entity_name": source,
-                        "target_entity_type": "User",
-                        "target_entity_name": target,
-                        "relationship_type": "FRIENDS_WITH",
-                        "description": f"Friends based on conversation",
+                        "source_entity_name": speaker,
+                        "target_entity_type": "Conversation",
+                        "target_entity_name": conversation_name,
+                        "relationship_type": "PARTICIPATED_IN",
+                        "description": f"Participated in conversation on {created_at.strftime('%Y-%m-%d %H:%M:%S')}",
                     }
 
-                    zep_client.graph.add(
-                        graph_id=graph_id,
-                        type="json",
-                        data=json.dumps(friendship_data),
+                    batch.add(participation_data)
+                except Exception as e:
+                    log.warning(
+                        "Failed to create participation relationship for %s: %s",
+                        speaker,
+                        e,
                     )
 
-                print(f"Created friendship: {speaker1} <-> {speaker2}")
+            log.debug("Queued conversation summary for graph: %s", conversation_name)
+        except Exception as e:
+            log.warning("Failed to add conversation summary: %s", e)
+
+
+# Per-stage latency and failures, served with everything else on /metrics
+PIPELINE_SECONDS = registry.histogram(
+    "pipeline_stage_seconds",
+    "Time spent in each stage of the audio pipeline",
+    ["stage"],
+)
+PIPELINE_FAILURES = registry.counter(
+    "pipeline_failures_total",
+    "Pipeline stage failures by exception type",
+    ["stage", "type"],
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+)
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total",
+    "Finished requests by route and status",
+    ["endpoint", "status"],
+)
+
+
+@contextmanager
+def pipeline_stage(stage, parent=None):
+    """Time and trace one pipeline stage and count its failures by exception type"""
+    started = time.perf_counter()
+    try:
+        with tracer.span(f"pipeline.{stage}", parent=parent) as span:
+            yield span
+    except Exception as e:
+        PIPELINE_FAILURES.inc(stage=stage, type=type(e).__name__)
+        raise
+    finally:
+        PIPELINE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+
+def write_conversation(payload, checkpoint):
+    """Graph writer handler: ingest one queued conversation on the Zep loop"""
+    # Continues the trace of the request that queued the conversation
+    with pipeline_stage("graph", parent=payload.get("trace")):
+        get_zep_graph().run(ingest_conversation(payload, checkpoint))
+
+
+graph_writer = GraphWriter(
+    GRAPH_QUEUE_PATH,
+    write_conversation,
+    max_attempts=GRAPH_WRITE_MAX_ATTEMPTS,
+    defer_on=(CircuitOpen,),
+    defer_delay=zep_calls.breaker.reset_timeout,
+    dedupe_ttl=GRAPH_DEDUPE_TTL,
+)
+
+
+# What warm_up() has done in this process; served by /ready
+warm_state = {"status": "cold", "seconds": None, "components": {}}
+_warm_lock = threading.Lock()
+_warm_thread = None
+
+
+def warm_up():
+    """Build the clients, open their pools, start the graph writer and fill caches"""
+    started = time.perf_counter()
+    warm_state["status"] = "warming"
+    components = warm_state["components"]
+    registry.start()
+    with tracer.span("warm_up"):
+        client = get_openai()
+        if client is None:
+            components["openai"] = "disabled"
+        else:
+            # Opens a pooled connection so the first upload skips the handshake
+            try:
+                openai_calls.call(client.models.list)
+                components["openai"] = "ok"
+            except Exception as e:
+                components["openai"] = f"failed: {e}"
+
+        zep_graph = get_zep_graph()
+        if zep_graph is None:
+            components["zep_graph"] = "disabled"
+        else:
+            graph_writer.start()
+            components["graph_writer"] = "running"
+            components.update(warm_entity_cache(zep_graph))
+
+    warm_state["seconds"] = round(time.perf_counter() - started, 3)
+    warm_state["status"] = "ready"
+    log.info("Warm-up finished in %.2fs", warm_state["seconds"], extra=components)
 
+
+def warm_entity_cache(zep_graph):
+    """Make sure the graph exists, then preload its nodes into the entity cache"""
+    try:
+        if not zep_graph.run(zep_graph.ensure_graph_exists()):
+            return {"zep_graph": "failed: graph not available"}
+        loaded = zep_graph.run(zep_graph.warm_cache())
     except Exception as e:
-        print(f"Failed to create friendship relationships: {e}")
+        log.warning("Entity cache warm-up failed: %s", e)
+        return {"zep_graph": f"failed: {e}"}
+    log.info("Entity cache warmed with %d nodes from %s", loaded, GRAPH_ID)
+    return {"zep_graph": "ok", "entity_cache": f"{loaded} nodes"}
+
+
+def start_warm_up():
+    """Run warm_up() once per process in the background (gunicorn post_fork)"""
+    global _warm_thread
+    with _warm_lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(
+                target=warm_up, name="warm-up", daemon=True
+            )
+            _warm_thread.start()
+
+
+def stop_jobs():
+    """Fail this process's unfinished jobs as it exits (gunicorn worker_exit).
+
+    Returns how many were abandoned; spans are flushed here because the caller
+    skips interpreter shutdown when there are any.
+    """
+    abandoned = job_queue.shutdown()
+    if abandoned:
+        log.warning("Worker exiting with %d unfinished jobs", abandoned)
+        for exporter in tracer.exporters:
+            if hasattr(exporter, "flush"):
+                exporter.flush()
+    return abandoned
+
+
+def cache_lookups():
+    lookups = {}
+    for name, cache in (
+        ("result", result_cache),
+        ("llm", llm_cache),
+        ("entity", entity_cache),
+    ):
+        stats = cache.stats()
+        lookups[(name, "hit")] = stats["hits"]
+        lookups[(name, "miss")] = stats["misses"]
+    return lookups
+
+
+def graph_queue_rows():
+    stats = graph_writer.stats()
+    return {("pending",): stats["pending"], ("dead_letter",): stats["dead_letter"]}
+
+
+registry.callback(
+    "cache_lookups_total",
+    "Cache lookups by cache and result",
+    cache_lookups,
+    kind="counter",
+    labels=["cache", "result"],
+)
+registry.callback(
+    "jobs",
+    "Transcription jobs by state",
+    lambda: {(state,): job_queue.stats()[state] for state in ("queued", "running")},
+    labels=["state"],
+)
+registry.callback(
+    "graph_queue_rows",
+    "Rows in the graph write outbox",
+    graph_queue_rows,
+    labels=["table"],
+    # Every process counts the same shared outbox
+    merge="max",
+)
+registry.callback(
+    "upstream_circuit_open",
+    "1 while a service's circuit breaker is open",
+    lambda: {
+        (calls.name,): int(calls.breaker.open_for() > 0)
+        for calls in (openai_calls, zep_calls)
+    },
+    labels=["service"],
+    merge="max",
+)
+
+
+@app.before_request
+def warm_on_first_request():
+    # Covers servers without the post_fork hook (flask run, test clients)
+    if _warm_thread is None:
+        start_warm_up()
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.in_flight = True
+    HTTP_IN_FLIGHT.inc()
+
+
+@app.after_request
+def count_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=str(response.status_code))
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if g.pop("in_flight", False):
+        HTTP_IN_FLIGHT.dec()
+
+
+@app.before_request
+def start_trace():
+    """Open the request's root span; X-Request-ID is honoured if the client sent one"""
+    rule = request.url_rule.rule if request.url_rule else "unmatched"
+    span = tracer.start(
+        f"{request.method} {rule}",
+        request_id=request.headers.get("X-Request-ID", "")[:128] or None,
+        kind="server",
+        path=request.path,
+    )
+    g.trace_span = span
+    g.trace_token = tracer.attach(span)
+
+
+@app.after_request
+def end_trace(response):
+    span = g.pop("trace_span", None)
+    if span is not None:
+        span.set(status=response.status_code)
+        response.headers["X-Request-ID"] = span.request_id
+        # Streamed bodies are sent after this returns; end the span once they are
+        response.call_on_close(lambda: tracer.end(span))
+    return response
+
+
+@app.teardown_request
+def detach_trace(exc):
+    token = g.pop("trace_token", None)
+    if token is not None:
+        tracer.detach(token)
+    # Only still here if the request failed before after_request ran
+    span = g.pop("trace_span", None)
+    if span is not None:
+        tracer.end(span, exc)
+
+
+def observe_upload():
+    """Record how long receiving and spooling the upload took for this request"""
+    elapsed = time.perf_counter() - g.request_started
+    PIPELINE_SECONDS.observe(elapsed, stage="upload")
+    current_span().set(upload_seconds=round(elapsed, 3))
 
 
 @app.route("/")
@@ -276,9 +678,44 @@ def home():
     return jsonify({"message": "HTN2025 Backend is running 🚀"})
 
 
+@app.route("/metrics")
+def metrics():
+    return Response(registry.render(), mimetype=CONTENT_TYPE)
+
+
+@app.route("/ready")
+def ready():
+    """200 once this process has warmed its clients and caches, 503 until then"""
+    return jsonify(warm_state), 200 if warm_state["status"] == "ready" else 503
+
+
 @app.route("/health")
 def health_check():
-    return jsonify({"status": "healthy", "timestamp": time.time()})
+    return jsonify(
+        {
+            "status": "healthy",
+            "timestamp": time.time(),
+            "warm": warm_state["status"],
+            "jobs": job_queue.stats(),
+            "graph_queue": graph_writer.stats(),
+            "entity_cache": entity_cache.stats(),
+            "result_cache": result_cache.stats(),
+            "llm_cache": llm_cache.stats(),
+            "upstreams": {"openai": openai_calls.stats(), "zep": zep_calls.stats()},
+        }
+    )
+
+
+def openai_unavailable():
+    """503 response while the OpenAI breaker is open, else None"""
+    open_for = openai_calls.breaker.open_for()
+    if not open_for:
+        return None
+    return (
+        jsonify({"error": "OpenAI is unavailable, try again later"}),
+        503,
+        {"Retry-After": str(max(1, round(open_for)))},
+    )
 
 
 @app.route("/transcribe", methods=["POST"])
@@ -287,7 +724,7 @@ def transcribe_and_analyze():
         return jsonify({"error": "No audio file uploaded"}), 400
 
     # Check if API keys are available
-    if not openai_api_key or client is None:
+    if get_openai() is None:
         return (
             jsonify(
                 {
@@ -297,6 +734,11 @@ def transcribe_and_analyze():
             500,
         )
 
+    # Fail fast instead of queuing work that cannot reach OpenAI
+    unavailable = openai_unavailable()
+    if unavailable:
+        return unavailable
+
     audio_file = request.files["file"]
 
     # Extract additional form data
@@ -304,300 +746,382 @@ def transcribe_and_analyze():
     user_email = request.form.get("userEmail", "")
     user_name = request.form.get("userName", "")
 
-    print(f"Processing transcription for conversation: {conversation_id}")
-    print(f"User: {user_name} ({user_email})")
+    log.info("Processing transcription for conversation: %s", conversation_id)
+    log.debug("User: %s (%s)", user_name, user_email)
 
+    # The upload was parsed straight into a spooled buffer; the job owns it now
+    audio = detach_upload(audio_file)
+    observe_upload()
+
+    # Hand the upload to the worker pool and return straight away
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=os.path.splitext(audio_file.filename)[1]
-        ) as temp:
-            audio_file.save(temp.name)
-            temp_path = temp.name
-
-        # Transcribe with Whisper (verbose JSON for timestamps)
-        transcription = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=open(temp_path, "rb"),
-            response_format="verbose_json",
+        job_id = job_queue.submit(
+            process_audio,
+            audio,
+            audio_file.filename,
+            conversation_id,
+            user_email,
+            user_name,
         )
+    except QueueFull as e:
+        audio.close()
+        return jsonify({"error": str(e)}), 429, {"Retry-After": str(RETRY_AFTER)}
 
-        # Single AI prompt to process everything
-        segments = getattr(transcription, "segments", None)
-        if segments:
-            segment_text = "\n".join(
-                [f"[{s.start:.2f}-{s.end:.2f}] {s.text.strip()}" for s in segments]
-            )
-        else:
-            segment_text = f"[0.00-0.00] {transcription.text}"
-
-        unified_prompt = f"""
-You are an AI assistant that processes audio transcripts. Given the timestamped segments below, you must return a JSON object with exactly three fields: transcript, facts, and summary.
-
-REQUIREMENTS:
-0. Try to deduce the speakers' names from the transcript
-1. transcript: Array of conversation turns with speaker identification (only "speaker" and "text" fields)
-2. facts: Key facts extracted for each speaker separately
-3. summary: Concise summary of key points and outcomes
-
-RULES:
-- There are only two speakers maximum
-- If someone says another person's name, that name belongs to the OTHER speaker
-- Group segments that are close together (< 0.5s apart)
-- Merge consecutive utterances from the same speaker
-- Extract only explicit, concrete facts directly stated by each person
-- Do not include questions, opinions, or interpretations in facts
-- Return ONLY valid JSON, no other text
-
-SEGMENTS:
-{segment_text}
-
-OUTPUT FORMAT (return ONLY this JSON structure):
-{{
-  "transcript": [
-    {{"speaker": "<Speaker 1>", "text": "utterance"}},
-    {{"speaker": "<Speaker 2>", "text": "response"}}
-  ],
-  "facts": {{
-    "<Speaker 1>": [
-      "Concrete fact 1 about Speaker 1",
-      "Concrete fact 2 about Speaker 1"
-    ],
-    "<Speaker 2>": [
-      "Concrete fact 1 about Speaker 2",
-      "Concrete fact 2 about Speaker 2"
-    ]
-  }},
-  "summary": "Brief summary of the conversation including main topics, decisions made, and key information exchanged."
-}}
-"""
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": unified_prompt}],
-            temperature=0,
+    return (
+        jsonify(
+            {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+        ),
+        202,
+    )
+
+
+@app.route("/jobs/<job_id>")
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route("/transcribe/stream", methods=["POST"])
+def transcribe_stream():
+    """Same pipeline as /transcribe, streamed back as server-sent events"""
+    if "file" not in request.files:
+        return jsonify({"error": "No audio file uploaded"}), 400
+
+    if get_openai() is None:
+        return (
+            jsonify(
+                {
+                    "error": "OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
+                }
+            ),
+            500,
         )
 
-        result_json = response.choices[0].message.content.strip()
+    unavailable = openai_unavailable()
+    if unavailable:
+        return unavailable
 
-        # Clean up the result to ensure it's valid JSON
-        if result_json.startswith("```json"):
-            result_json = result_json[7:]
-        if result_json.endswith("```"):
-            result_json = result_json[:-3]
-        result_json = result_json.strip()
+    if not stream_slots.acquire(blocking=False):
+        return (
+            jsonify({"error": f"Too many streams ({STREAM_MAX_CONCURRENCY})"}),
+            429,
+            {"Retry-After": str(RETRY_AFTER)},
+        )
 
-        # Parse and return the structured result
-        try:
-            parsed_result = json.loads(result_json)
-
-            # Process with Zep if available
-            if (
-                zep_client
-                and parsed_result.get("facts")
-                and parsed_result.get("transcript")
-            ):
-                try:
-                    print("Processing conversation data with Zep...")
-
-                    # Ensure graph exists
-                    graph_id = "all_users_htn"
-                    if ensure_graph_exists(graph_id):
-
-                        # Get unique speakers from transcript
-                        speakers = set()
-                        for turn in parsed_result["transcript"]:
-                            if turn.get("speaker"):
-                                speakers.add(turn["speaker"])
-
-                        print(f"Identified speakers: {list(speakers)}")
-
-                        # Map speakers to real user info if available
-                        speaker_mapping = {}
-                        if user_name and user_email:
-                            # Try to identify which speaker is the main user
-                            # This is a simple heuristic - could be improved with better speaker identification
-                            speaker_list = list(speakers)
-                            if len(speaker_list) > 0:
-                                # Assume first speaker or speaker with similar name is the main user
-                                main_speaker = speaker_list[0]
-                                for speaker in speaker_list:
-                                    if (
-                                        user_name.lower() in speaker.lower()
-                                        or speaker.lower() in user_name.lower()
-                                    ):
-                                        main_speaker = speaker
-                                        break
-
-                                speaker_mapping[main_speaker] = {
-                                    "name": user_name,
-                                    "email": user_email,
-                                    "conversation_id": conversation_id,
-                                }
-                                print(
-                                    f"Mapped speaker '{main_speaker}' to user '{user_name}' ({user_email})"
-                                )
-
-                        # Create user entities for each speaker with enhanced info
-                        for speaker in speakers:
-                            if speaker in speaker_mapping:
-                                # Create enhanced user entity with real info
-                                user_info = speaker_mapping[speaker]
-                                enhanced_speaker_name = (
-                                    f"{user_info['name']} ({user_info['email']})"
-                                )
-                                create_user_entity(enhanced_speaker_name, graph_id)
-
-                                # Also create with original speaker name for consistency
-                                create_user_entity(speaker, graph_id)
-
-                                # Create relationship between original and enhanced names
-                                try:
-                                    alias_data = {
-                                        "action": "Create_relationship",
-                                        "source_entity_type": "User",
-                                        "source_entity_name": speaker,
-                                        "target_entity_type": "User",
-                                        "target_entity_name": enhanced_speaker_name,
-                                        "relationship_type": "SAME_AS",
-                                        "description": f"Speaker alias mapping for conversation {conversation_id}",
-                                    }
-
-                                    zep_client.graph.add(
-                                        graph_id=graph_id,
-                                        type="json",
-                                        data=json.dumps(alias_data),
-                                    )
-                                    print(
-                                        f"Created alias relationship: {speaker} -> {enhanced_speaker_name}"
-                                    )
-                                except Exception as e:
-                                    print(f"Failed to create alias relationship: {e}")
-                            else:
-                                create_user_entity(speaker, graph_id)
-
-                        # Extract and store entities from facts
-                        extract_and_store_entities(
-                            parsed_result["facts"], speakers, graph_id
-                        )
-
-                        # Create friendship relationships between speakers
-                        create_friendship_relationship(speakers, graph_id)
-
-                        # Add conversation summary to graph with metadata
-                        if parsed_result.get("summary"):
-                            try:
-                                conversation_name = (
-                                    f"Conversation_{conversation_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                                    if conversation_id
-                                    else f"Conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                                )
-
-                                summary_data = {
-                                    "action": "Create_entity",
-                                    "entity_type": "Conversation",
-                                    "name": conversation_name,
-                                    "description": f"Summary: {parsed_result['summary']} | Participants: {', '.join(speakers)} | ConversationID: {conversation_id}",
-                                }
-
-                                zep_client.graph.add(
-                                    graph_id=graph_id,
-                                    type="json",
-                                    data=json.dumps(summary_data),
-                                )
-
-                                # Create relationships between conversation and participants
-                                for speaker in speakers:
-                                    try:
-                                        participation_data = {
-                                            "action": "Create_relationship",
-                                            "source_entity_type": "User",
-                                            "source_entity_name": speaker,
-                                            "target_entity_type": "Conversation",
-                                            "target_entity_name": conversation_name,
-                                            "relationship_type": "PARTICIPATED_IN",
-                                            "description": f"Participated in conversation on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                                        }
-
-                                        zep_client.graph.add(
-                                            graph_id=graph_id,
-                                            type="json",
-                                            data=json.dumps(participation_data),
-                                        )
-                                    except Exception as e:
-                                        print(
-                                            f"Failed to create participation relationship for {speaker}: {e}"
-                                        )
-
-                                print(
-                                    f"Added conversation summary to graph: {conversation_name}"
-                                )
-                            except Exception as e:
-                                print(f"Failed to add conversation summary: {e}")
-
-                        print("Successfully processed conversation data with Zep")
-                    else:
-                        print("Failed to ensure Zep graph exists")
+    audio_file = request.files["file"]
+    audio = detach_upload(audio_file)
+    observe_upload()
+    filename = audio_file.filename
+    conversation_id = request.form.get("conversationId", "")
+    user_email = request.form.get("userEmail", "")
+    user_name = request.form.get("userName", "")
 
-                except Exception as e:
-                    print(f"Error processing with Zep: {e}")
-                    # Continue without Zep processing
+    log.info("Streaming transcription for conversation: %s", conversation_id)
+    # The body is generated after the request context is gone, so carry the span
+    span = current_span()
 
-            # Clean up temporary file
-            os.unlink(temp_path)
+    released = []
 
-            return jsonify(parsed_result)
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Raw result: {result_json}")
+    def release():
+        # Runs from the generator or from the response's close(), whichever is
+        # first: a client that disconnects before the body starts never runs
+        # the generator at all
+        if not released:
+            released.append(True)
+            audio.close()
+            stream_slots.release()
 
-            # Clean up temporary file
-            os.unlink(temp_path)
+    def generate():
+        try:
+            # Sent before hashing and Whisper, so the first byte doesn't wait on them
+            yield sse("accepted", {"request_id": span.request_id})
+            with tracer.activate(span):
+                try:
+                    yield from stream_analysis(
+                        audio, filename, conversation_id, user_email, user_name
+                    )
+                except Exception as e:
+                    log.error("Streaming transcription failed: %s", e)
+                    yield sse("error", {"error": str(e)})
+        finally:
+            release()
+
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(release)
+    return response
+
+
+@tracer.traced("job")
+def process_audio(audio, filename, conversation_id, user_email, user_name):
+    """Transcribe, analyze and ingest one uploaded recording, then release it"""
+    rss_before = peak_rss_mb()
+    try:
+        return analyze_audio(audio, filename, conversation_id, user_email, user_name)
+    finally:
+        spilled = spilled_to_disk(audio)
+        audio.close()
+        rss_after = peak_rss_mb()
+        log.info(
+            "Peak RSS %.1f MB (+%.1f MB) for %s",
+            rss_after,
+            rss_after - rss_before,
+            filename,
+            extra={"spilled_to_disk": spilled},
+        )
 
-            # Return fallback response
-            return jsonify(
-                {
-                    "transcript": [{"speaker": "Unknown", "text": transcription.text}],
-                    "facts": {"Unknown": ["No facts could be extracted"]},
-                    "summary": "Transcription completed but detailed analysis failed.",
-                }
-            )
-        else:
-            # Clean up temporary file
-            os.unlink(temp_path)
 
-            # Return fallback response
-            return jsonify(
-                {
-                    "transcript": [{"speaker": "Unknown", "text": transcription.text}],
-                    "facts": {"Unknown": ["No facts could be extracted"]},
-                    "summary": "Transcription completed but detailed analysis failed.",
-                }
-            )
+def queue_graph_ingestion(
+    parsed_result, audio_hash, conversation_id, user_email, user_name
+):
+    """Queue the graph writes; the graph writer drains them in the background"""
+    if not (
+        zep_api_key and parsed_result.get("facts") and parsed_result.get("transcript")
+    ):
+        return
 
+    span = current_span()
+    try:
+        # The same recording for the same conversation is only ingested once
+        queued = graph_writer.enqueue(
+            {
+                "parsed_result": parsed_result,
+                "conversation_id": conversation_id,
+                "user_name": user_name,
+                "user_email": user_email,
+                "created_at": time.time(),
+                "trace": span.context() if span else None,
+            },
+            dedupe_key=f"{audio_hash}:{conversation_id}",
+        )
+        if queued is None:
+            log.info("Conversation already queued for Zep, skipping")
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        log.error("Failed to queue conversation for Zep: %s", e)
+        # Continue without Zep processing
+
+
+def transcribe_once(client, audio, filename, audio_hash, on_segments=None):
+    """Whisper transcription of an upload, reused if this audio was transcribed before"""
+    transcript_key = f"{audio_hash}:whisper-1"
+    cached = result_cache.get(transcript_key)
+    if cached is not None:
+        log.info("Transcript cache hit for %s", filename)
+        transcription = load_transcription(cached)
+        if on_segments is not None:
+            on_segments(transcription_segments(transcription))
+        return transcription
+
+    transcription = transcribe(
+        client, audio, filename, on_segments=on_segments, resilience=openai_calls
+    )
+    result_cache.put(transcript_key, dump_transcription(transcription))
+    return transcription
+
+
+def finish_analysis(
+    parsed_result,
+    failed,
+    segments,
+    audio_hash,
+    cache_key,
+    conversation_id,
+    user_email,
+    user_name,
+):
+    """Store and ingest a complete analysis; fill in the fallback for failed sections.
+
+    A partial result is returned but neither cached nor written to the graph,
+    so the next attempt analyzes the (cached) transcript again.
+    """
+    if failed:
+        log.warning("Analysis incomplete (%s), returning fallback", ", ".join(failed))
+        return {**fallback_result(segments), **parsed_result}
+    result_cache.put(cache_key, parsed_result)
+    queue_graph_ingestion(
+        parsed_result, audio_hash, conversation_id, user_email, user_name
+    )
+    return parsed_result
+
+
+def analyze_audio(audio, filename, conversation_id, user_email, user_name):
+    # Retries of the same upload reuse the stored analysis
+    audio_hash = hash_file(audio)
+    cache_key = f"{audio_hash}:{RESULT_CACHE_VERSION}"
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        log.info("Result cache hit for %s", filename)
+        queue_graph_ingestion(
+            cached, audio_hash, conversation_id, user_email, user_name
+        )
+        return cached
+
+    client = get_openai()
+
+    # Transcribe with Whisper (verbose JSON for timestamps)
+    # (long recordings are split at silences and transcribed in parallel)
+    with pipeline_stage("whisper"):
+        transcription = transcribe_once(client, audio, filename, audio_hash)
+
+    # Nearby segments are merged first; short transcripts are analyzed in one
+    # prompt (or fanned out, per ANALYSIS_MODE), long ones in windows
+    segments = merge_segments(transcription_segments(transcription))
+    segment_text = format_lines(segments)
+    if not analyzer.fits(segment_text):
+        with pipeline_stage("llm"):
+            parsed_result, failed = analyzer.map_reduce(client, segments)
+    elif analyzer.mode == "fanout":
+        with pipeline_stage("llm"):
+            parsed_result, failed = analyzer.fanout(client, segments)
+    else:
+        with pipeline_stage("llm") as span:
+            content = analyzer.complete(
+                client, build_unified_prompt(segment_text), span
+            )
+        # Sections that don't parse are asked for again on their own
+        with pipeline_stage("parse"):
+            parsed_result, failed = analyzer.finish(client, content, segments)
+
+    return finish_analysis(
+        parsed_result,
+        failed,
+        segments,
+        audio_hash,
+        cache_key,
+        conversation_id,
+        user_email,
+        user_name,
+    )
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Top-level keys of the analysis JSON and the SSE event each one becomes
+STREAM_EVENTS = {"transcript": "turn", "facts": "facts", "summary": "summary"}
+
+
+def result_events(result, turns_sent=(), sent=()):
+    """SSE events for a complete analysis, minus the turns and sections already sent.
+
+    If the transcript doesn't start with the turns already streamed (it was
+    repaired, or replaced by the fallback), a "transcript" event with all of
+    it replaces them.
+    """
+    transcript = result.get("transcript", [])
+    if turns_sent and read_section("transcript", list(turns_sent)) != (
+        transcript[: len(turns_sent)]
+    ):
+        yield sse("transcript", transcript)
+    else:
+        for turn in transcript[len(turns_sent) :]:
+            yield sse("turn", turn)
+    for section in ("facts", "summary"):
+        if section not in sent:
+            yield sse(STREAM_EVENTS[section], result.get(section))
+
+
+def stream_analysis(audio, filename, conversation_id, user_email, user_name):
+    """Yield SSE events: Whisper segments, then transcript turns, facts and summary.
+
+    A "transcript" event carrying every turn replaces the turns sent so far
+    when the streamed transcript had to be repaired.
+    """
+    audio_hash = hash_file(audio)
+    cache_key = f"{audio_hash}:{RESULT_CACHE_VERSION}"
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        log.info("Result cache hit for %s", filename)
+        yield from result_events(cached)
+        queue_graph_ingestion(
+            cached, audio_hash, conversation_id, user_email, user_name
+        )
+        yield sse("done", cached)
+        return
 
+    client = get_openai()
 
-def keep_alive():
-    """Send a request to the health endpoint every 5 minutes to keep the server active"""
+    # Whisper runs on a helper thread so segments can be sent as they land
+    segment_batches = queue.Queue()
+    outcome = {}
 
-    def ping_server():
-        while True:
-            try:
-                time.sleep(300)  # Wait 5 minutes
-                # Get the server URL from environment or use localhost
-                server_url = os.environ.get(
-                    "RENDER_EXTERNAL_URL", "http://localhost:5000"
+    def run_transcription():
+        try:
+            with pipeline_stage("whisper"):
+                outcome["transcription"] = transcribe_once(
+                    client, audio, filename, audio_hash, segment_batches.put
                 )
-                response = requests.get(f"{server_url}/health", timeout=10)
-                print(f"Keep-alive ping: {response.status_code}")
-            except Exception as e:
-                print(f"Keep-alive ping failed: {e}")
-
-    # Start the ping thread
-    ping_thread = threading.Thread(target=ping_server, daemon=True)
-    ping_thread.start()
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            segment_batches.put(None)
+
+    threading.Thread(
+        target=contextvars.copy_context().run, args=(run_transcription,), daemon=True
+    ).start()
+    while True:
+        batch = segment_batches.get()
+        if batch is None:
+            break
+        for segment in batch:
+            yield sse(
+                "segment",
+                {"start": segment.start, "end": segment.end, "text": segment.text},
+            )
+    if "error" in outcome:
+        raise outcome["error"]
+    transcription = outcome["transcription"]
+
+    segments = merge_segments(transcription_segments(transcription))
+    segment_text = format_lines(segments)
+    turns_sent, sent = [], set()
+    if not analyzer.fits(segment_text):
+        # Windows are merged at the end, so turns are sent once all are done
+        with pipeline_stage("llm"):
+            parsed_result, failed = analyzer.map_reduce(client, segments)
+    elif analyzer.mode == "fanout":
+        # Sent once the concurrent calls are all in
+        with pipeline_stage("llm"):
+            parsed_result, failed = analyzer.fanout(client, segments)
+    else:
+        unified_prompt = build_unified_prompt(segment_text)
+        # Only opening the stream is retried; a failure mid-stream ends the response
+        # (the llm stage here includes time spent writing events to the client)
+        parser = StreamingObjectParser(stream_arrays=("transcript",))
+        with pipeline_stage("llm") as span:
+            for piece in analyzer.stream(client, unified_prompt, span):
+                for key, value in parser.feed(piece):
+                    if key == "transcript":
+                        turns_sent.append(value)
+                        yield sse("turn", value)
+                    elif key in STREAM_EVENTS:
+                        value = read_section(key, value)
+                        if value is not None:
+                            sent.add(key)
+                            yield sse(STREAM_EVENTS[key], value)
+
+        # Whatever didn't parse is asked for again and sent once it arrives
+        with pipeline_stage("parse"):
+            parsed_result, failed = analyzer.finish(client, parser.buffer, segments)
+
+    parsed_result = finish_analysis(
+        parsed_result,
+        failed,
+        segments,
+        audio_hash,
+        cache_key,
+        conversation_id,
+        user_email,
+        user_name,
+    )
+    yield from result_events(parsed_result, turns_sent, sent)
+    yield sse("done", parsed_result)
 
 
 if __name__ == "__main__":
@@ -605,7 +1129,7 @@ if __name__ == "__main__":
 
     port = int(os.environ.get("PORT", 5000))
 
-    # Start keep-alive mechanism
-    keep_alive()
+    # Warm up alongside the dev server; gunicorn does this in post_fork
+    start_warm_up()
 
     app.run(debug=False, host="0.0.0.0", port=port)
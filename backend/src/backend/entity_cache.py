@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_name(name):
+    return " ".join(name.lower().split())
+
+
+class EntityCache:
+    """LRU + TTL set of entities known to exist in a Zep graph.
+
+    Keys are (graph_id, label, normalized name). A hit means we can skip the
+    graph.search round-trip before creating the entity.
+    """
+
+    def __init__(self, max_entries=50000, ttl=6 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.warmed = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, graph_id, label, name):
+        return (graph_id, label, normalize_name(name))
+
+    def contains(self, graph_id, label, name):
+        key = self._key(graph_id, label, name)
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            if expires_at is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False
+
+    def add(self, graph_id, label, name):
+        key = self._key(graph_id, label, name)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def warm(self, graph_id, nodes):
+        """Add a page of existing graph nodes; returns how many there were"""
+        for node in nodes:
+            for label in node.labels or []:
+                self.add(graph_id, label, node.name)
+        with self._lock:
+            self.warmed += len(nodes)
+        return len(nodes)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "warmed": self.warmed,
+            }
@@ -0,0 +1,123 @@
+import re
+from typing import NamedTuple
+
+TRAITS = (
+    "outgoing|introverted|friendly|shy|confident|creative|analytical|organized"
+    "|spontaneous|patient|ambitious|calm|energetic"
+)
+
+# Each pattern has exactly one capture group: the entity name
+DEFAULT_PATTERNS = {
+    "Goal": [
+        r"(?:wants to|plans to|hopes to|aims to|goal is to|trying to)\s+(.+)",
+        r"(?:my goal is|i want to|i plan to|i hope to|i aim to)\s+(.+)",
+    ],
+    "Language": [
+        r"(?:speaks|knows|fluent in|can speak)\s+([\w\s]+?)(?:\s+(?:language|fluently))?",
+        r"(?:native|bilingual|multilingual)\s+(?:in\s+)?([\w\s]+)",
+    ],
+    "Organization": [
+        r"(?:works at|employed by|job at|working at)\s+(.+)",
+        r"(?:my job is at|i work at|employed at)\s+(.+)",
+    ],
+    "Topic": [
+        r"(?:interested in|likes|enjoys|passionate about|loves|into)\s+(.+)",
+        r"(?:my interest is|i like|i enjoy|i love)\s+(.+)",
+    ],
+    "Trait": [
+        rf"(?:is|personality|character).*?({TRAITS})",
+        rf"(?:i am|i'm)\s+({TRAITS})",
+    ],
+}
+
+DEFAULT_RELATIONSHIP_TYPES = {
+    "Goal": "HAS_GOAL",
+    "Language": "SPEAKS",
+    "Organization": "WORKS_AT",
+    "Topic": "INTERESTED_IN",
+    "Trait": "HAS_TRAIT",
+}
+
+# Matches shorter than this or in this list are too generic to store
+MIN_NAME_LENGTH = 2
+STOP_NAMES = {"it", "that", "this", "them"}
+
+
+class Entity(NamedTuple):
+    speaker: str
+    entity_type: str
+    name: str
+    relationship_type: str
+    fact: str
+
+
+class EntityExtractor:
+    """Pulls Goal/Language/Organization/Topic/Trait entities out of fact strings.
+
+    The patterns for each entity type are compiled once into a single
+    alternation, so a fact is scanned once per type instead of once per
+    pattern. At most one entity per type is taken from each fact.
+    """
+
+    def __init__(
+        self, patterns=DEFAULT_PATTERNS, relationship_types=DEFAULT_RELATIONSHIP_TYPES
+    ):
+        self.relationship_types = dict(relationship_types)
+        self._types = []
+        for entity_type, type_patterns in patterns.items():
+            combined = re.compile(
+                "|".join(f"(?:{pattern})" for pattern in type_patterns),
+                re.IGNORECASE,
+            )
+            # Kept for the rare fallback when the first match is rejected
+            single = [re.compile(pattern, re.IGNORECASE) for pattern in type_patterns]
+            self._types.append((entity_type, combined, single))
+
+    def extract_fact(self, speaker, fact):
+        """Return the entities found in one fact"""
+        fact_lower = fact.lower()
+        entities = []
+
+        for entity_type, combined, single in self._types:
+            match = combined.search(fact_lower)
+            if not match:
+                continue
+
+            # One capture group per alternative, so lastindex says which matched
+            name = match.group(match.lastindex).strip()
+            if not self._usable(name):
+                name = None
+                for pattern in single[match.lastindex :]:
+                    fallback = pattern.search(fact_lower)
+                    if fallback and self._usable(fallback.group(1).strip()):
+                        name = fallback.group(1).strip()
+                        break
+                if name is None:
+                    continue
+
+            entities.append(
+                Entity(
+                    speaker=speaker,
+                    entity_type=entity_type,
+                    name=name,
+                    relationship_type=self.relationship_types[entity_type],
+                    fact=fact,
+                )
+            )
+
+        return entities
+
+    def extract(self, facts):
+        """Return the entities for every fact in a {speaker: [fact, ...]} mapping"""
+        entities = []
+        for speaker, speaker_facts in facts.items():
+            for fact in speaker_facts:
+                entities.extend(self.extract_fact(speaker, fact))
+        return entities
+
+    @staticmethod
+    def _usable(name):
+        return len(name) >= MIN_NAME_LENGTH and name not in STOP_NAMES
+
+
+default_extractor = EntityExtractor()
@@ -0,0 +1,95 @@
+import json
+
+# Zep rejects graph.add payloads larger than this many characters
+MAX_EPISODE_CHARS = 10000
+
+
+class GraphBatch:
+    """Groups graph actions for one conversation into as few graph.add calls as possible.
+
+    Actions are the same Create_entity / Create_relationship dicts we used to
+    send one per call; they are sent together as {"actions": [...]} JSON
+    episodes no larger than max_chars. add() only buffers: a buffer that would
+    grow past max_chars is sealed into an episode, and sealed episodes are sent
+    in order through the ZepGraph by `await flush()` / leaving `async with`.
+    Entities from a successful send are recorded in the graph's entity_cache.
+
+    With a checkpoint (graph_writer.Checkpoint), the episodes and how many of
+    them were sent are saved before the first send and after each one, and a
+    batch built with resume() sends only the rest; a conversation retried
+    after its second episode failed doesn't send the first one again.
+    """
+
+    def __init__(self, graph, max_chars=MAX_EPISODE_CHARS, checkpoint=None):
+        self.graph = graph
+        self.graph_id = graph.graph_id
+        self.max_chars = max_chars
+        self.checkpoint = checkpoint
+        self.calls = 0
+        self.actions_sent = 0
+        self._buffer = []
+        self._size = 0
+        self._episodes = []
+        self._sent = 0
+        self._entities = set()
+
+    @classmethod
+    def resume(cls, graph, checkpoint):
+        """A batch holding the episodes saved in checkpoint, minus those sent"""
+        batch = cls(graph, checkpoint=checkpoint)
+        batch._episodes = checkpoint.state["episodes"]
+        batch._sent = checkpoint.state["sent"]
+        return batch
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.flush()
+
+    def add(self, action):
+        encoded = json.dumps(action)
+        # Account for the {"actions": [...]} wrapper and separators
+        if self._buffer and self._size + len(encoded) + 2 > self.max_chars - 16:
+            self._seal()
+
+        self._buffer.append(action)
+        self._size += len(encoded) + 2
+
+        if action.get("action") == "Create_entity":
+            self._entities.add((action["entity_type"], action["name"].strip().lower()))
+
+    def has_entity(self, entity_type, name):
+        """True if this batch already created (or queued) the entity"""
+        return (entity_type, name.strip().lower()) in self._entities
+
+    def _seal(self):
+        if self._buffer:
+            self._episodes.append(self._buffer)
+        self._buffer = []
+        self._size = 0
+
+    def _save(self):
+        if self.checkpoint is not None:
+            self.checkpoint.save({"episodes": self._episodes, "sent": self._sent})
+
+    async def flush(self):
+        self._seal()
+        if self._sent < len(self._episodes):
+            self._save()
+
+        # An episode only counts as sent once its call succeeds
+        while self._sent < len(self._episodes):
+            actions = self._episodes[self._sent]
+            await self.graph.add_episode(actions)
+            self._sent += 1
+            self._save()
+            self.calls += 1
+            self.actions_sent += len(actions)
+            if self.graph.entity_cache is not None:
+                for action in actions:
+                    if action.get("action") == "Create_entity":
+                        self.graph.entity_cache.add(
+                            self.graph_id, action["entity_type"], action["name"]
+                        )
@@ -0,0 +1,283 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    failed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox_progress (
+    outbox_id INTEGER PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS enqueued_keys (
+    key TEXT PRIMARY KEY,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt_at);
+CREATE INDEX IF NOT EXISTS enqueued_keys_age ON enqueued_keys (created_at);
+"""
+
+
+class Checkpoint:
+    """Progress a handler saved for one outbox row, kept across its retries"""
+
+    def __init__(self, writer, row_id, state=None):
+        self.writer = writer
+        self.row_id = row_id
+        self.state = state
+
+    def save(self, state):
+        self.state = state
+        with self.writer._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO outbox_progress (outbox_id, state) "
+                "VALUES (?, ?)",
+                (self.row_id, json.dumps(state)),
+            )
+
+
+class GraphWriter:
+    """SQLite-backed write-behind queue for Zep graph mutations.
+
+    Payloads are committed to disk by enqueue() and handed to
+    handler(payload, checkpoint) by a background thread. Failures are retried
+    with exponential backoff and moved to the dead_letter table after
+    max_attempts. A handler that does its work in steps can
+    checkpoint.save() its progress; a retry gets the last saved state in
+    checkpoint.state, so it can resume instead of starting over. Exceptions
+    listed in defer_on (e.g. an open circuit breaker) mean the service is
+    known to be down: the row is retried after defer_delay without using up
+    an attempt.
+
+    Dedupe keys are kept for dedupe_ttl seconds, and dropped as soon as
+    their row is dead-lettered so the payload can be queued again.
+    """
+
+    def __init__(
+        self,
+        db_path,
+        handler,
+        max_attempts=5,
+        base_delay=2.0,
+        max_delay=300.0,
+        poll_interval=1.0,
+        lease=600.0,
+        defer_on=(),
+        defer_delay=30.0,
+        dedupe_ttl=7 * 24 * 3600,
+    ):
+        self.db_path = db_path
+        self.handler = handler
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        # A claimed row is invisible to other writers (e.g. other gunicorn
+        # workers) until the lease runs out
+        self.lease = lease
+        self.defer_on = tuple(defer_on)
+        self.defer_delay = defer_delay
+        self.dedupe_ttl = dedupe_ttl
+        self._wakeup = threading.Event()
+        self._thread = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Keys from before they pointed at their outbox row
+            columns = [
+                row[1] for row in conn.execute("PRAGMA table_info(enqueued_keys)")
+            ]
+            if "outbox_id" not in columns:
+                conn.execute("ALTER TABLE enqueued_keys ADD COLUMN outbox_id INTEGER")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS enqueued_keys_row "
+                "ON enqueued_keys (outbox_id)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, payload, dedupe_key=None):
+        """Durably queue a payload and return its outbox id.
+
+        With a dedupe_key, only the first payload for that key within
+        dedupe_ttl is queued; later calls return None. A key whose payload
+        was dead-lettered no longer counts.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            if dedupe_key is not None:
+                conn.execute(
+                    "DELETE FROM enqueued_keys WHERE created_at < ?",
+                    (now - self.dedupe_ttl,),
+                )
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO enqueued_keys (key, created_at) VALUES (?, ?)",
+                    (dedupe_key, now),
+                )
+                if cursor.rowcount == 0:
+                    return None
+            cursor = conn.execute(
+                "INSERT INTO outbox (payload, next_attempt_at, created_at) VALUES (?, ?, ?)",
+                (json.dumps(payload), now, now),
+            )
+            row_id = cursor.lastrowid
+            if dedupe_key is not None:
+                conn.execute(
+                    "UPDATE enqueued_keys SET outbox_id = ? WHERE key = ?",
+                    (row_id, dedupe_key),
+                )
+        self._wakeup.set()
+        return row_id
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="graph-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stats(self):
+        with self._connect() as conn:
+            pending = conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+            dead = conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+        return {
+            "pending": pending,
+            "dead_letter": dead,
+            "running": bool(self._thread and self._thread.is_alive()),
+        }
+
+    def drain(self):
+        """Process every due row; returns the number of rows handled"""
+        handled = 0
+        while True:
+            row = self._claim()
+            if row is None:
+                return handled
+            self._process(*row)
+            handled += 1
+
+    def _run(self):
+        while True:
+            try:
+                self.drain()
+            except Exception as e:
+                log.error("Graph writer error: %s", e)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim(self):
+        now = time.time()
+        with self._connect() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT id, payload, attempts FROM outbox "
+                    "WHERE next_attempt_at <= ? AND claimed_until <= ? "
+                    "ORDER BY id LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                cursor = conn.execute(
+                    "UPDATE outbox SET claimed_until = ? "
+                    "WHERE id = ? AND claimed_until <= ?",
+                    (now + self.lease, row[0], now),
+                )
+                conn.commit()
+                if cursor.rowcount == 1:
+                    return row
+
+    def _process(self, row_id, payload, attempts):
+        attempts += 1
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state FROM outbox_progress WHERE outbox_id = ?", (row_id,)
+            ).fetchone()
+        checkpoint = Checkpoint(self, row_id, json.loads(row[0]) if row else None)
+        try:
+            self.handler(json.loads(payload), checkpoint)
+        except self.defer_on as e:
+            self._defer(row_id, str(e))
+            return
+        except Exception as e:
+            self._fail(row_id, payload, attempts, str(e))
+            return
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            conn.execute("DELETE FROM outbox_progress WHERE outbox_id = ?", (row_id,))
+
+    def _defer(self, row_id, error):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET last_error = ?, next_attempt_at = ?, "
+                "claimed_until = 0 WHERE id = ?",
+                (error, time.time() + self.defer_delay, row_id),
+            )
+        log.warning(
+            "Graph write %s deferred %.0fs: %s", row_id, self.defer_delay, error
+        )
+
+    def _fail(self, row_id, payload, attempts, error):
+        now = time.time()
+        with self._connect() as conn:
+            if attempts >= self.max_attempts:
+                conn.execute(
+                    "INSERT OR REPLACE INTO dead_letter "
+                    "SELECT id, payload, ?, ?, created_at, ? FROM outbox WHERE id = ?",
+                    (attempts, error, now, row_id),
+                )
+                conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+                conn.execute(
+                    "DELETE FROM outbox_progress WHERE outbox_id = ?", (row_id,)
+                )
+                # Let the same conversation be queued again later
+                conn.execute("DELETE FROM enqueued_keys WHERE outbox_id = ?", (row_id,))
+                log.error("Graph write %s moved to dead letter: %s", row_id, error)
+                return
+
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+            delay *= random.uniform(0.5, 1.0)
+            conn.execute(
+                "UPDATE outbox SET attempts = ?, last_error = ?, "
+                "next_attempt_at = ?, claimed_until = 0 WHERE id = ?",
+                (attempts, error, now + delay, row_id),
+            )
+            log.warning(
+                "Graph write %s failed (attempt %d), retrying in %.1fs: %s",
+                row_id,
+                attempts,
+                delay,
+                error,
+            )
@@ -0,0 +1,261 @@
+import contextvars
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    finished_at REAL
+);
+"""
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no free slots"""
+
+
+class JobQueue:
+    """Bounded worker pool that runs pipeline jobs off the request thread.
+
+    With a db_path, every job record is also written to SQLite so that any
+    process sharing the file (e.g. the other gunicorn workers) can answer
+    get() for it. Each process still runs, bounds and counts only its own jobs.
+
+    Records carry the pid of the process running them and a heartbeat that
+    process renews every heartbeat_interval seconds. A queued or running job
+    whose heartbeat is older than stale_after belongs to a process that died
+    (killed, or recycled without shutdown()) and get() reports it as failed.
+    Workers are daemon threads, so a process can exit with jobs in flight;
+    shutdown() marks them failed first.
+    """
+
+    def __init__(
+        self,
+        max_workers=2,
+        max_depth=8,
+        result_ttl=3600,
+        db_path=None,
+        heartbeat_interval=10.0,
+        stale_after=60.0,
+    ):
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.result_ttl = result_ttl
+        self.db_path = db_path
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self._queue = queue.Queue()
+        # Threads are started on first submit in each process (safe to fork)
+        self._pid = None
+        self._closed = False
+        # Slots cover both queued and running jobs
+        self._slots = threading.BoundedSemaphore(max_depth)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return the new job id"""
+        if self._closed:
+            raise QueueFull("Job queue is shutting down")
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull(f"Job queue is full ({self.max_depth} jobs)")
+
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        record = {
+            "id": job_id,
+            "status": "queued",
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "pid": os.getpid(),
+            "heartbeat_at": now,
+        }
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = record
+
+        try:
+            self._store(record, prune=True)
+            self._start_threads()
+            # The job keeps the submitting request's context (and trace)
+            self._queue.put((contextvars.copy_context(), job_id, fn, args, kwargs))
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            self._slots.release()
+            raise
+
+        return job_id
+
+    def get(self, job_id):
+        """Return a snapshot of the job record, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        if not self.db_path:
+            return None
+        # Submitted to another process sharing the store
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT record FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        record = json.loads(row[0])
+        heartbeat = record.get("heartbeat_at") or record["created_at"]
+        if (
+            record["status"] in ("queued", "running")
+            and heartbeat < time.time() - self.stale_after
+        ):
+            record.update(
+                status="failed",
+                error="The worker running this job exited; please upload again",
+                finished_at=time.time(),
+            )
+            self._store(record)
+        return record
+
+    def shutdown(self):
+        """Stop taking jobs and mark this process's unfinished ones failed.
+
+        Called as the process exits (gunicorn worker_exit); the worker threads
+        are daemons, so jobs still running are abandoned rather than waited for
+        and queued ones are dropped. Returns the number of jobs marked failed.
+        """
+        self._closed = True
+        with self._lock:
+            unfinished = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job["status"] in ("queued", "running")
+            ]
+        for job_id in unfinished:
+            self._update(
+                job_id,
+                status="failed",
+                error="The server restarted before this job finished; "
+                "please upload again",
+                finished_at=time.time(),
+            )
+        return len(unfinished)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "max_workers": self.max_workers,
+            "max_depth": self.max_depth,
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+        }
+
+    def _start_threads(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        for i in range(self.max_workers):
+            threading.Thread(target=self._work, name=f"job_{i}", daemon=True).start()
+        threading.Thread(target=self._beat, name="job-heartbeat", daemon=True).start()
+
+    def _work(self):
+        while True:
+            context, job_id, fn, args, kwargs = self._queue.get()
+            if self._closed:
+                continue
+            context.run(self._run, job_id, fn, args, kwargs)
+
+    def _beat(self):
+        """Renew the heartbeat of this process's unfinished jobs"""
+        while not self._closed:
+            time.sleep(self.heartbeat_interval)
+            with self._lock:
+                live = [
+                    job_id
+                    for job_id, job in self._jobs.items()
+                    if job["status"] in ("queued", "running")
+                ]
+            for job_id in live:
+                self._update(job_id, heartbeat_at=time.time())
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            result = fn(*args, **kwargs)
+            self._update(job_id, status="done", result=result, finished_at=time.time())
+        except Exception as e:
+            log.error("Job %s failed: %s", job_id, e)
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            self._slots.release()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            # A job abandoned by shutdown() stays failed
+            if self._closed and job["status"] == "failed" and "status" in fields:
+                return
+            job.update(fields)
+            record = dict(job)
+        try:
+            self._store(record)
+        except Exception as e:
+            log.error("Failed to store job %s: %s", job_id, e)
+
+    def _store(self, record, prune=False):
+        if not self.db_path:
+            return
+        with self._connect() as conn:
+            if prune:
+                conn.execute(
+                    "DELETE FROM jobs WHERE finished_at < ?",
+                    (time.time() - self.result_ttl,),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, record, finished_at) VALUES (?, ?, ?)",
+                (record["id"], json.dumps(record), record["finished_at"]),
+            )
+
+    def _prune(self):
+        """Drop finished jobs older than result_ttl (caller holds the lock)"""
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
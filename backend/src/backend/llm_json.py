@@ -0,0 +1,141 @@
+import json
+import re
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+def strip_json_fence(text):
+    """Remove the ```json fence models sometimes wrap around their answer"""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+class StreamingObjectParser:
+    """Parses a top-level JSON object as its text streams in.
+
+    feed() returns (key, value) pairs for every top-level member completed so
+    far. Members named in stream_arrays are emitted item by item instead, as
+    (key, item), so long arrays can be shown before they are finished.
+    """
+
+    def __init__(self, stream_arrays=()):
+        self.stream_arrays = set(stream_arrays)
+        self.buffer = ""
+        self.done = False
+        self._pos = None
+        self._key = None
+        self._in_array = False
+
+    def feed(self, text):
+        self.buffer += text
+        events = []
+        while not self.done:
+            progressed, event = self._step()
+            if event is not None:
+                events.append(event)
+            if not progressed:
+                break
+        return events
+
+    def _skip(self, chars):
+        while self._pos < len(self.buffer) and self.buffer[self._pos] in chars:
+            self._pos += 1
+        return self._pos < len(self.buffer)
+
+    def _decode(self):
+        """Decode the value at the cursor, or return None if it is incomplete"""
+        try:
+            value, end = _decoder.raw_decode(self.buffer, self._pos)
+        except ValueError:
+            return None
+        # A number at the very end of the buffer may still be growing
+        if end == len(self.buffer) and not isinstance(value, (str, list, dict)):
+            return None
+        self._pos = end
+        return (value,)
+
+    def _step(self):
+        if self._pos is None:
+            start = self.buffer.find("{")
+            if start < 0:
+                return False, None
+            self._pos = start + 1
+            return True, None
+
+        if self._in_array:
+            if not self._skip(_WHITESPACE + ","):
+                return False, None
+            if self.buffer[self._pos] == "]":
+                self._pos += 1
+                self._in_array = False
+                self._key = None
+                return True, None
+            decoded = self._decode()
+            if decoded is None:
+                return False, None
+            return True, (self._key, decoded[0])
+
+        if self._key is None:
+            if not self._skip(_WHITESPACE + ","):
+                return False, None
+            if self.buffer[self._pos] == "}":
+                self.done = True
+                return False, None
+            start = self._pos
+            decoded = self._decode()
+            if decoded is None or not self._skip(_WHITESPACE):
+                self._pos = start
+                return False, None
+            if self.buffer[self._pos] != ":":
+                # Not the JSON we asked for; stop and let the caller fall back
+                self.done = True
+                return False, None
+            self._pos += 1
+            self._key = decoded[0]
+            return True, None
+
+        if not self._skip(_WHITESPACE):
+            return False, None
+        if self._key in self.stream_arrays and self.buffer[self._pos] == "[":
+            self._pos += 1
+            self._in_array = True
+            return True, None
+        decoded = self._decode()
+        if decoded is None:
+            return False, None
+        key, self._key = self._key, None
+        return True, (key, decoded[0])
+
+
+def salvage_object(text, keys=()):
+    """Top-level members of a JSON object, as far as they can be read.
+
+    Well-formed text is parsed as usual. Otherwise members are read in order
+    until one is cut off or malformed, and each of `keys` still missing is
+    looked for further on, so one broken member doesn't cost the others.
+    Returns a dict of the members recovered (empty if none were).
+    """
+    text = strip_json_fence(text)
+    try:
+        value = json.loads(text)
+    except ValueError:
+        value = None
+    if isinstance(value, dict):
+        return value
+
+    members = dict(StreamingObjectParser().feed(text))
+    for key in keys:
+        if key in members:
+            continue
+        for match in re.finditer(rf'"{re.escape(key)}"\s*:\s*', text):
+            try:
+                members[key], _ = _decoder.raw_decode(text, match.end())
+                break
+            except ValueError:
+                continue
+    return members
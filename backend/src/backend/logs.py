@@ -0,0 +1,80 @@
+import json
+import logging
+import time
+
+from tracing import current_span
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class TraceContextFilter(logging.Filter):
+    """Stamps each record with the request id and span of the code that logged it"""
+
+    def filter(self, record):
+        span = current_span()
+        record.request_id = span.request_id if span else "-"
+        record.trace_id = span.trace_id if span else "-"
+        record.span_id = span.span_id if span else "-"
+        return True
+
+
+def _fields(record):
+    return {
+        key: value
+        for key, value in vars(record).items()
+        if key not in _RESERVED and key not in ("request_id", "trace_id", "span_id")
+    }
+
+
+class TextFormatter(logging.Formatter):
+    """`time LEVEL logger [request id] message key=value ...`"""
+
+    def __init__(self):
+        super().__init__(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        )
+
+    def format(self, record):
+        text = super().format(record)
+        fields = _fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": record.request_id,
+            "trace_id": record.trace_id,
+            "span_id": record.span_id,
+            **_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure(level="INFO", fmt="text"):
+    """Send all loggers to stderr at `level`, as text or JSON lines.
+
+    Messages use %-style arguments, so records below the level are dropped
+    before any formatting happens.
+    """
+    handler = logging.StreamHandler()
+    handler.addFilter(TraceContextFilter())
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    # Third-party request logging would repeat every outbound call
+    for noisy in ("httpx", "httpx2", "httpcore", "urllib3"):
+        logging.getLogger(noisy).setLevel(max(root.level, logging.WARNING))
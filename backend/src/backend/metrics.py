@@ -0,0 +1,343 @@
+import functools
+import glob
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; covers a cache hit up to a chunked hour-long upload
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    25,
+    60,
+    120,
+    300,
+)
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+log = logging.getLogger(__name__)
+
+
+class Metric:
+    kind = "untyped"
+    # How samples from several processes combine: "sum", or "max" for values
+    # every process reads from the same shared state
+    merge = "sum"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(
+                f"{self.name} takes labels {self.labels}, got {tuple(labels)}"
+            )
+        return tuple(labels[name] for name in self.labels)
+
+    def samples(self):
+        """(suffix, label names, label values, value) for the text format"""
+        with self._lock:
+            return [
+                ("", self.labels, key, value) for key, value in self._values.items()
+            ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in progress"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the enclosed block takes, even if it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        """Decorator form of time(); works on plain and async functions"""
+
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.time(**labels):
+                        return await fn(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def samples(self):
+        with self._lock:
+            values = [
+                (key, list(counts), total)
+                for key, (counts, total) in self._values.items()
+            ]
+        samples = []
+        for key, counts, total in values:
+            for bound, count in zip(self.buckets, counts):
+                samples.append(
+                    ("_bucket", self.labels + ("le",), key + (_number(bound),), count)
+                )
+            samples.append(("_sum", self.labels, key, total))
+            samples.append(("_count", self.labels, key, counts[-1]))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """Counter or gauge read from fn() at scrape time: a number or {labels tuple: value}"""
+
+    def __init__(self, name, help, fn, kind="gauge", labels=(), merge="sum"):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.merge = merge
+        self.fn = fn
+
+    def samples(self):
+        value = self.fn()
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [("", self.labels, key, v) for key, v in value.items()]
+
+
+class Registry:
+    """Metrics of one process, optionally merged with its siblings' at scrape time.
+
+    After share(directory), every process writes its samples to
+    <directory>/<pid>.json every interval seconds (from start()) and on each
+    render(), and render() merges the files updated within stale_after, so
+    one scrape covers all gunicorn workers; other processes' samples are up to
+    interval old. Files of processes that exited go stale and are removed.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.directory = None
+        self.interval = 1.0
+        self.stale_after = 30.0
+        self._pid = None
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name, help, fn, kind="gauge", labels=(), merge="sum"):
+        return self._register(CallbackMetric(name, help, fn, kind, labels, merge))
+
+    def share(self, directory, interval=1.0, stale_after=30.0):
+        """Merge the metrics of every process that shares directory"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.interval = interval
+        # Long enough that a busy process never drops out and resets counters
+        self.stale_after = stale_after
+
+    def start(self):
+        """Publish this process's samples in the background (once per process)"""
+        with self._lock:
+            if self.directory is None or self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._publish_loop, name="metrics", daemon=True).start()
+
+    def _publish_loop(self):
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                log.warning("Failed to publish metrics: %s", e)
+            time.sleep(self.interval)
+
+    def publish(self):
+        """Write this process's samples to its file in the shared directory"""
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"updated_at": time.time(), "metrics": self._collect()}, f)
+        os.replace(tmp_path, path)
+
+    def _collect(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        entries = []
+        for metric in metrics:
+            entry = {
+                "name": metric.name,
+                "help": metric.help,
+                "kind": metric.kind,
+                "merge": metric.merge,
+            }
+            try:
+                entry["samples"] = [list(sample) for sample in metric.samples()]
+            except Exception as e:
+                entry["error"] = str(e)
+            entries.append(entry)
+        return entries
+
+    def _collect_shared(self):
+        self.publish()
+        cutoff = time.time() - self.stale_after
+        merged = {}
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    published = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if published["updated_at"] < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            for entry in published["metrics"]:
+                _merge_entry(merged, entry)
+        return [
+            dict(entry, samples=[[*key, value] for key, value in samples.items()])
+            for entry, samples in merged.values()
+        ]
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)"""
+        entries = self._collect_shared() if self.directory else self._collect()
+        lines = []
+        for entry in entries:
+            name = entry["name"]
+            if "error" in entry:
+                lines.append(f"# {name} unavailable: {entry['error']}")
+                continue
+            lines.append(f"# HELP {name} {entry['help']}")
+            lines.append(f"# TYPE {name} {entry['kind']}")
+            for suffix, names, values, value in entry["samples"]:
+                lines.append(
+                    f"{name}{suffix}{_label_text(names, values)} {_number(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _merge_entry(merged, entry):
+    """Fold one process's entry into merged: name -> (entry, {sample key: value})"""
+    name = entry["name"]
+    if "error" in entry:
+        merged.setdefault(name, (entry, {}))
+        return
+    current, samples = merged.get(name, (None, {}))
+    if current is None or "error" in current:
+        merged[name] = (entry, samples)
+    combine = max if entry["merge"] == "max" else (lambda a, b: a + b)
+    for suffix, names, values, value in entry["samples"]:
+        key = (suffix, tuple(names), tuple(values))
+        samples[key] = combine(samples[key], value) if key in samples else value
+
+
+# Process-wide registry served by /metrics
+registry = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
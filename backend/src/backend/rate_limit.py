@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    acquire() blocks (and acquire_async() awaits) until a token is available, so
+    callers sharing one bucket are held to the rate in aggregate however many
+    threads or tasks they run on.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.waited = 0.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _take(self, tokens):
+        """Take tokens if available; otherwise return how long to wait"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            wait = (tokens - self._tokens) / self.rate
+            self.waited += wait
+            return wait
+
+    def acquire(self, tokens=1):
+        wait = self._take(tokens)
+        while wait:
+            time.sleep(wait)
+            wait = self._take(tokens)
+
+    async def acquire_async(self, tokens=1):
+        wait = self._take(tokens)
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take(tokens)
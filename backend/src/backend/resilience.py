@@ -0,0 +1,264 @@
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+
+from metrics import registry
+from tracing import tracer
+
+log = logging.getLogger(__name__)
+
+UPSTREAM_CALLS = registry.counter(
+    "upstream_calls_total",
+    "Outbound API calls by service and outcome (ok, error, rejected)",
+    ["service", "outcome"],
+)
+UPSTREAM_RETRIES = registry.counter(
+    "upstream_retries_total", "Outbound API attempts that were retried", ["service"]
+)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a service whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calls to a service after failure_threshold consecutive failures.
+
+    The breaker stays open for reset_timeout seconds, then goes half-open and
+    lets a single trial call through: success closes it, failure re-opens it.
+    A trial that never reports back (e.g. a cancelled task) is replaced by a
+    new one after another reset_timeout.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "open":
+                if now - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpen(f"{self.name} circuit is open")
+                self.state = "half_open"
+                self._trial_started = None
+            if self.state == "half_open":
+                if (
+                    self._trial_started is not None
+                    and now - self._trial_started < self.reset_timeout
+                ):
+                    self.rejected += 1
+                    raise CircuitOpen(f"{self.name} circuit is half-open")
+                self._trial_started = now
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_started = None
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def open_for(self):
+        """Seconds until calls are allowed again; 0 unless the breaker is open"""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def stats(self):
+        retry_in = self.open_for()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.opened,
+                "rejected": self.rejected,
+                "retry_in": round(retry_in, 1),
+            }
+
+
+class Resilience:
+    """Per-call deadline, jittered retry and a circuit breaker for one service.
+
+    Only transient errors are retried and count against the breaker:
+    timeouts, connection errors (plus any types in `transient`), HTTP 429
+    and 5xx. Other errors, such as a 404, mean the service answered and are
+    raised straight away. Retries stop once `deadline` seconds have passed
+    since the first attempt. `transient` may also be a function returning
+    the types, so an SDK's exceptions are only imported once a call fails.
+
+    call_async() bounds each attempt with asyncio.wait_for(timeout); sync
+    callers get their per-attempt timeout from the SDK client itself.
+    """
+
+    def __init__(
+        self,
+        name,
+        attempts=3,
+        timeout=30.0,
+        deadline=90.0,
+        base_delay=0.5,
+        max_delay=8.0,
+        failure_threshold=5,
+        reset_timeout=30.0,
+        transient=(),
+    ):
+        self.name = name
+        self.attempts = attempts
+        self.timeout = timeout
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._transient = transient
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    @functools.cached_property
+    def transient(self):
+        extra = self._transient() if callable(self._transient) else self._transient
+        return (TimeoutError, asyncio.TimeoutError, ConnectionError) + tuple(extra)
+
+    def is_transient(self, exc):
+        status = getattr(exc, "status_code", None)
+        if status is None:
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status == 429 or status >= 500
+        return isinstance(exc, self.transient)
+
+    def _retry_delay(self, attempt, started, exc):
+        """Seconds to wait before the next attempt, or None to give up"""
+        if not self.is_transient(exc):
+            self.breaker.record_success()
+            return None
+        self.breaker.record_failure()
+        if attempt >= self.attempts:
+            return None
+        # Full jitter keeps many callers from retrying in lockstep
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if time.monotonic() - started + delay > self.deadline:
+            return None
+        with self._lock:
+            self.retries += 1
+        UPSTREAM_RETRIES.inc(service=self.name)
+        return delay
+
+    def _count(self, outcome="ok"):
+        with self._lock:
+            self.calls += 1
+            if outcome != "ok":
+                self.failures += 1
+        UPSTREAM_CALLS.inc(service=self.name, outcome=outcome)
+
+    def call(self, fn, *args, **kwargs):
+        with tracer.span(
+            f"{self.name}.call", kind="client", operation=_operation(fn)
+        ) as span:
+            return self._call(span, fn, args, kwargs)
+
+    def _call(self, span, fn, args, kwargs):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            span.set(attempts=attempt)
+            try:
+                self.breaker.before_call()
+            except CircuitOpen:
+                self._count("rejected")
+                raise
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(attempt, started, e)
+                if delay is None:
+                    self._count("error")
+                    raise
+                log.warning(
+                    "%s call failed (attempt %d), retrying in %.2fs: %s",
+                    self.name,
+                    attempt,
+                    delay,
+                    e,
+                )
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self._count()
+            return result
+
+    async def call_async(self, fn, *args, **kwargs):
+        with tracer.span(
+            f"{self.name}.call", kind="client", operation=_operation(fn)
+        ) as span:
+            return await self._call_async(span, fn, args, kwargs)
+
+    async def _call_async(self, span, fn, args, kwargs):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            span.set(attempts=attempt)
+            try:
+                self.breaker.before_call()
+            except CircuitOpen:
+                self._count("rejected")
+                raise
+            try:
+                result = await asyncio.wait_for(fn(*args, **kwargs), self.timeout)
+            except Exception as e:
+                delay = self._retry_delay(attempt, started, e)
+                if delay is None:
+                    self._count("error")
+                    raise
+                log.warning(
+                    "%s call failed (attempt %d), retrying in %.2fs: %s",
+                    self.name,
+                    attempt,
+                    delay,
+                    e,
+                )
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self._count()
+            return result
+
+    def stats(self):
+        with self._lock:
+            counts = {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+        return {**counts, "breaker": self.breaker.stats()}
+
+
+def _operation(fn):
+    """Readable name for a call: "Completions.create", "request_transcription" """
+    name = getattr(fn, "__qualname__", None) or type(fn).__name__
+    return name.split(".<locals>")[0]
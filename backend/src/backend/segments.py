@@ -0,0 +1,55 @@
+import os
+import types
+
+# Whisper segments closer together than this are sent to the LLM as one line
+MERGE_GAP_SECONDS = float(os.getenv("SEGMENT_MERGE_GAP", "0.5"))
+# ...up to this long, so a speaker change is never far from a timestamp
+MERGE_MAX_SECONDS = float(os.getenv("SEGMENT_MERGE_MAX_SECONDS", "30"))
+
+
+def merge_segments(segments, max_gap=MERGE_GAP_SECONDS, max_seconds=MERGE_MAX_SECONDS):
+    """Join consecutive segments separated by less than max_gap seconds.
+
+    Returns new segments with .start, .end and .text (whitespace collapsed);
+    empty segments are dropped. The input is not modified.
+    """
+    merged = []
+    for segment in segments:
+        text = " ".join(segment.text.split())
+        if not text:
+            continue
+        last = merged[-1] if merged else None
+        if (
+            last is not None
+            and segment.start - last.end < max_gap
+            and segment.end - last.start <= max_seconds
+        ):
+            last.end = max(last.end, segment.end)
+            last.text = f"{last.text} {text}"
+        else:
+            merged.append(
+                types.SimpleNamespace(start=segment.start, end=segment.end, text=text)
+            )
+    return merged
+
+
+def transcription_segments(transcription):
+    """Whisper's segments, or the whole text as one segment when there are none"""
+    return getattr(transcription, "segments", None) or [
+        types.SimpleNamespace(start=0.0, end=0.0, text=transcription.text)
+    ]
+
+
+def format_lines(segments):
+    """One "[start] text" prompt line per segment"""
+    return "\n".join(f"[{segment.start:.1f}] {segment.text}" for segment in segments)
+
+
+def format_segments(transcription):
+    """Prompt lines for a transcription, one per merged run of segments"""
+    return format_lines(merge_segments(transcription_segments(transcription)))
+
+
+def estimate_tokens(text):
+    """Rough token count for English text (about four characters per token)"""
+    return (len(text) + 3) // 4
@@ -0,0 +1,357 @@
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span():
+    """The span active in this thread or task, if any"""
+    return _current.get()
+
+
+class Span:
+    """One timed operation; children share the trace_id and request_id of their root"""
+
+    def __init__(
+        self, name, trace_id, parent_id=None, request_id=None, kind="internal"
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.request_id = request_id or trace_id
+        self.kind = kind
+        self.attributes = {}
+        self.start_time = time.time()
+        self.duration = None
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def context(self):
+        """Enough of the span to continue its trace elsewhere (e.g. a queued job)"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "request_id": self.request_id,
+        }
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "request_id": self.request_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """Nested timing spans carried in a context variable.
+
+    The current span follows the code through `with tracer.span(...)` blocks
+    and into asyncio tasks; threads pick it up from contextvars.copy_context()
+    and coroutines sent to another loop from bind(). Finished spans go to every
+    exporter; with none configured they are only used to label logs.
+    """
+
+    def __init__(self, exporters=()):
+        self.exporters = list(exporters)
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def start(self, name, parent=None, request_id=None, kind="internal", **attributes):
+        """Begin a span without making it current.
+
+        parent defaults to the current span and may also be a Span.context()
+        dict; without one the span starts a new trace.
+        """
+        if parent is None:
+            parent = _current.get()
+        if isinstance(parent, Span):
+            parent = parent.context()
+        if parent:
+            span = Span(
+                name,
+                parent["trace_id"],
+                parent.get("span_id"),
+                request_id or parent.get("request_id"),
+                kind,
+            )
+        else:
+            span = Span(name, uuid.uuid4().hex, request_id=request_id, kind=kind)
+        span.attributes.update(attributes)
+        return span
+
+    def end(self, span, error=None):
+        span.duration = time.perf_counter() - span._started
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception:
+                pass
+
+    def attach(self, span):
+        """Make span current; returns a token for detach()"""
+        return _current.set(span)
+
+    def detach(self, token):
+        _current.reset(token)
+
+    @contextmanager
+    def activate(self, span):
+        """Make an existing span current for the enclosed block"""
+        token = _current.set(span)
+        try:
+            yield span
+        finally:
+            _current.reset(token)
+
+    @contextmanager
+    def span(self, name, parent=None, request_id=None, kind="internal", **attributes):
+        """Time the enclosed block as a child of the current span"""
+        span = self.start(name, parent, request_id, kind, **attributes)
+        token = _current.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            self.end(span, error)
+
+    def traced(self, name=None, **attributes):
+        """Decorator form of span(); works on plain and async functions"""
+
+        def decorator(fn):
+            span_name = name or fn.__qualname__
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name, **attributes):
+                        return await fn(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, **attributes):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def bind(self, coro):
+        """Wrap a coroutine so it runs under the caller's current span on any loop"""
+        span = _current.get()
+
+        async def run():
+            # Tasks get their own copy of the context, so this stays local
+            _current.set(span)
+            return await coro
+
+        return run()
+
+
+def trace_headers():
+    """Headers that carry the current request id and W3C trace context"""
+    span = _current.get()
+    if span is None:
+        return {}
+    return {
+        "X-Request-ID": span.request_id,
+        "traceparent": f"00-{span.trace_id}-{span.span_id}-01",
+    }
+
+
+def inject_headers(request):
+    """httpx request hook that tags outbound calls with the current trace"""
+    request.headers.update(trace_headers())
+
+
+async def inject_headers_async(request):
+    request.headers.update(trace_headers())
+
+
+class JsonlExporter:
+    """Appends one JSON object per finished span to a local file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+class OtlpExporter:
+    """Sends spans to an OTLP/HTTP collector as JSON from a background thread.
+
+    Spans are batched every `interval` seconds (or `batch_size` spans); when
+    the collector falls behind, spans beyond `max_queue` are dropped rather
+    than slowing requests down. The sender thread starts with the first span
+    in each process, so an exporter created before a fork (gunicorn's
+    preload_app) still sends from the workers.
+    """
+
+    KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(
+        self,
+        endpoint,
+        service_name="htn-backend",
+        headers=None,
+        batch_size=256,
+        interval=2.0,
+        max_queue=10000,
+        timeout=5.0,
+    ):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pid = None
+        atexit.register(self.flush)
+
+    def export(self, span):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Send everything queued so far"""
+        while True:
+            spans = []
+            while len(spans) < self.batch_size:
+                try:
+                    spans.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not spans:
+                return
+            self._send(spans)
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(
+                target=self._run, name="otlp-exporter", daemon=True
+            ).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def _send(self, spans):
+        import requests
+
+        # One sender at a time so flush() at exit can't interleave with _run()
+        with self._lock:
+            try:
+                requests.post(
+                    self.url,
+                    data=json.dumps(self.payload(spans), default=str),
+                    headers=self.headers,
+                    timeout=self.timeout,
+                )
+            except requests.RequestException:
+                self.dropped += len(spans)
+
+    def payload(self, spans):
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(
+                            {"service.name": self.service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "htn-backend"},
+                            "spans": [self._otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def _otlp_span(self, span):
+        start = int(span.start_time * 1e9)
+        otlp = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": self.KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(start + int(span.duration * 1e9)),
+            "attributes": _otlp_attributes(
+                {"request.id": span.request_id, **span.attributes}
+            ),
+            "status": (
+                {"code": 2, "message": span.error} if span.error else {"code": 1}
+            ),
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+
+def _otlp_attributes(attributes):
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
+
+
+# Process-wide tracer; app.py adds exporters from the environment
+tracer = Tracer()
@@ -0,0 +1,297 @@
+import contextvars
+import io
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# ffmpeg is only needed to chunk or re-encode large uploads
+FFMPEG = shutil.which("ffmpeg")
+
+# Uploads smaller than this go to Whisper in a single request
+CHUNK_MIN_BYTES = int(os.getenv("TRANSCRIBE_CHUNK_MIN_BYTES", str(10 * 1024 * 1024)))
+# Whisper rejects larger files, so these are re-encoded even when short
+WHISPER_MAX_BYTES = 25 * 1024 * 1024
+# Target chunk length; cuts snap to the nearest silence within SNAP_WINDOW
+CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "300"))
+SNAP_WINDOW_SECONDS = 30.0
+SILENCE_THRESHOLD_DB = -40
+SILENCE_MIN_SECONDS = 0.4
+# Audio shared by neighbouring chunks so words at a cut are heard by both
+OVERLAP_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_OVERLAP", "1.5"))
+MAX_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))
+
+SAMPLE_RATE = 16000
+
+
+def transcribe(
+    client, audio, filename, model="whisper-1", on_segments=None, resilience=None
+):
+    """Transcribe an upload, splitting long recordings into parallel chunks.
+
+    Returns an object shaped like Whisper's verbose_json response: .text and
+    .segments, where each segment has .start, .end and .text in seconds
+    relative to the whole recording. on_segments, if given, is called with
+    each batch of segments in order as soon as it is available. Each Whisper
+    request goes through resilience.call, if given.
+
+    Large uploads are copied to a temporary file and cut with ffmpeg, so the
+    decoded recording is never held in memory.
+    """
+    size = _size(audio)
+    if size >= CHUNK_MIN_BYTES and FFMPEG is not None:
+        with tempfile.TemporaryDirectory(prefix="transcribe-") as workdir:
+            path = os.path.join(workdir, "upload")
+            audio.seek(0)
+            with open(path, "wb") as f:
+                shutil.copyfileobj(audio, f, 1024 * 1024)
+            audio.seek(0)
+            try:
+                duration, silences = probe(path)
+            except Exception as e:
+                log.warning(
+                    "Could not decode %s for chunking, sending whole file: %s",
+                    filename,
+                    e,
+                )
+                duration = None
+
+            if duration is not None and (
+                duration > CHUNK_SECONDS * 1000 or size > WHISPER_MAX_BYTES
+            ):
+                return transcribe_chunked(
+                    client, path, duration, silences, model, on_segments, resilience
+                )
+    elif size > WHISPER_MAX_BYTES:
+        log.warning(
+            "ffmpeg not found; sending %s whole although it is over Whisper's limit",
+            filename,
+        )
+
+    transcription = request_transcription(client, model, filename, audio, resilience)
+    if on_segments is not None:
+        on_segments(
+            getattr(transcription, "segments", None)
+            or [types.SimpleNamespace(start=0.0, end=0.0, text=transcription.text)]
+        )
+    return transcription
+
+
+def transcribe_chunked(
+    client,
+    path,
+    duration,
+    silences=(),
+    model="whisper-1",
+    on_segments=None,
+    resilience=None,
+):
+    """Transcribe the recording at path in chunks cut next to it by ffmpeg.
+
+    A recording too short to split is still sent as one re-encoded chunk,
+    which is how an oversized upload gets under Whisper's limit.
+    """
+    cuts = find_cut_points(duration, silences)
+    windows = []
+    for i in range(len(cuts) - 1):
+        # Each chunk owns [cuts[i], cuts[i+1]) but is sent with some overlap
+        start = max(0, cuts[i] - OVERLAP_SECONDS * 1000)
+        end = min(duration, cuts[i + 1] + OVERLAP_SECONDS * 1000)
+        windows.append((start, end, cuts[i], cuts[i + 1]))
+
+    log.info("Transcribing %.0fs of audio in %d chunks", duration / 1000, len(windows))
+
+    def run(index, window):
+        start, end, _, _ = window
+        chunk_path = os.path.join(os.path.dirname(path), f"chunk_{index}.wav")
+        cut_chunk(path, start, end, chunk_path)
+        try:
+            with open(chunk_path, "rb") as chunk:
+                return request_transcription(
+                    client, model, "chunk.wav", chunk, resilience
+                )
+        finally:
+            os.remove(chunk_path)
+
+    segments = []
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, run, i, window)
+            for i, window in enumerate(windows)
+        ]
+        # Collect in order so segments can be reported as each chunk lands
+        for future, window in zip(futures, windows):
+            chunk_segments = owned_segments(future.result(), window, len(segments))
+            segments.extend(chunk_segments)
+            if on_segments is not None:
+                on_segments(chunk_segments)
+
+    return merged_result(segments, windows)
+
+
+def probe(path):
+    """Duration and silences of a recording, both in milliseconds.
+
+    One streaming ffmpeg pass; silences are (start, end) pairs.
+    """
+    result = subprocess.run(
+        [
+            FFMPEG,
+            "-hide_banner",
+            "-nostats",
+            "-i",
+            path,
+            "-vn",
+            "-af",
+            f"silencedetect=noise={SILENCE_THRESHOLD_DB}dB:d={SILENCE_MIN_SECONDS}",
+            "-f",
+            "null",
+            "-progress",
+            "pipe:1",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = re.findall(r"^out_time_us=(\d+)$", result.stdout, re.MULTILINE)
+    if not times:
+        raise ValueError("ffmpeg reported no duration")
+    duration = int(times[-1]) / 1000
+
+    starts = re.findall(r"silence_start: (-?[\d.]+)", result.stderr)
+    ends = re.findall(r"silence_end: ([\d.]+)", result.stderr)
+    # A recording that ends in silence has no silence_end for it
+    ends += [duration / 1000] * (len(starts) - len(ends))
+    silences = [
+        (max(0.0, float(start)) * 1000, float(end) * 1000)
+        for start, end in zip(starts, ends)
+    ]
+    return duration, silences
+
+
+def cut_chunk(path, start, end, chunk_path):
+    """Write [start, end) ms of the recording as a 16 kHz mono WAV"""
+    subprocess.run(
+        [
+            FFMPEG,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-ss",
+            f"{start / 1000:.3f}",
+            "-t",
+            f"{(end - start) / 1000:.3f}",
+            "-i",
+            path,
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-y",
+            chunk_path,
+        ],
+        capture_output=True,
+        check=True,
+    )
+
+
+def request_transcription(client, model, filename, audio, resilience=None):
+    def create():
+        # A retried attempt must upload the file from the start again
+        audio.seek(0)
+        return client.audio.transcriptions.create(
+            model=model,
+            file=(filename, audio),
+            response_format="verbose_json",
+        )
+
+    return resilience.call(create) if resilience is not None else create()
+
+
+def find_cut_points(duration, silences=()):
+    """Millisecond offsets to split at, including 0 and the end of the recording.
+
+    silences are (start, end) millisecond pairs, as returned by probe().
+    """
+    target = max(1000, int(CHUNK_SECONDS * 1000))
+    # At most half a chunk, so every cut lands at least half a chunk past the last
+    snap = min(SNAP_WINDOW_SECONDS * 1000, target // 2)
+    midpoints = [(start + end) / 2 for start, end in silences]
+
+    cuts = [0]
+    while duration - cuts[-1] > target * 1.5:
+        wanted = cuts[-1] + target
+        nearby = [m for m in midpoints if abs(m - wanted) <= snap]
+        cuts.append(min(nearby, key=lambda m: abs(m - wanted)) if nearby else wanted)
+    cuts.append(duration)
+    return cuts
+
+
+def owned_segments(result, window, first_id=0):
+    """A chunk's segments on the recording's timeline, minus overlap copies"""
+    start, _, own_start, own_end = window
+    offset = start / 1000
+    chunk_segments = getattr(result, "segments", None) or [
+        types.SimpleNamespace(start=0.0, end=(own_end - start) / 1000, text=result.text)
+    ]
+
+    segments = []
+    for segment in chunk_segments:
+        seg_start = segment.start + offset
+        seg_end = segment.end + offset
+        # Drop the copy of a segment that belongs to the neighbouring chunk
+        midpoint = (seg_start + seg_end) / 2 * 1000
+        if not own_start <= midpoint < own_end:
+            continue
+        segments.append(
+            types.SimpleNamespace(
+                id=first_id + len(segments),
+                start=seg_start,
+                end=seg_end,
+                text=segment.text,
+            )
+        )
+    return segments
+
+
+def merged_result(segments, windows):
+    return types.SimpleNamespace(
+        text=" ".join(segment.text.strip() for segment in segments),
+        segments=segments,
+        duration=windows[-1][3] / 1000 if windows else 0.0,
+    )
+
+
+def _size(audio):
+    position = audio.tell()
+    audio.seek(0, io.SEEK_END)
+    size = audio.tell()
+    audio.seek(position)
+    return size
+
+
+def dump_transcription(transcription):
+    """A transcription as plain JSON-able data (text and timed segments)"""
+    return {
+        "text": transcription.text,
+        "segments": [
+            {"start": segment.start, "end": segment.end, "text": segment.text}
+            for segment in getattr(transcription, "segments", None) or []
+        ],
+    }
+
+
+def load_transcription(data):
+    """The inverse of dump_transcription()"""
+    return types.SimpleNamespace(
+        text=data["text"],
+        segments=[types.SimpleNamespace(**segment) for segment in data["segments"]],
+    )
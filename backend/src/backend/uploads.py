@@ -0,0 +1,46 @@
+import io
+import resource
+import sys
+import tempfile
+
+from flask import Request
+
+
+def make_request_class(spool_max_bytes):
+    """Flask request class that parses file uploads straight into a spooled buffer.
+
+    Uploads stay in memory up to spool_max_bytes and spill to an anonymous
+    temporary file beyond that, which the OS removes as soon as it is closed.
+    """
+
+    class SpooledRequest(Request):
+        def _get_file_stream(
+            self, total_content_length, content_type, filename=None, content_length=None
+        ):
+            return tempfile.SpooledTemporaryFile(max_size=spool_max_bytes, mode="w+b")
+
+    return SpooledRequest
+
+
+def detach_upload(file_storage):
+    """Take ownership of an uploaded file's buffer.
+
+    Flask closes request files when the request ends; background jobs need the
+    buffer to outlive the request, so we swap in an empty stream and hand the
+    real one to the caller, who must close it.
+    """
+    buffer = file_storage.stream
+    file_storage.stream = io.BytesIO()
+    buffer.seek(0)
+    return buffer
+
+
+def spilled_to_disk(buffer):
+    return getattr(buffer, "_rolled", False)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
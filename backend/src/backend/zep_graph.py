@@ -0,0 +1,342 @@
+import asyncio
+import json
+import logging
+import threading
+
+from entity_cache import normalize_name
+from extractor import default_extractor
+from graph_batch import GraphBatch
+from metrics import registry
+from resilience import CircuitOpen, Resilience
+from tracing import inject_headers_async, tracer
+
+log = logging.getLogger(__name__)
+
+GRAPH_SECONDS = registry.histogram(
+    "graph_helper_seconds", "Time spent in each Zep graph helper", ["helper"]
+)
+
+
+def transport_errors():
+    """Resilience `transient` for httpx, imported only once a call has failed"""
+    import httpx
+
+    return (httpx.TransportError,)
+
+
+def graph_helper(name):
+    """Trace a helper as a span and record its latency in GRAPH_SECONDS"""
+
+    def decorator(fn):
+        return GRAPH_SECONDS.timed(helper=name)(tracer.traced(f"zep.{name}")(fn))
+
+    return decorator
+
+
+class ZepGraph:
+    """Async access to one Zep graph over a shared keep-alive connection pool.
+
+    Owns an AsyncZep client and an event loop on a background thread, so sync
+    callers (Flask handlers, the graph writer, ingest workers) submit coroutines
+    with run() and all of them reuse the same httpx pool. At most
+    max_concurrency Zep requests are in flight at once; every request also
+    takes a token from rate_limiter, if given, and goes through `resilience`
+    (per-attempt timeout, jittered retry and a circuit breaker). Lookup
+    failures propagate so a conversation is retried whole instead of being
+    written with entities missing.
+
+    Graph readiness is checked once and memoized. Because every coroutine runs
+    on the one loop, concurrent callers on a cold start share a single
+    in-flight check/create, which polls with exponential backoff until the
+    new graph is visible.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        graph_id,
+        base_url=None,
+        entity_cache=None,
+        extractor=default_extractor,
+        rate_limiter=None,
+        max_concurrency=16,
+        timeout=30.0,
+        ready_timeout=30.0,
+        resilience=None,
+        user_description="User identified from conversation: {name}",
+        friendship_description="Friends based on conversation",
+    ):
+        self.graph_id = graph_id
+        self.entity_cache = entity_cache
+        self.extractor = extractor
+        self.rate_limiter = rate_limiter
+        self.user_description = user_description
+        self.friendship_description = friendship_description
+        self.ready_timeout = ready_timeout
+        self._ready = False
+        self._readiness = None
+        self.resilience = resilience or Resilience(
+            "zep", timeout=timeout, transient=transport_errors
+        )
+        # The SDK costs ~0.5s to import, so it is loaded with the first graph
+        # rather than with this module (gunicorn's master preloads it)
+        import httpx
+        from zep_cloud.client import AsyncZep
+
+        self.client = AsyncZep(
+            api_key=api_key,
+            base_url=base_url,
+            httpx_client=httpx.AsyncClient(
+                timeout=timeout,
+                event_hooks={"request": [inject_headers_async]},
+                limits=httpx.Limits(
+                    max_connections=max_concurrency,
+                    max_keepalive_connections=max_concurrency,
+                ),
+            ),
+        )
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="zep-graph", daemon=True
+        )
+        self._thread.start()
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the graph's event loop from any thread"""
+        future = asyncio.run_coroutine_threadsafe(tracer.bind(coro), self._loop)
+        return future.result(timeout)
+
+    def batch(self, checkpoint=None):
+        """A batch for one conversation; resumes the one saved in checkpoint, if any"""
+        if checkpoint is not None and checkpoint.state is not None:
+            return GraphBatch.resume(self, checkpoint)
+        return GraphBatch(self, checkpoint=checkpoint)
+
+    async def call(self, fn, *args, **kwargs):
+        """Await one Zep SDK call under the rate, concurrency and retry limits"""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+        async with self._slots:
+            return await self.resilience.call_async(fn, *args, **kwargs)
+
+    @graph_helper("add_episode")
+    async def add_episode(self, actions):
+        return await self.call(
+            self.client.graph.add,
+            graph_id=self.graph_id,
+            type="json",
+            data=json.dumps({"actions": actions}),
+        )
+
+    async def warm_cache(self, page_size=100, max_nodes=20000):
+        """Preload existing graph nodes into the entity cache; returns how many"""
+        loaded = 0
+        cursor = None
+        while loaded < max_nodes:
+            nodes = await self.call(
+                self.client.graph.node.get_by_graph_id,
+                self.graph_id,
+                limit=page_size,
+                uuid_cursor=cursor,
+            )
+            if not nodes:
+                break
+            loaded += self.entity_cache.warm(self.graph_id, nodes)
+            if len(nodes) < page_size:
+                break
+            cursor = nodes[-1].uuid_
+        return loaded
+
+    @graph_helper("ensure_graph_exists")
+    async def ensure_graph_exists(self):
+        """Ensure the Zep graph exists, create if it doesn't"""
+        if self._ready:
+            return True
+
+        # Join the check already in flight, if any, rather than starting another
+        if self._readiness is None:
+            self._readiness = asyncio.ensure_future(self._make_ready())
+        readiness = self._readiness
+        try:
+            self._ready = await asyncio.shield(readiness)
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            log.error("Failed to ensure Zep graph %s: %s", self.graph_id, e)
+        finally:
+            # A failed check is not memoized; the next caller starts a fresh one
+            if not self._ready and readiness.done() and self._readiness is readiness:
+                self._readiness = None
+        return self._ready
+
+    async def _make_ready(self):
+        from zep_cloud.errors import NotFoundError
+
+        try:
+            await self.call(self.client.graph.get, self.graph_id)
+            return True
+        except NotFoundError:
+            pass
+
+        try:
+            await self.call(self.client.graph.create, graph_id=self.graph_id)
+            log.info("Created Zep graph: %s", self.graph_id)
+        except Exception as e:
+            # Another process may have created it first; the poll below will tell
+            log.warning("Failed to create Zep graph: %s", e)
+
+        return await self._wait_until_visible()
+
+    async def _wait_until_visible(self, first_delay=0.05, max_delay=2.0):
+        """Poll graph.get with exponential backoff until the graph can be read"""
+        from zep_cloud.errors import NotFoundError
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.ready_timeout
+        delay = first_delay
+        while True:
+            try:
+                await self.call(self.client.graph.get, self.graph_id)
+                return True
+            except NotFoundError:
+                if loop.time() + delay > deadline:
+                    log.error(
+                        "Zep graph %s not visible after %ss",
+                        self.graph_id,
+                        self.ready_timeout,
+                    )
+                    return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+    @graph_helper("entity_exists")
+    async def entity_exists(self, entity_type, name, batch):
+        """Check the current batch, then the entity cache, then search the graph"""
+        if batch.has_entity(entity_type, name):
+            return True
+        if self.entity_cache is not None and self.entity_cache.contains(
+            self.graph_id, entity_type, name
+        ):
+            return True
+
+        search_results = await self.call(
+            self.client.graph.search,
+            graph_id=self.graph_id,
+            query=name,
+            scope="nodes",
+            search_filters={"node_labels": [entity_type]},
+            limit=1,
+        )
+        if search_results.nodes and len(search_results.nodes) > 0:
+            if self.entity_cache is not None:
+                self.entity_cache.add(self.graph_id, entity_type, name)
+            return True
+        return False
+
+    @graph_helper("create_user_entity")
+    async def create_user_entity(self, speaker_name, batch):
+        """Create a user entity in the Zep graph"""
+        # Check if user already exists
+        if await self.entity_exists("User", speaker_name, batch):
+            log.debug("User %s already exists", speaker_name)
+            return True
+
+        # Create user entity
+        user_data = {
+            "action": "Create_entity",
+            "entity_type": "User",
+            "name": speaker_name,
+            "description": self.user_description.format(name=speaker_name),
+        }
+
+        batch.add(user_data)
+
+        log.debug("Queued user entity: %s", speaker_name)
+        return True
+
+    @graph_helper("extract_and_store_entities")
+    async def extract_and_store_entities(self, facts, speakers, batch):
+        """Extract entities from facts and store them in Zep graph"""
+        entities = self.extractor.extract(facts)
+
+        # Look up each distinct entity once, all lookups in flight together
+        distinct = {
+            (entity.entity_type, normalize_name(entity.name)): entity
+            for entity in entities
+        }
+        found = await asyncio.gather(
+            *(
+                self.entity_exists(entity.entity_type, entity.name, batch)
+                for entity in distinct.values()
+            )
+        )
+        exists = dict(zip(distinct, found))
+
+        for entity in entities:
+            # Create entity if it doesn't exist
+            key = (entity.entity_type, normalize_name(entity.name))
+            if not exists[key] and not batch.has_entity(
+                entity.entity_type, entity.name
+            ):
+                entity_data = {
+                    "action": "Create_entity",
+                    "entity_type": entity.entity_type,
+                    "name": entity.name,
+                    "description": entity.fact,
+                }
+
+                batch.add(entity_data)
+
+                log.debug("Queued %s entity: %s", entity.entity_type, entity.name)
+
+            # Create relationship between user and entity
+            relationship_data = {
+                "action": "Create_relationship",
+                "source_entity_type": "User",
+                "source_entity_name": entity.speaker,
+                "target_entity_type": entity.entity_type,
+                "target_entity_name": entity.name,
+                "relationship_type": entity.relationship_type,
+                "description": entity.fact,
+            }
+
+            batch.add(relationship_data)
+
+            log.debug(
+                "Queued relationship: %s -> %s -> %s",
+                entity.speaker,
+                entity.relationship_type,
+                entity.name,
+            )
+
+    @graph_helper("create_friendship_relationship")
+    async def create_friendship_relationship(self, speakers, batch):
+        """Create friendship relationships between conversation participants"""
+        if len(speakers) < 2:
+            return
+
+        try:
+            speaker_list = list(speakers)
+            for i in range(len(speaker_list)):
+                for j in range(i + 1, len(speaker_list)):
+                    speaker1, speaker2 = speaker_list[i], speaker_list[j]
+
+                    # Create bidirectional friendship
+                    for source, target in [(speaker1, speaker2), (speaker2, speaker1)]:
+                        friendship_data = {
+                            "action": "Create_relationship",
+                            "source_entity_type": "User",
+                            "source_entity_name": source,
+                            "target_entity_type": "User",
+                            "target_entity_name": target,
+                            "relationship_type": "FRIENDS_WITH",
+                            "description": self.friendship_description,
+                        }
+
+                        batch.add(friendship_data)
+
+                    log.debug("Queued friendship: %s <-> %s", speaker1, speaker2)
+
+        except Exception as e:
+            log.warning("Failed to create friendship relationships: %s", e)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app imports its sibling modules by name (see gunicorn.conf.py's chdir)
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "backend")
+)
@@ -0,0 +1,99 @@
+import json
+import types
+
+from analysis import Analyzer
+from resilience import Resilience
+
+SEGMENTS = [
+    types.SimpleNamespace(start=0.0, end=2.0, text="Hi, I'm Ana."),
+    types.SimpleNamespace(start=2.0, end=4.0, text="Ben, nice to meet you."),
+]
+TRANSCRIPT = [
+    {"speaker": "Ana", "text": "Hi, I'm Ana."},
+    {"speaker": "Ben", "text": "Ben, nice to meet you."},
+]
+
+
+class StubCompletions:
+    """Answers chat completions from a list, recording each request"""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        message = types.SimpleNamespace(content=answer)
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message)], usage=None
+        )
+
+
+def stub_client(*answers):
+    completions = StubCompletions(answers)
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    return client, completions
+
+
+def make_analyzer():
+    return Analyzer(Resilience("test", attempts=1, base_delay=0))
+
+
+def requested_sections(completions):
+    return [
+        request["response_format"]["json_schema"]["name"]
+        for request in completions.requests
+    ]
+
+
+def test_finish_keeps_a_complete_answer_without_calls():
+    client, completions = stub_client()
+    content = json.dumps(
+        {
+            "transcript": TRANSCRIPT,
+            "facts": [{"speaker": "Ana", "facts": ["Studies robotics"]}],
+            "summary": "Ana and Ben met.",
+        }
+    )
+
+    result, failed = make_analyzer().finish(client, content, SEGMENTS)
+
+    assert failed == []
+    assert result["facts"] == {"Ana": ["Studies robotics"]}
+    assert completions.requests == []
+
+
+def test_finish_repairs_only_the_missing_section():
+    client, completions = stub_client(json.dumps({"summary": "Ana and Ben met."}))
+    read = {"transcript": TRANSCRIPT, "facts": {"Ana": ["Studies robotics"]}}
+    # Cut off in the middle of the summary
+    content = json.dumps(read)[:-1] + ', "summary": "Ana an'
+
+    result, failed = make_analyzer().finish(client, content, SEGMENTS)
+
+    assert failed == []
+    assert result == {
+        "transcript": TRANSCRIPT,
+        "facts": {"Ana": ["Studies robotics"]},
+        "summary": "Ana and Ben met.",
+    }
+    assert requested_sections(completions) == ["summary"]
+    # The repair uses the speaker names already read from the transcript
+    assert "Ana and Ben" in completions.requests[0]["messages"][0]["content"]
+
+
+def test_finish_reports_sections_whose_repair_fails():
+    client, completions = stub_client(
+        "not json",
+        RuntimeError("upstream down"),
+        json.dumps({"summary": "Ana and Ben met."}),
+    )
+
+    result, failed = make_analyzer().finish(client, "```json\n{", SEGMENTS)
+
+    assert failed == ["transcript", "facts"]
+    assert result == {"summary": "Ana and Ben met."}
+    assert requested_sections(completions) == ["transcript", "facts", "summary"]
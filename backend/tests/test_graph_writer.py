@@ -0,0 +1,169 @@
+import asyncio
+import sqlite3
+
+from graph_batch import GraphBatch
+from graph_writer import GraphWriter
+
+
+class Deferred(Exception):
+    pass
+
+
+def make_writer(tmp_path, handler, **kwargs):
+    kwargs.setdefault("base_delay", 0)
+    return GraphWriter(str(tmp_path / "graph_queue.sqlite3"), handler, **kwargs)
+
+
+def rows(writer, table):
+    with sqlite3.connect(writer.db_path) as conn:
+        return conn.execute(f"SELECT * FROM {table}").fetchall()
+
+
+def test_successful_write_leaves_nothing_behind(tmp_path):
+    handled = []
+    writer = make_writer(tmp_path, lambda payload, checkpoint: handled.append(payload))
+
+    writer.enqueue({"conversation_id": "c1"})
+
+    assert writer.drain() == 1
+    assert handled == [{"conversation_id": "c1"}]
+    assert writer.stats()["pending"] == 0
+    assert rows(writer, "outbox_progress") == []
+
+
+def test_failed_write_is_retried(tmp_path):
+    attempts = []
+
+    def handler(payload, checkpoint):
+        attempts.append(payload)
+        if len(attempts) == 1:
+            raise RuntimeError("zep timeout")
+
+    writer = make_writer(tmp_path, handler)
+    writer.enqueue({"conversation_id": "c1"})
+
+    assert writer.drain() == 2
+    assert len(attempts) == 2
+    assert writer.stats() == {"pending": 0, "dead_letter": 0, "running": False}
+
+
+def test_failed_retry_waits_for_its_backoff(tmp_path):
+    def handler(payload, checkpoint):
+        raise RuntimeError("zep timeout")
+
+    writer = make_writer(tmp_path, handler, base_delay=60)
+    writer.enqueue({"conversation_id": "c1"})
+
+    assert writer.drain() == 1
+    [(_, _, attempts, *_rest)] = rows(writer, "outbox")
+    assert attempts == 1
+
+
+def test_write_is_dead_lettered_after_max_attempts(tmp_path):
+    def handler(payload, checkpoint):
+        raise RuntimeError("bad payload")
+
+    writer = make_writer(tmp_path, handler, max_attempts=3)
+    writer.enqueue({"conversation_id": "c1"}, dedupe_key="c1")
+
+    assert writer.drain() == 3
+    assert writer.stats()["pending"] == 0
+    [(_, _, attempts, error, _, _)] = rows(writer, "dead_letter")
+    assert (attempts, error) == (3, "bad payload")
+    # A dead-lettered conversation may be queued again
+    assert writer.enqueue({"conversation_id": "c1"}, dedupe_key="c1") is not None
+
+
+def test_deferred_write_keeps_its_attempts(tmp_path):
+    def handler(payload, checkpoint):
+        raise Deferred("circuit open")
+
+    writer = make_writer(tmp_path, handler, max_attempts=1, defer_on=(Deferred,))
+    writer.enqueue({"conversation_id": "c1"})
+
+    assert writer.drain() == 1
+    [(_, _, attempts, next_attempt_at, _, error, _)] = rows(writer, "outbox")
+    assert (attempts, error) == (0, "circuit open")
+    assert rows(writer, "dead_letter") == []
+
+
+def test_dedupe_key_queues_once(tmp_path):
+    writer = make_writer(tmp_path, lambda payload, checkpoint: None)
+
+    first = writer.enqueue({"conversation_id": "c1"}, dedupe_key="audio-1")
+    second = writer.enqueue({"conversation_id": "c1"}, dedupe_key="audio-1")
+
+    assert first is not None
+    assert second is None
+    assert writer.stats()["pending"] == 1
+
+
+def test_dedupe_key_expires(tmp_path):
+    writer = make_writer(tmp_path, lambda payload, checkpoint: None, dedupe_ttl=-1)
+
+    writer.enqueue({"conversation_id": "c1"}, dedupe_key="audio-1")
+
+    assert writer.enqueue({"conversation_id": "c1"}, dedupe_key="audio-1") is not None
+
+
+def test_retry_resumes_from_checkpoint(tmp_path):
+    seen = []
+
+    def handler(payload, checkpoint):
+        seen.append(checkpoint.state)
+        done = (checkpoint.state or {}).get("done", 0)
+        for step in range(done, 3):
+            if step == 1 and len(seen) == 1:
+                raise RuntimeError("failed at step 1")
+            checkpoint.save({"done": step + 1})
+
+    writer = make_writer(tmp_path, handler)
+    writer.enqueue({"conversation_id": "c1"})
+
+    assert writer.drain() == 2
+    assert seen == [None, {"done": 1}]
+    assert rows(writer, "outbox_progress") == []
+
+
+class StubGraph:
+    """Records episodes; the first attempt at episode `fail_at` raises"""
+
+    graph_id = "test-graph"
+    entity_cache = None
+
+    def __init__(self, fail_at):
+        self.fail_at = fail_at
+        self.sent = []
+        self.failed = False
+
+    async def add_episode(self, actions):
+        if len(self.sent) == self.fail_at and not self.failed:
+            self.failed = True
+            raise RuntimeError("zep timeout")
+        self.sent.append(actions)
+
+
+def test_graph_batch_resumes_after_a_failed_episode(tmp_path):
+    graph = StubGraph(fail_at=1)
+
+    async def write(payload, checkpoint):
+        if checkpoint.state is not None:
+            batch = GraphBatch.resume(graph, checkpoint)
+            await batch.flush()
+            return
+        async with GraphBatch(graph, max_chars=200, checkpoint=checkpoint) as batch:
+            for name in payload["names"]:
+                batch.add(
+                    {"action": "Create_entity", "entity_type": "User", "name": name}
+                )
+
+    writer = make_writer(
+        tmp_path, lambda payload, checkpoint: asyncio.run(write(payload, checkpoint))
+    )
+    writer.enqueue({"names": [f"person {i}" for i in range(8)]})
+
+    assert writer.drain() == 2
+    names = [action["name"] for episode in graph.sent for action in episode]
+    # Every entity was sent exactly once, across more than one episode
+    assert names == [f"person {i}" for i in range(8)]
+    assert len(graph.sent) > 2
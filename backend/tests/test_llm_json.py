@@ -0,0 +1,102 @@
+import json
+
+from llm_json import StreamingObjectParser, salvage_object, strip_json_fence
+
+ANSWER = {
+    "transcript": [
+        {"speaker": "Ana", "text": "Hi, I'm Ana."},
+        {"speaker": "Ben", "text": "Ben, nice to meet you."},
+    ],
+    "facts": [{"speaker": "Ana", "facts": ["Studies robotics"]}],
+    "summary": "Ana and Ben met.",
+}
+
+
+def feed_in_pieces(parser, text, size):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i : i + size]))
+    return events
+
+
+def test_strip_json_fence():
+    assert strip_json_fence('```json\n{"a": 1}\n```') == '{"a": 1}'
+    assert strip_json_fence('  {"a": 1}  ') == '{"a": 1}'
+
+
+def test_parser_streams_array_items_and_members():
+    parser = StreamingObjectParser(stream_arrays=("transcript",))
+    events = feed_in_pieces(parser, json.dumps(ANSWER), 7)
+
+    assert events == [
+        ("transcript", ANSWER["transcript"][0]),
+        ("transcript", ANSWER["transcript"][1]),
+        ("facts", ANSWER["facts"]),
+        ("summary", ANSWER["summary"]),
+    ]
+    assert parser.done
+
+
+def test_parser_skips_fence_before_object():
+    parser = StreamingObjectParser()
+    events = parser.feed("```json\n" + json.dumps({"summary": "ok"}) + "\n```")
+
+    assert events == [("summary", "ok")]
+
+
+def test_parser_holds_back_a_number_that_may_still_grow():
+    parser = StreamingObjectParser()
+
+    assert parser.feed('{"count": 12') == []
+    assert parser.feed("3}") == [("count", 123)]
+
+
+def test_parser_stops_on_truncated_answer():
+    text = json.dumps(ANSWER)
+    cut = text[: text.index('"summary"') + len('"summary": "Ana a')]
+    parser = StreamingObjectParser(stream_arrays=("transcript",))
+    events = parser.feed(cut)
+
+    assert [key for key, _ in events] == ["transcript", "transcript", "facts"]
+    assert not parser.done
+
+
+def test_parser_gives_up_on_non_object_text():
+    parser = StreamingObjectParser()
+
+    assert parser.feed('{"a" "b"}') == []
+    assert parser.done
+
+
+def test_salvage_parses_fenced_answer():
+    text = "```json\n" + json.dumps(ANSWER) + "\n```"
+
+    assert salvage_object(text) == ANSWER
+
+
+def test_salvage_keeps_members_before_truncation():
+    text = json.dumps(ANSWER)
+    cut = text[: text.index('"summary"') + len('"summary": "Ana a')]
+
+    members = salvage_object(cut, keys=("transcript", "facts", "summary"))
+
+    assert members == {"transcript": ANSWER["transcript"], "facts": ANSWER["facts"]}
+
+
+def test_salvage_finds_keys_after_a_broken_member():
+    text = (
+        '{"transcript": [{"speaker": "Ana", "text": "Hi"}], '
+        '"facts": {"Ana": ["Studies robotics"}, '
+        '"summary": "Short chat."}'
+    )
+
+    members = salvage_object(text, keys=("transcript", "facts", "summary"))
+
+    assert members["transcript"] == [{"speaker": "Ana", "text": "Hi"}]
+    assert members["summary"] == "Short chat."
+    assert "facts" not in members
+
+
+def test_salvage_returns_empty_dict_for_garbage():
+    assert salvage_object("I could not analyze this conversation.") == {}
+    assert salvage_object("[1, 2, 3]") == {}
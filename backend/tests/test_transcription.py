@@ -0,0 +1,48 @@
+import pytest
+
+import transcription
+from transcription import find_cut_points
+
+
+def check_chunks(cuts, duration, target):
+    assert cuts[0] == 0
+    assert cuts[-1] == duration
+    lengths = [end - start for start, end in zip(cuts, cuts[1:])]
+    # The last chunk is whatever is left, so only the others have a minimum
+    assert all(length >= target / 2 for length in lengths[:-1])
+    assert 0 < lengths[-1] <= target * 1.5
+
+
+def test_short_recording_is_one_chunk(monkeypatch):
+    monkeypatch.setattr(transcription, "CHUNK_SECONDS", 300)
+
+    assert find_cut_points(400_000, [(100_000, 101_000)]) == [0, 400_000]
+
+
+def test_cuts_snap_to_nearby_silence(monkeypatch):
+    monkeypatch.setattr(transcription, "CHUNK_SECONDS", 10)
+    silences = [(9_000, 9_600), (21_000, 21_400), (45_000, 46_000)]
+
+    cuts = find_cut_points(50_000, silences)
+
+    # Each cut snaps to the silence within 5s (half a chunk) of its target
+    assert cuts == [0, 9_300, 21_200, 31_200, 45_500, 50_000]
+    check_chunks(cuts, 50_000, 10_000)
+
+
+@pytest.mark.parametrize("chunk_seconds", [0, 0.2, 1, 1.7])
+def test_short_chunk_lengths_still_progress(monkeypatch, chunk_seconds):
+    monkeypatch.setattr(transcription, "CHUNK_SECONDS", chunk_seconds)
+    target = max(1000, int(chunk_seconds * 1000))
+    # A silence next to every target: no snap may leave a chunk under half of it
+    silences = [(ms, ms + 400) for ms in range(0, 20_000, 500)]
+
+    cuts = find_cut_points(20_000, silences)
+
+    check_chunks(cuts, 20_000, target)
+
+
+def test_without_silences_cuts_fall_on_the_target(monkeypatch):
+    monkeypatch.setattr(transcription, "CHUNK_SECONDS", 1)
+
+    assert find_cut_points(3_400) == [0, 1_000, 2_000, 3_400]
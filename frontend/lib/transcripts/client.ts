@@ -15,6 +15,25 @@ const backendBase =
   process.env.NEXT_PUBLIC_BACKEND_URL ||
   "http://localhost:5001";
 
+const JOB_POLL_INTERVAL_MS = 2000;
+// Well past the longest pipeline run; the backend fails jobs whose worker died,
+// so this only guards against a backend that stops answering sensibly
+const JOB_MAX_WAIT_MS = 30 * 60 * 1000;
+
+// /transcribe answers 202 with a job id; poll /jobs/<id> until it settles
+async function waitForJob(statusUrl: string) {
+  const deadline = Date.now() + JOB_MAX_WAIT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    const res = await fetch(`${backendBase}${statusUrl}`);
+    if (!res.ok) throw new Error("Failed to fetch transcription job");
+    const job = await res.json();
+    if (job.status === "done") return job.result;
+    if (job.status === "failed") throw new Error(job.error || "Transcription job failed");
+  }
+  throw new Error("Transcription job timed out");
+}
+
 export async function sendTranscriptClient(opts: {
   file?: File;
   conversationId?: string;
@@ -41,7 +60,10 @@ export async function sendTranscriptClient(opts: {
     });
 
     if (!res.ok) throw new Error("Failed to transcribe file");
-    const backendResponse = await res.json();
+    let backendResponse = await res.json();
+    if (res.status === 202 && backendResponse.status_url) {
+      backendResponse = await waitForJob(backendResponse.status_url);
+    }
 
     // Extract data from new backend format
     const transcript = backendResponse.transcript || [];